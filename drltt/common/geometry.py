@@ -48,33 +48,89 @@ def transform_between_local_and_world(points: np.ndarray, body_state: np.ndarray
     Returns:
         np.ndarray: Transformed points, shape=(N, 2).
     """
-    points, body_state = points.copy(), body_state.copy()
-    x, y, r = body_state[:3]
-
-    translation_matrix = np.array(
-        (
-            (1.0, 0.0, -x),
-            (0.0, 1.0, -y),
-            (0.0, 0.0, 1.0),
-        )
-    )
-    rotation_matrix = np.array(
-        (
-            (np.cos(r), np.sin(r), 0.0),
-            (-np.sin(r), np.cos(r), 0.0),
-            (0.0, 0.0, 1.0),
-        )
-    )
     if trans_dir == 'world_to_local':
-        transform_matrix = rotation_matrix @ translation_matrix
+        return batch_transform_to_local_from_world(points, body_state)
     elif trans_dir == 'local_to_world':
-        transform_matrix = np.linalg.inv(rotation_matrix @ translation_matrix)
+        return batch_transform_to_world_from_local(points, body_state)
     else:
         raise ValueError(f'Unknown transform direction: {trans_dir}')
 
-    transformed_points = transform_points(points, transform_matrix)
 
-    return transformed_points
+def _compute_batch_rotation_matrices(poses: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Compute rotation matrices that right-multiply row vectors of points from world frame to local frames.
+
+    Args:
+        poses: Poses, shape=(..., 3), format=<x, y, r>.
+        dtype: Data type of the matrices.
+
+    Returns:
+        np.ndarray: Rotation matrices ((cos(r), -sin(r)), (sin(r), cos(r))), shape=(..., 2, 2).
+            Their transposes right-multiply points from local frames to world frame.
+    """
+    r = poses[..., 2]
+    cos_r = np.cos(r)
+    sin_r = np.sin(r)
+    rotation_matrices = np.empty(r.shape + (2, 2), dtype=dtype)
+    rotation_matrices[..., 0, 0] = cos_r
+    rotation_matrices[..., 0, 1] = -sin_r
+    rotation_matrices[..., 1, 0] = sin_r
+    rotation_matrices[..., 1, 1] = cos_r
+
+    return rotation_matrices
+
+
+def batch_transform_to_local_from_world(
+    points: np.ndarray,
+    poses: np.ndarray,
+    out: Union[np.ndarray, None] = None,
+) -> np.ndarray:
+    """Transform points from the world frame to the local (body) frames, with fused rotation and translation.
+
+    Poses broadcast over points, e.g. points with shape=(N, 2) and pose with shape=(3,),
+        or points with shape=(B, N, 2) and poses with shape=(B, 3).
+    The data type of points (e.g. float32) is preserved.
+
+    Args:
+        points: Points in world frame, shape=(..., N, 2).
+        poses: Poses of local frames in world frame, shape=(..., 3), format=<x, y, r>.
+        out: Output buffer, shape=(..., N, 2). Can be `points` itself for in-place transform.
+
+    Returns:
+        np.ndarray: Points in local frames, shape=(..., N, 2).
+    """
+    points = np.asarray(points)
+    poses = np.asarray(poses)
+    dtype = points.dtype if np.issubdtype(points.dtype, np.floating) else np.float64
+    displacements = points - poses[..., np.newaxis, :2].astype(dtype, copy=False)
+
+    return np.matmul(displacements, _compute_batch_rotation_matrices(poses, dtype), out=out)
+
+
+def batch_transform_to_world_from_local(
+    points: np.ndarray,
+    poses: np.ndarray,
+    out: Union[np.ndarray, None] = None,
+) -> np.ndarray:
+    """Transform points from the local (body) frames to the world frame, with fused rotation and translation.
+
+    Uses the closed-form inverse of `batch_transform_to_local_from_world`, i.e. the transposed rotation.
+
+    Args:
+        points: Points in local frames, shape=(..., N, 2).
+        poses: Poses of local frames in world frame, shape=(..., 3), format=<x, y, r>.
+        out: Output buffer, shape=(..., N, 2). Can be `points` itself for in-place transform.
+
+    Returns:
+        np.ndarray: Points in world frame, shape=(..., N, 2).
+    """
+    points = np.asarray(points)
+    poses = np.asarray(poses)
+    dtype = points.dtype if np.issubdtype(points.dtype, np.floating) else np.float64
+    rotation_matrices = _compute_batch_rotation_matrices(poses, dtype)
+    out = np.matmul(points.astype(dtype, copy=False), np.swapaxes(rotation_matrices, -1, -2), out=out)
+    out += poses[..., np.newaxis, :2].astype(dtype, copy=False)
+
+    return out
 
 
 def transform_to_local_from_world(points: np.ndarray, body_state: np.ndarray) -> np.ndarray:
@@ -0,0 +1,74 @@
+import numpy as np
+
+from drltt.common.geometry import (
+    transform_points,
+    transform_to_local_from_world,
+    transform_to_world_from_local,
+    batch_transform_to_local_from_world,
+    batch_transform_to_world_from_local,
+)
+
+
+def _transform_to_local_from_world_by_matrix(points: np.ndarray, body_state: np.ndarray) -> np.ndarray:
+    x, y, r = body_state[:3]
+    transform_matrix = np.array(
+        (
+            (np.cos(r), np.sin(r), -np.cos(r) * x - np.sin(r) * y),
+            (-np.sin(r), np.cos(r), np.sin(r) * x - np.cos(r) * y),
+            (0.0, 0.0, 1.0),
+        )
+    )
+    return transform_points(points, transform_matrix)
+
+
+def test_transform_between_local_and_world():
+    np.random.seed(0)
+    points = np.random.uniform(-10.0, 10.0, size=(16, 2))
+    body_state = np.array((1.0, -2.0, np.pi / 3))
+
+    local_points = transform_to_local_from_world(points, body_state)
+    assert np.allclose(local_points, _transform_to_local_from_world_by_matrix(points, body_state))
+    assert np.allclose(transform_to_world_from_local(local_points, body_state), points)
+
+    # the body position is the origin of the local frame and the heading is its x-axis
+    assert np.allclose(transform_to_local_from_world(body_state[np.newaxis, :2], body_state), 0.0)
+    heading_point = body_state[:2] + (np.cos(body_state[2]), np.sin(body_state[2]))
+    assert np.allclose(transform_to_local_from_world(heading_point[np.newaxis], body_state), ((1.0, 0.0),))
+
+
+def test_batch_transform():
+    np.random.seed(0)
+    batch_size, n_points = 8, 16
+    points = np.random.uniform(-10.0, 10.0, size=(batch_size, n_points, 2)).astype(np.float32)
+    poses = np.random.uniform((-5.0, -5.0, -np.pi), (5.0, 5.0, np.pi), size=(batch_size, 3))
+
+    local_points = batch_transform_to_local_from_world(points, poses)
+    assert local_points.shape == points.shape
+    assert local_points.dtype == np.float32
+    for batch_idx in range(batch_size):
+        expected = _transform_to_local_from_world_by_matrix(points[batch_idx].astype(np.float64), poses[batch_idx])
+        assert np.allclose(local_points[batch_idx], expected, atol=1e-4)
+
+    # closed-form inverse
+    world_points = batch_transform_to_world_from_local(local_points, poses)
+    assert world_points.dtype == np.float32
+    assert np.allclose(world_points, points, atol=1e-4)
+
+    # output buffer and in-place transform
+    out = np.empty_like(points)
+    assert batch_transform_to_local_from_world(points, poses, out=out) is out
+    assert np.array_equal(out, local_points)
+    in_place_points = points.copy()
+    batch_transform_to_local_from_world(in_place_points, poses, out=in_place_points)
+    batch_transform_to_world_from_local(in_place_points, poses, out=in_place_points)
+    assert np.allclose(in_place_points, points, atol=1e-4)
+
+    # points shared by all poses
+    local_points = batch_transform_to_local_from_world(points[0], poses)
+    assert local_points.shape == (batch_size, n_points, 2)
+    assert np.allclose(local_points[1], batch_transform_to_local_from_world(points[0], poses[1]))
+
+
+if __name__ == '__main__':
+    test_transform_between_local_and_world()
+    test_batch_transform()
@@ -1,6 +1,7 @@
 import numpy as np
+import gymnasium
 
-from gym.spaces import Space
+from gym.spaces import Space, Box
 
 
 def scale_action(action: np.ndarray, action_space: Space) -> np.ndarray:
@@ -15,3 +16,18 @@ def scale_action(action: np.ndarray, action_space: Space) -> np.ndarray:
     """
     scaled_action = 2 * (action - action_space.low) / (action_space.high - action_space.low) - 1
     return scaled_action
+
+
+def convert_box_space_to_gymnasium(space: Box) -> gymnasium.spaces.Box:
+    """Convert a `gym` box space into a `gymnasium` one.
+
+    Stable Baselines 3 only accepts `gymnasium` spaces from a `VecEnv`,
+        while `gym` environments are patched automatically.
+
+    Args:
+        space: Box space from `gym`.
+
+    Returns:
+        gymnasium.spaces.Box: Box space from `gymnasium` with identical bounds, shape, and dtype.
+    """
+    return gymnasium.spaces.Box(low=space.low, high=space.high, shape=space.shape, dtype=space.dtype)
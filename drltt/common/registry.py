@@ -119,7 +119,6 @@ def build_object_within_registry_from_config(
     """
     config = deepcopy(config)
     config = dict(**config)
-    kwargs = deepcopy(kwargs)
     config.update(kwargs)
     class_name = config.pop('type')
     obj = registry[class_name](**config)
@@ -4,11 +4,12 @@ DYNAMICS_MODELS = Registry()
 
 from .base_dynamics_model import BaseDynamicsModel
 from .dynamics_model_manager import DynamicsModelManager
-from .bicycle_model import BicycleModel
+from .bicycle_model import BicycleModel, BicycleModelParameterTable
 
 
 __all__ = [
     'BaseDynamicsModel',
     'BicycleModel',
+    'BicycleModelParameterTable',
     'DynamicsModelManager',
 ]
@@ -152,9 +152,12 @@ class BaseDynamicsModel(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def get_dynamics_model_observation(self) -> np.ndarray:
+    def get_dynamics_model_observation(self, out: Union[np.ndarray, None] = None) -> np.ndarray:
         """Get dynamics model observationm usually containing hyper-parameter of the model.
 
+        Args:
+            out: Output buffer. Default to a newly allocated array.
+
         Returns:
             np.ndarray: Vectorized dynamics model observation.
         """
@@ -178,9 +181,12 @@ class BaseDynamicsModel(ABC):
         return space
 
     @abstractmethod
-    def get_state_observation(self) -> np.ndarray:
+    def get_state_observation(self, out: Union[np.ndarray, None] = None) -> np.ndarray:
         """Return state observation of the dynamics model, which is usually body state-independent/ego centric.
 
+        Args:
+            out: Output buffer. Default to a newly allocated array.
+
         Returns:
             np.ndarray: Vectorised State observation.
         """
@@ -222,14 +228,16 @@ class BaseDynamicsModel(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def jacobian(self, state: np.ndarray, action: np.ndarray) -> np.ndarray:
-        """Compute jacobian by performing linearization at a given point (state-action pair).
+    def jacobian(self, state: np.ndarray, action: np.ndarray, delta_t: float) -> np.ndarray:
+        """Compute jacobian of the discrete step by performing linearization at a given point (state-action pair).
 
         Args:
             state: State at the linearization point, shape=(n_dims_state,).
             action: Action at the linearization point, shape(n_dims_action,).
+            delta_t: Time interval of the step.
 
         Returns:
-            np.ndarray: Jacobian matrix, shape=(n_dims_state, n_dims_state + n_dims_action).
+            np.ndarray: Jacobian matrix of the next state w.r.t. state and action,
+                shape=(n_dims_state, n_dims_state + n_dims_action).
         """
         raise NotImplementedError
@@ -1,4 +1,4 @@
-from typing import Tuple, Iterable, Union, Any
+from typing import Any, Dict, Iterator, List, Tuple, Iterable, Union
 
 import math
 from copy import deepcopy
@@ -12,8 +12,10 @@ from drltt.common.geometry import normalize_angle
 
 from drltt.simulator import DTYPE, EPSILON
 from . import BaseDynamicsModel, DYNAMICS_MODELS
+from .integrators import check_integrator, integrate, integrate_scalars, integrate_jacobians
 
 from drltt_proto.dynamics_model.hyper_parameter_pb2 import HyperParameter, BicycleModelHyperParameter
+from drltt_proto.dynamics_model.basics_pb2 import BodyState
 from drltt_proto.dynamics_model.state_pb2 import State
 from drltt_proto.dynamics_model.action_pb2 import Action
 from drltt_proto.dynamics_model.observation_pb2 import Observation
@@ -42,10 +44,55 @@ class BicycleModel(BaseDynamicsModel):
             # set parsed hyper-parameter
             self.hyper_parameter.CopyFrom(hyper_parameter)
 
-        self.state = State()
+        self._precompute_constants()
+        self._state = np.zeros((4,), dtype=DTYPE)
 
         super().__init__(**kwargs)
 
+    def _precompute_constants(self):
+        """Precompute constants derived from hyper-parameter, which are used on every step."""
+        hyper_parameter: BicycleModelHyperParameter = self.hyper_parameter.bicycle_model
+        self._rearwheel_to_cog = hyper_parameter.rearwheel_to_cog
+        self._rearwheel_to_cog_inv = (
+            1.0 / hyper_parameter.rearwheel_to_cog if hyper_parameter.rearwheel_to_cog else math.inf
+        )
+        self._max_lat_acc = hyper_parameter.max_lat_acc
+        axles_to_cog = hyper_parameter.rearwheel_to_cog + hyper_parameter.frontwheel_to_cog
+        # NaN for a degenerate model (e.g. zero wheelbase), as in the case of computing from hyper-parameter
+        self._cog_relative_position_between_axles = (
+            hyper_parameter.rearwheel_to_cog / axles_to_cog if axles_to_cog != 0.0 else math.nan
+        )
+        # default values for hyper-parameter without integration settings
+        self._integrator = self.hyper_parameter.integrator or 'euler'
+        self._n_substeps = self.hyper_parameter.n_substeps or 1
+        check_integrator(self._integrator, self._n_substeps)
+
+    @property
+    def state(self) -> State:
+        """State in proto, built on demand from the underlying vectorized state."""
+        return self.serialize_state(self._state)
+
+    @state.setter
+    def state(self, new_state: State):
+        self._state = self.deserialize_state(new_state)
+
+    @override
+    def get_state(self) -> np.ndarray:
+        return self._state.copy()
+
+    @override
+    def set_state(self, new_state: Union[np.ndarray, State]):
+        """Set state.
+
+        Args:
+            new_state: New state, either vectorized or in proto.
+        """
+        if isinstance(new_state, State):
+            self.state = new_state
+            return
+        self._state = np.array(new_state, dtype=DTYPE).reshape(4)
+        self._state[2] = normalize_angle(self._state[2])
+
     @classmethod
     def parse_hyper_parameter(
         cls,
@@ -58,6 +105,8 @@ class BicycleModel(BaseDynamicsModel):
         action_space_lb: Iterable[float] = (-math.inf, -math.inf),
         action_space_ub: Iterable[float] = (+math.inf, +math.inf),
         max_lat_acc: float = 4.0,
+        integrator: str = 'euler',
+        n_substeps: int = 1,
         **kwargs,
     ):
         """
@@ -71,9 +120,13 @@ class BicycleModel(BaseDynamicsModel):
             action_space_lb: Lower bound of action space.
             action_space_ub: Upper bound of action space.
             max_lat_acc: Maximum lateral acceleration.
+            integrator: Numerical integrator of dynamics within a step, see `INTEGRATORS`.
+            n_substeps: Number of sub-steps that a step is divided into for integration.
         """
         hyper_parameter.type = cls.__name__
         hyper_parameter.name = name
+        hyper_parameter.integrator = integrator
+        hyper_parameter.n_substeps = n_substeps
         hyper_parameter.bicycle_model.front_overhang = front_overhang
         hyper_parameter.bicycle_model.wheelbase = wheelbase
         hyper_parameter.bicycle_model.rear_overhang = rear_overhang
@@ -92,7 +145,7 @@ class BicycleModel(BaseDynamicsModel):
         serialized_state = State()
         serialized_state.bicycle_model.body_state.x = state[0]
         serialized_state.bicycle_model.body_state.y = state[1]
-        serialized_state.bicycle_model.body_state.r = normalize_angle(state[2])
+        serialized_state.bicycle_model.body_state.r = normalize_angle(float(state[2]))
         serialized_state.bicycle_model.v = state[3]
 
         return serialized_state
@@ -109,8 +162,10 @@ class BicycleModel(BaseDynamicsModel):
         return deserialized_state
 
     @override
-    def get_body_state_proto(self):
-        return self.state.bicycle_model.body_state
+    def get_body_state_proto(self) -> BodyState:
+        x, y, r, _ = self._state.tolist()
+
+        return BodyState(x=x, y=y, r=r)
 
     @classmethod
     @override
@@ -138,56 +193,75 @@ class BicycleModel(BaseDynamicsModel):
 
         return serialized_observation
 
-    def _compute_derivative(self, state: State, action: Action) -> State:
-        x = state.bicycle_model.body_state.x
-        y = state.bicycle_model.body_state.y
-        r = state.bicycle_model.body_state.r
-        v = state.bicycle_model.v
-        a = action.bicycle_model.a
-        s = action.bicycle_model.s
+    def _compute_derivative(self, x: float, y: float, r: float, v: float, a: float, s: float) -> Tuple[float, ...]:
+        """Compute derivative of state with scalar arithmetics, which is cheaper than NumPy on a single state.
 
+        Args:
+            x, y, r, v: State.
+            a, s: Action.
+
+        Returns:
+            Tuple[float, ...]: Derivative of state, format=<dx_dt, dy_dt, dr_dt, dv_dt>.
+        """
         # clip steering angle due to limit on lateral acceleration.
-        s = np.clip(s, -self.max_steer, +self.max_steer)
+        max_s = self._compute_max_steer(v)
+        s = min(max(s, -max_s), +max_s)
 
         omega, rotation_radius_inv = self._compute_rotation_related_variables(s)
 
-        dx_dt = v * np.cos(r + omega)
-        dy_dt = v * np.sin(r + omega)
+        dx_dt = v * math.cos(r + omega)
+        dy_dt = v * math.sin(r + omega)
         dr_dt = v * rotation_radius_inv
         dv_dt = a
 
-        derivative = State()
-        derivative.bicycle_model.body_state.x = dx_dt
-        derivative.bicycle_model.body_state.y = dy_dt
-        derivative.bicycle_model.body_state.r = dr_dt
-        derivative.bicycle_model.v = dv_dt
-
-        return derivative
+        return dx_dt, dy_dt, dr_dt, dv_dt
 
     @property
     def cog_relative_position_between_axles(self) -> float:
         """Relative position of Center of Gravity (CoG) between axles"""
-        hyper_parameter: BicycleModelHyperParameter = self.hyper_parameter.bicycle_model
-        return hyper_parameter.rearwheel_to_cog / (hyper_parameter.rearwheel_to_cog + hyper_parameter.frontwheel_to_cog)
+        return self._cog_relative_position_between_axles
+
+    @property
+    def integrator(self) -> str:
+        """Numerical integrator of dynamics within a step."""
+        return self._integrator
+
+    @property
+    def n_substeps(self) -> int:
+        """Number of sub-steps that a step is divided into for integration."""
+        return self._n_substeps
 
     def _compute_rotation_related_variables(self, steering_angle: float) -> Tuple[float, float]:
         """Compute variables related to the rotation of the Center of Gravity (CoG)
 
         Args:
             steering_angle: Current steering_angle of the vehicle.
-            hyper_parameter: Vehicle's hyper parameter.
         Returns:
             omega: The angle between the heading of vehicle and the speed direction of the CoG.
             rotation_radius_inv: The inverse of the  radius of the rotation of the CoG. Ensuring numerical stability.
 
         """
-        hyper_parameter: BicycleModelHyperParameter = self.hyper_parameter.bicycle_model
-        omega = np.arctan(self.cog_relative_position_between_axles * np.tan(steering_angle))
-        omega = normalize_angle(omega)
-        rotation_radius_inv = np.sin(omega) / hyper_parameter.rearwheel_to_cog
+        omega = math.atan(self._cog_relative_position_between_axles * math.tan(steering_angle))
+        rotation_radius_inv = math.sin(omega) * self._rearwheel_to_cog_inv
 
         return omega, rotation_radius_inv
 
+    def _compute_max_steer(self, v: float) -> float:
+        """Compute maximum steering angle at a speed, see `max_steer`.
+
+        Args:
+            v: Speed.
+
+        Returns:
+            float: Maximum steering angle.
+        """
+        asin_arg = self._rearwheel_to_cog * self._max_lat_acc / max(v * v, EPSILON)
+        if asin_arg <= 1.0:
+            # equivalent to arctan(tan(arcsin(asin_arg)) / cog_relative_position_between_axles), defined at zero
+            return math.atan2(math.tan(math.asin(asin_arg)), self._cog_relative_position_between_axles)
+        else:
+            return math.pi
+
     @property
     def max_steer(self) -> float:
         """Maximum steering angle brought by the limit on lateral acceleration.
@@ -195,54 +269,306 @@ class BicycleModel(BaseDynamicsModel):
         Return:
             Maximum steering angle.
         """
-        hyper_parameter: BicycleModelHyperParameter = self.hyper_parameter.bicycle_model
-        max_lat_acc = hyper_parameter.max_lat_acc
-        v = self.state.bicycle_model.v
+        return self._compute_max_steer(float(self._state[3]))
 
-        asin_arg = hyper_parameter.rearwheel_to_cog * max_lat_acc / np.maximum((v**2), EPSILON)
+    def compute_next_state_array(self, state: np.ndarray, action: np.ndarray, delta_t: float) -> np.ndarray:
+        """Proceed a step forward from a given state, on arrays only.
 
-        if asin_arg <= 1.0:
-            max_s = np.arctan(np.tan(np.arcsin(asin_arg)) / self.cog_relative_position_between_axles)
+        Args:
+            state: Vectorized state, shape=(4,), format=<x, y, r, v>.
+            action: Vectorized action, shape=(2,), format=<a, s>.
+            delta_t: Time interval.
+
+        Returns:
+            np.ndarray: Next state, shape=(4,).
+        """
+        x, y, r, v = state.tolist()
+        a, s = action.tolist()
+        if self._integrator == 'euler' and self._n_substeps == 1:
+            # fast path of the default setting
+            dx_dt, dy_dt, dr_dt, dv_dt = self._compute_derivative(x, y, r, v, a, s)
+            x, y, r, v = x + dx_dt * delta_t, y + dy_dt * delta_t, r + dr_dt * delta_t, v + dv_dt * delta_t
         else:
-            max_s = +np.pi
+            x, y, r, v = integrate_scalars(
+                lambda x, y, r, v: self._compute_derivative(x, y, r, v, a, s),
+                (x, y, r, v),
+                delta_t,
+                integrator=self._integrator,
+                n_substeps=self._n_substeps,
+            )
+
+        return np.array((x, y, (r + math.pi) % (2 * math.pi) - math.pi, v), dtype=DTYPE)
 
-        return max_s
+    @override
+    def step(self, action: np.ndarray, delta_t: float):
+        self._state = self.compute_next_state_array(self._state, np.asarray(action), delta_t)
 
     @override
-    def compute_next_state(self, action: np.ndarray, delta_t: float) -> Any:
-        action = self.serialize_action(action)
-        state_derivative = self._compute_derivative(self.state, action)
-        next_state = self.serialize_state(
-            self.deserialize_state(self.state) + self.deserialize_state(state_derivative) * delta_t
+    def compute_next_state(self, action: np.ndarray, delta_t: float) -> State:
+        return self.serialize_state(self.compute_next_state_array(self._state, np.asarray(action), delta_t))
+
+    @classmethod
+    def compute_batch_max_steers(
+        cls,
+        v: np.ndarray,
+        rearwheel_to_cog: np.ndarray,
+        cog_relative_position_between_axles: np.ndarray,
+        max_lat_acc: np.ndarray,
+    ) -> np.ndarray:
+        """Vectorized version of `max_steer` over a batch of speeds and hyper-parameters.
+
+        All arguments are broadcastable to shape=(B,).
+
+        Args:
+            v: Speeds, shape=(B,).
+            rearwheel_to_cog: Distances between rear axle and CoG, shape=(B,).
+            cog_relative_position_between_axles: Relative positions of CoG between axles, shape=(B,).
+            max_lat_acc: Maximum lateral accelerations, shape=(B,).
+
+        Returns:
+            np.ndarray: Maximum steering angles, shape=(B,).
+        """
+        asin_arg = rearwheel_to_cog * max_lat_acc / np.maximum((v**2), EPSILON)
+        valid = asin_arg <= 1.0
+        max_s = np.arctan(
+            np.tan(np.arcsin(np.where(valid, asin_arg, 1.0))) / cog_relative_position_between_axles,
         )
 
-        return next_state
+        return np.where(valid, max_s, +np.pi)
 
-    @override
-    def get_dynamics_model_observation(self) -> np.ndarray:
-        hyper_parameter: BicycleModelHyperParameter = self.hyper_parameter.bicycle_model
-        observation = np.array(
-            (
-                hyper_parameter.front_overhang,
-                hyper_parameter.wheelbase,
-                hyper_parameter.rear_overhang,
-                hyper_parameter.width,
-                hyper_parameter.length,
-                hyper_parameter.max_lat_acc,
+    @classmethod
+    def compute_batch_derivatives(
+        cls,
+        states: np.ndarray,
+        actions: np.ndarray,
+        rearwheel_to_cog: np.ndarray,
+        cog_relative_position_between_axles: np.ndarray,
+        max_lat_acc: np.ndarray,
+    ) -> np.ndarray:
+        """Vectorized version of `_compute_derivative` over a batch of state-action pairs.
+
+        Args:
+            states: Vectorized states, shape=(B, 4), format=<x, y, r, v>.
+            actions: Vectorized actions, shape=(B, 2), format=<a, s>.
+            rearwheel_to_cog: Distances between rear axle and CoG, shape=(B,).
+            cog_relative_position_between_axles: Relative positions of CoG between axles, shape=(B,).
+            max_lat_acc: Maximum lateral accelerations, shape=(B,).
+
+        Returns:
+            np.ndarray: Derivatives of states, shape=(B, 4), format=<dx_dt, dy_dt, dr_dt, dv_dt>.
+        """
+        r, v = states[:, 2], states[:, 3]
+        a, s = actions[:, 0], actions[:, 1]
+
+        # clip steering angle due to limit on lateral acceleration.
+        max_s = cls.compute_batch_max_steers(v, rearwheel_to_cog, cog_relative_position_between_axles, max_lat_acc)
+        s = np.clip(s, -max_s, +max_s)
+
+        omega = normalize_angle(np.arctan(cog_relative_position_between_axles * np.tan(s)))
+        rotation_radius_inv = np.sin(omega) / rearwheel_to_cog
+
+        derivatives = np.empty((len(states), 4), dtype=np.result_type(v, omega))
+        derivatives[:, 0] = v * np.cos(r + omega)
+        derivatives[:, 1] = v * np.sin(r + omega)
+        derivatives[:, 2] = v * rotation_radius_inv
+        derivatives[:, 3] = a
+
+        return derivatives
+
+    @classmethod
+    def compute_batch_next_states(
+        cls,
+        states: np.ndarray,
+        actions: np.ndarray,
+        delta_t: float,
+        rearwheel_to_cog: np.ndarray,
+        cog_relative_position_between_axles: np.ndarray,
+        max_lat_acc: np.ndarray,
+        dtype: np.dtype = DTYPE,
+        integrator: str = 'euler',
+        n_substeps: int = 1,
+    ) -> np.ndarray:
+        """Vectorized version of `compute_next_state` over a batch of state-action pairs.
+
+        Hyper-parameter arguments are broadcastable to shape=(B,),
+            thus a batch may contain vehicles with different hyper-parameters.
+
+        Args:
+            states: Vectorized states, shape=(B, 4), format=<x, y, r, v>.
+            actions: Vectorized actions, shape=(B, 2), format=<a, s>.
+            delta_t: Time interval.
+            rearwheel_to_cog: Distances between rear axle and CoG, shape=(B,).
+            cog_relative_position_between_axles: Relative positions of CoG between axles, shape=(B,).
+            max_lat_acc: Maximum lateral accelerations, shape=(B,).
+            dtype: Data type of next states, e.g. `np.float64` for optimization.
+            integrator: Numerical integrator, see `INTEGRATORS`.
+            n_substeps: Number of sub-steps.
+
+        Returns:
+            np.ndarray: Next states, shape=(B, 4).
+        """
+        next_states = integrate(
+            lambda stage_states: cls.compute_batch_derivatives(
+                stage_states, actions, rearwheel_to_cog, cog_relative_position_between_axles, max_lat_acc
             ),
-            dtype=DTYPE,
+            states,
+            delta_t,
+            integrator=integrator,
+            n_substeps=n_substeps,
+        )
+        next_states = next_states.astype(dtype, copy=False)
+        next_states[:, 2] = normalize_angle(next_states[:, 2])
+
+        return next_states
+
+    @classmethod
+    def compute_batch_derivative_jacobians(
+        cls,
+        states: np.ndarray,
+        actions: np.ndarray,
+        rearwheel_to_cog: np.ndarray,
+        cog_relative_position_between_axles: np.ndarray,
+        max_lat_acc: np.ndarray,
+    ) -> np.ndarray:
+        """Closed-form Jacobians of `compute_batch_derivatives` w.r.t. states and actions.
+
+        Clipping of steering angle is differentiated piecewise: within the limit, the derivative depends on
+            the steering angle; beyond the limit, it depends on the speed through the maximum steering angle instead.
+        Computation is in float64.
+
+        Args:
+            states: Vectorized states, shape=(B, 4), format=<x, y, r, v>.
+            actions: Vectorized actions, shape=(B, 2), format=<a, s>.
+            rearwheel_to_cog: Distances between rear axle and CoG, shape=(B,).
+            cog_relative_position_between_axles: Relative positions of CoG between axles, shape=(B,).
+            max_lat_acc: Maximum lateral accelerations, shape=(B,).
+
+        Returns:
+            np.ndarray: Jacobians, shape=(B, 4, 6), where [..., :4] are w.r.t. states and [..., 4:] w.r.t. actions.
+        """
+        states = np.asarray(states, dtype=np.float64)
+        actions = np.asarray(actions, dtype=np.float64)
+        r, v = states[:, 2], states[:, 3]
+        s = actions[:, 1]
+        k = cog_relative_position_between_axles
+
+        # maximum steering angle and its derivative w.r.t. speed
+        v_sq = np.maximum(v**2, EPSILON)
+        asin_arg = rearwheel_to_cog * max_lat_acc / v_sq
+        valid = asin_arg < 1.0
+        safe_asin_arg = np.where(valid, asin_arg, 0.0)
+        tan_asin = safe_asin_arg / np.sqrt(1.0 - safe_asin_arg**2)
+        max_s = cls.compute_batch_max_steers(v, rearwheel_to_cog, k, max_lat_acc)
+        d_asin_arg_d_v = np.where(v**2 > EPSILON, -2.0 * asin_arg / np.where(v == 0.0, 1.0, v), 0.0)
+        d_max_s_d_v = np.where(
+            valid,
+            k / (k**2 + tan_asin**2) * (1.0 - safe_asin_arg**2) ** -1.5 * d_asin_arg_d_v,
+            0.0,
+        )
+
+        # clipped steering angle and its derivatives
+        clipped_s = np.clip(s, -max_s, +max_s)
+        within_limit = np.abs(s) <= max_s
+        d_s_d_s = within_limit.astype(np.float64)
+        d_s_d_v = np.where(within_limit, 0.0, np.sign(s) * d_max_s_d_v)
+
+        # slip angle of CoG and its derivative w.r.t. clipped steering angle
+        tan_s = np.tan(clipped_s)
+        omega = np.arctan(k * tan_s)
+        d_omega_d_s = k * (1.0 + tan_s**2) / (1.0 + (k * tan_s) ** 2)
+        d_omega_d_v = d_omega_d_s * d_s_d_v
+        d_omega_d_action_s = d_omega_d_s * d_s_d_s
+
+        cos_heading, sin_heading = np.cos(r + omega), np.sin(r + omega)
+        rotation_radius_inv = np.sin(omega) / rearwheel_to_cog
+        d_rotation_radius_inv_d_omega = np.cos(omega) / rearwheel_to_cog
+
+        jacobians = np.zeros((len(states), 4, 6), dtype=np.float64)
+        jacobians[:, 0, 2] = -v * sin_heading
+        jacobians[:, 0, 3] = cos_heading - v * sin_heading * d_omega_d_v
+        jacobians[:, 0, 5] = -v * sin_heading * d_omega_d_action_s
+        jacobians[:, 1, 2] = v * cos_heading
+        jacobians[:, 1, 3] = sin_heading + v * cos_heading * d_omega_d_v
+        jacobians[:, 1, 5] = v * cos_heading * d_omega_d_action_s
+        jacobians[:, 2, 3] = rotation_radius_inv + v * d_rotation_radius_inv_d_omega * d_omega_d_v
+        jacobians[:, 2, 5] = v * d_rotation_radius_inv_d_omega * d_omega_d_action_s
+        jacobians[:, 3, 4] = 1.0
+
+        return jacobians
+
+    @classmethod
+    def compute_batch_jacobians(
+        cls,
+        states: np.ndarray,
+        actions: np.ndarray,
+        delta_t: float,
+        rearwheel_to_cog: np.ndarray,
+        cog_relative_position_between_axles: np.ndarray,
+        max_lat_acc: np.ndarray,
+        integrator: str = 'euler',
+        n_substeps: int = 1,
+    ) -> np.ndarray:
+        """Jacobians of `compute_batch_next_states` w.r.t. states and actions.
+
+        Chained through stages and sub-steps of the integrator from `compute_batch_derivative_jacobians`.
+        Normalization of heading is treated as identity. Computation is in float64.
+
+        Args:
+            states: Vectorized states, shape=(B, 4), format=<x, y, r, v>.
+            actions: Vectorized actions, shape=(B, 2), format=<a, s>.
+            delta_t: Time interval.
+            rearwheel_to_cog: Distances between rear axle and CoG, shape=(B,).
+            cog_relative_position_between_axles: Relative positions of CoG between axles, shape=(B,).
+            max_lat_acc: Maximum lateral accelerations, shape=(B,).
+            integrator: Numerical integrator, see `INTEGRATORS`.
+            n_substeps: Number of sub-steps.
+
+        Returns:
+            np.ndarray: Jacobians, shape=(B, 4, 6), where [..., :4] are w.r.t. states and [..., 4:] w.r.t. actions.
+        """
+        states = np.asarray(states, dtype=np.float64)
+        actions = np.asarray(actions, dtype=np.float64)
+        dynamics_parameters = dict(
+            rearwheel_to_cog=rearwheel_to_cog,
+            cog_relative_position_between_axles=cog_relative_position_between_axles,
+            max_lat_acc=max_lat_acc,
         )
 
-        return observation
+        return integrate_jacobians(
+            lambda stage_states: cls.compute_batch_derivatives(stage_states, actions, **dynamics_parameters),
+            lambda stage_states: cls.compute_batch_derivative_jacobians(stage_states, actions, **dynamics_parameters),
+            states,
+            action_dim=actions.shape[-1],
+            delta_t=delta_t,
+            integrator=integrator,
+            n_substeps=n_substeps,
+        )
 
     @override
-    def get_state_observation(self) -> np.ndarray:
-        observation = np.array(
-            (self.state.bicycle_model.v, self.max_steer),
-            dtype=DTYPE,
+    def get_dynamics_model_observation(self, out: Union[np.ndarray, None] = None) -> np.ndarray:
+        hyper_parameter: BicycleModelHyperParameter = self.hyper_parameter.bicycle_model
+        if out is None:
+            out = np.empty((6,), dtype=DTYPE)
+        out[:] = (
+            hyper_parameter.front_overhang,
+            hyper_parameter.wheelbase,
+            hyper_parameter.rear_overhang,
+            hyper_parameter.width,
+            hyper_parameter.length,
+            hyper_parameter.max_lat_acc,
         )
 
-        return observation
+        return out
+
+    @override
+    def get_state_observation(self, out: Union[np.ndarray, None] = None) -> np.ndarray:
+        v = float(self._state[3])
+        if out is None:
+            out = np.empty((2,), dtype=DTYPE)
+        out[0] = v
+        out[1] = self._compute_max_steer(v)
+
+        return out
 
     @override
     def get_state_space(self) -> Space:
@@ -275,5 +601,248 @@ class BicycleModel(BaseDynamicsModel):
         return action_space
 
     @override
-    def jacobian(self, state: np.ndarray, action: np.ndarray) -> np.ndarray:
-        raise NotImplementedError
+    def jacobian(self, state: np.ndarray, action: np.ndarray, delta_t: float) -> np.ndarray:
+        return self.compute_batch_jacobians(
+            np.asarray(state)[np.newaxis],
+            np.asarray(action)[np.newaxis],
+            delta_t=delta_t,
+            rearwheel_to_cog=self._rearwheel_to_cog,
+            cog_relative_position_between_axles=self._cog_relative_position_between_axles,
+            max_lat_acc=self._max_lat_acc,
+            integrator=self._integrator,
+            n_substeps=self._n_substeps,
+        )[0]
+
+
+class BicycleModelParameterTable:
+    """Struct-of-arrays table of hyper-parameters of a fleet of bicycle models, indexed by dynamics model index.
+
+    Enables stepping a batch of states in which each state follows its own dynamics model.
+
+    Attributes:
+        front_overhangs: Distances from front axle to vehicle front, shape=(M,).
+        wheelbases: Distances between front axle and rear axle, shape=(M,).
+        rear_overhangs: Distances from rear axle to vehicle rear, shape=(M,).
+        widths: Widths of vehicles, shape=(M,).
+        lengths: Lengths of vehicles, shape=(M,).
+        frontwheel_to_cogs: Distances between front axle and CoG, shape=(M,).
+        rearwheel_to_cogs: Distances between rear axle and CoG, shape=(M,).
+        cog_relative_positions_between_axles: Relative positions of CoG between axles, shape=(M,).
+        max_lat_accs: Maximum lateral accelerations, shape=(M,).
+        action_space_lbs: Lower bounds of action spaces, shape=(M, 2).
+        action_space_ubs: Upper bounds of action spaces, shape=(M, 2).
+        dynamics_model_observations: Dynamics model observations, shape=(M, observation_dim).
+        integrators: Numerical integrators, length=M.
+        n_substeps: Numbers of sub-steps of integration, shape=(M,).
+    """
+
+    front_overhangs: np.ndarray
+    wheelbases: np.ndarray
+    rear_overhangs: np.ndarray
+    widths: np.ndarray
+    lengths: np.ndarray
+    frontwheel_to_cogs: np.ndarray
+    rearwheel_to_cogs: np.ndarray
+    cog_relative_positions_between_axles: np.ndarray
+    max_lat_accs: np.ndarray
+    action_space_lbs: np.ndarray
+    action_space_ubs: np.ndarray
+    dynamics_model_observations: np.ndarray
+    integrators: Tuple[str, ...]
+    n_substeps: np.ndarray
+
+    def __init__(self, dynamics_models: Iterable[BicycleModel]):
+        """
+        Args:
+            dynamics_models: Bicycle models, whose order determines dynamics model indices.
+        """
+        dynamics_models = list(dynamics_models)
+        for dynamics_model in dynamics_models:
+            if not isinstance(dynamics_model, BicycleModel):
+                raise TypeError(f'Unsupported dynamics model for parameter table: {type(dynamics_model)}')
+
+        hyper_parameters: List[BicycleModelHyperParameter] = [
+            dm.hyper_parameter.bicycle_model for dm in dynamics_models
+        ]
+        for field_name, attribute_name in (
+            ('front_overhang', 'front_overhangs'),
+            ('wheelbase', 'wheelbases'),
+            ('rear_overhang', 'rear_overhangs'),
+            ('width', 'widths'),
+            ('length', 'lengths'),
+            ('frontwheel_to_cog', 'frontwheel_to_cogs'),
+            ('rearwheel_to_cog', 'rearwheel_to_cogs'),
+            ('max_lat_acc', 'max_lat_accs'),
+        ):
+            setattr(self, attribute_name, np.array([getattr(hp, field_name) for hp in hyper_parameters]))
+        self.cog_relative_positions_between_axles = np.array([
+            dm.cog_relative_position_between_axles for dm in dynamics_models
+        ])
+        self.action_space_lbs = np.stack([dm.get_action_space().low for dm in dynamics_models], axis=0)
+        self.action_space_ubs = np.stack([dm.get_action_space().high for dm in dynamics_models], axis=0)
+        self.dynamics_model_observations = np.stack(
+            [dm.get_dynamics_model_observation() for dm in dynamics_models], axis=0
+        )
+        self.integrators = tuple(dm.integrator for dm in dynamics_models)
+        self.n_substeps = np.array([dm.n_substeps for dm in dynamics_models])
+
+        # dynamics models are grouped by integration settings, as a vectorized call takes a single setting
+        integration_settings = list(dict.fromkeys(zip(self.integrators, self.n_substeps.tolist())))
+        self._integration_settings = [dict(integrator=i, n_substeps=n) for i, n in integration_settings]
+        self._integration_setting_indices = np.array([
+            integration_settings.index(setting) for setting in zip(self.integrators, self.n_substeps.tolist())
+        ])
+
+    def __len__(self) -> int:
+        return len(self.rearwheel_to_cogs)
+
+    def gather_dynamics_parameters(self, dynamics_model_indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Gather per-state hyper-parameters that determine dynamics.
+
+        Args:
+            dynamics_model_indices: Indices of dynamics models, shape=(B,).
+
+        Returns:
+            Dict[str, np.ndarray]: Keyword arguments of `BicycleModel.compute_batch_next_states`
+                and `batch_random_walk`, each of which has shape=(B,).
+        """
+        return dict(
+            rearwheel_to_cog=self.rearwheel_to_cogs[dynamics_model_indices],
+            cog_relative_position_between_axles=self.cog_relative_positions_between_axles[dynamics_model_indices],
+            max_lat_acc=self.max_lat_accs[dynamics_model_indices],
+        )
+
+    def gather_integration_settings(self, dynamics_model_index: int) -> Dict[str, Any]:
+        """Gather integration settings of a dynamics model.
+
+        Args:
+            dynamics_model_index: Index of dynamics model.
+
+        Returns:
+            Dict[str, Any]: Keyword arguments `integrator` and `n_substeps` of `BicycleModel.compute_batch_next_states`.
+        """
+        return dict(self._integration_settings[self._integration_setting_indices[dynamics_model_index]])
+
+    def gather_batch_integration_settings(self, dynamics_model_indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Gather per-state integration settings.
+
+        Args:
+            dynamics_model_indices: Indices of dynamics models, shape=(B,).
+
+        Returns:
+            Dict[str, np.ndarray]: Keyword arguments `integrator` and `n_substeps` of `batch_random_walk`,
+                each of which has shape=(B,).
+        """
+        return dict(
+            integrator=np.array(self.integrators, dtype=object)[dynamics_model_indices],
+            n_substeps=self.n_substeps[dynamics_model_indices],
+        )
+
+    def _split_by_integration_settings(
+        self, dynamics_model_indices: np.ndarray
+    ) -> Iterator[Tuple[Dict[str, Any], Union[slice, np.ndarray]]]:
+        """Split a batch into groups sharing integration settings.
+
+        Args:
+            dynamics_model_indices: Indices of dynamics models, shape=(B,).
+
+        Yields:
+            Tuple[Dict[str, Any], Union[slice, np.ndarray]]: Integration settings and rows of the group in the batch.
+        """
+        if len(self._integration_settings) == 1:
+            yield self._integration_settings[0], slice(None)
+            return
+        setting_indices = self._integration_setting_indices[dynamics_model_indices]
+        for setting_index, integration_settings in enumerate(self._integration_settings):
+            rows = np.flatnonzero(setting_indices == setting_index)
+            if len(rows) > 0:
+                yield integration_settings, rows
+
+    def gather_action_space_bounds(self, dynamics_model_indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Gather per-state bounds of action spaces.
+
+        Args:
+            dynamics_model_indices: Indices of dynamics models, shape=(B,).
+
+        Returns:
+            Dict[str, np.ndarray]: Keyword arguments `action_space_lb` and `action_space_ub` of `batch_random_walk`,
+                each of which has shape=(B, 2).
+        """
+        return dict(
+            action_space_lb=self.action_space_lbs[dynamics_model_indices],
+            action_space_ub=self.action_space_ubs[dynamics_model_indices],
+        )
+
+    def compute_batch_max_steers(self, v: np.ndarray, dynamics_model_indices: np.ndarray) -> np.ndarray:
+        """Compute maximum steering angles of a batch of speeds, each with its own dynamics model.
+
+        Args:
+            v: Speeds, shape=(B,).
+            dynamics_model_indices: Indices of dynamics models, shape=(B,).
+
+        Returns:
+            np.ndarray: Maximum steering angles, shape=(B,).
+        """
+        return BicycleModel.compute_batch_max_steers(v, **self.gather_dynamics_parameters(dynamics_model_indices))
+
+    def compute_batch_next_states(
+        self,
+        states: np.ndarray,
+        actions: np.ndarray,
+        dynamics_model_indices: np.ndarray,
+        delta_t: float,
+    ) -> np.ndarray:
+        """Step a batch of states, each with its own dynamics model, in one vectorized call.
+
+        Args:
+            states: Vectorized states, shape=(B, 4), format=<x, y, r, v>.
+            actions: Vectorized actions, shape=(B, 2), format=<a, s>.
+            dynamics_model_indices: Indices of dynamics models, shape=(B,).
+            delta_t: Time interval.
+
+        Returns:
+            np.ndarray: Next states, shape=(B, 4).
+        """
+        dynamics_model_indices = np.asarray(dynamics_model_indices)
+        next_states = np.empty(np.shape(states), dtype=DTYPE)
+        for integration_settings, rows in self._split_by_integration_settings(dynamics_model_indices):
+            next_states[rows] = BicycleModel.compute_batch_next_states(
+                states[rows],
+                actions[rows],
+                delta_t=delta_t,
+                **self.gather_dynamics_parameters(dynamics_model_indices[rows]),
+                **integration_settings,
+            )
+
+        return next_states
+
+    def compute_batch_jacobians(
+        self,
+        states: np.ndarray,
+        actions: np.ndarray,
+        dynamics_model_indices: np.ndarray,
+        delta_t: float,
+    ) -> np.ndarray:
+        """Compute Jacobians of the step of a batch of states, each with its own dynamics model.
+
+        Args:
+            states: Vectorized states, shape=(B, 4), format=<x, y, r, v>.
+            actions: Vectorized actions, shape=(B, 2), format=<a, s>.
+            dynamics_model_indices: Indices of dynamics models, shape=(B,).
+            delta_t: Time interval.
+
+        Returns:
+            np.ndarray: Jacobians, shape=(B, 4, 6), see `BicycleModel.compute_batch_jacobians`.
+        """
+        dynamics_model_indices = np.asarray(dynamics_model_indices)
+        jacobians = np.empty((len(states), 4, 6), dtype=np.float64)
+        for integration_settings, rows in self._split_by_integration_settings(dynamics_model_indices):
+            jacobians[rows] = BicycleModel.compute_batch_jacobians(
+                states[rows],
+                actions[rows],
+                delta_t=delta_t,
+                **self.gather_dynamics_parameters(dynamics_model_indices[rows]),
+                **integration_settings,
+            )
+
+        return jacobians
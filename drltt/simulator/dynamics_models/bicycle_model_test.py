@@ -20,5 +20,177 @@ def test_bicycle_model():
     assert dynamics_model.max_steer < np.pi
 
 
+def test_bicycle_model_step():
+    np.random.seed(0)
+    dynamics_model = BicycleModel(
+        front_overhang=0.9,
+        rear_overhang=0.9,
+        wheelbase=2.7,
+        width=1.8,
+        action_space_lb=[-3.0, -0.5235987755983],
+        action_space_ub=[+3.0, +0.5235987755983],
+        max_lat_acc=2.0,
+    )
+    action_space = dynamics_model.get_action_space()
+    for _ in range(100):
+        state = np.random.uniform((-10.0, -10.0, -np.pi, 0.0), (10.0, 10.0, np.pi, 20.0)).astype(np.float32)
+        action = np.random.uniform(action_space.low, action_space.high).astype(np.float32)
+        dynamics_model.set_state(state)
+        next_state_proto = dynamics_model.compute_next_state(action, delta_t=0.1)
+        dynamics_model.step(action, delta_t=0.1)
+        next_state = dynamics_model.get_state()
+
+        # parity with the batched version
+        expected_next_state = BicycleModel.compute_batch_next_states(
+            state[np.newaxis],
+            action[np.newaxis],
+            delta_t=0.1,
+            rearwheel_to_cog=dynamics_model.hyper_parameter.bicycle_model.rearwheel_to_cog,
+            cog_relative_position_between_axles=dynamics_model.cog_relative_position_between_axles,
+            max_lat_acc=dynamics_model.hyper_parameter.bicycle_model.max_lat_acc,
+        )[0]
+        assert next_state.dtype == np.float32
+        assert np.allclose(next_state, expected_next_state, atol=1e-5)
+        assert np.isclose(
+            dynamics_model.max_steer,
+            BicycleModel.compute_batch_max_steers(
+                next_state[3],
+                dynamics_model.hyper_parameter.bicycle_model.rearwheel_to_cog,
+                dynamics_model.cog_relative_position_between_axles,
+                dynamics_model.hyper_parameter.bicycle_model.max_lat_acc,
+            ),
+        )
+
+        # protos are built on demand and consistent with the vectorized state
+        assert np.allclose(BicycleModel.deserialize_state(next_state_proto), next_state)
+        assert np.allclose(BicycleModel.deserialize_state(dynamics_model.get_state_proto()), next_state)
+        body_state = dynamics_model.get_body_state_proto()
+        assert np.allclose((body_state.x, body_state.y, body_state.r), next_state[:3])
+
+    # set state from proto
+    state_proto = BicycleModel.serialize_state(np.array((1.0, 2.0, 3.0, 4.0)))
+    dynamics_model.set_state(state_proto)
+    assert np.allclose(dynamics_model.get_state(), (1.0, 2.0, 3.0, 4.0))
+
+
+def test_bicycle_model_integrators():
+    np.random.seed(0)
+    dynamics_model_kwargs = dict(
+        front_overhang=0.9,
+        rear_overhang=0.9,
+        wheelbase=2.7,
+        width=1.8,
+        action_space_lb=[-3.0, -0.5235987755983],
+        action_space_ub=[+3.0, +0.5235987755983],
+        max_lat_acc=8.0,
+    )
+    reference_dynamics_model = BicycleModel(**dynamics_model_kwargs, integrator='rk4', n_substeps=64)
+    delta_t = 0.5
+    states = np.random.uniform((-10.0, -10.0, -np.pi, 2.0), (10.0, 10.0, np.pi, 8.0), size=(64, 4)).astype(np.float32)
+    actions = np.random.uniform((-3.0, -0.3), (+3.0, +0.3), size=(64, 2)).astype(np.float32)
+    reference_next_states = np.stack([
+        reference_dynamics_model.compute_next_state_array(state, action, delta_t)
+        for state, action in zip(states, actions)
+    ])
+
+    errors = dict()
+    for integrator, n_substeps in (('euler', 1), ('euler', 4), ('midpoint', 1), ('rk4', 1)):
+        dynamics_model = BicycleModel(**dynamics_model_kwargs, integrator=integrator, n_substeps=n_substeps)
+        assert dynamics_model.hyper_parameter.integrator == integrator
+        assert dynamics_model.hyper_parameter.n_substeps == n_substeps
+        next_states = np.stack([
+            dynamics_model.compute_next_state_array(state, action, delta_t) for state, action in zip(states, actions)
+        ])
+        # parity with the batched version
+        batch_next_states = BicycleModel.compute_batch_next_states(
+            states,
+            actions,
+            delta_t=delta_t,
+            rearwheel_to_cog=dynamics_model.hyper_parameter.bicycle_model.rearwheel_to_cog,
+            cog_relative_position_between_axles=dynamics_model.cog_relative_position_between_axles,
+            max_lat_acc=dynamics_model.hyper_parameter.bicycle_model.max_lat_acc,
+            integrator=integrator,
+            n_substeps=n_substeps,
+        )
+        assert np.allclose(next_states, batch_next_states, atol=1e-4)
+        errors[(integrator, n_substeps)] = np.abs(next_states[:, :2] - reference_next_states[:, :2]).max()
+
+    # higher order and more sub-steps are more accurate
+    assert errors[('euler', 4)] < errors[('euler', 1)]
+    assert errors[('midpoint', 1)] < errors[('euler', 1)]
+    assert errors[('rk4', 1)] < errors[('midpoint', 1)]
+    assert errors[('rk4', 1)] < 1e-3
+
+
+def test_bicycle_model_jacobian():
+    np.random.seed(0)
+    dynamics_model = BicycleModel(
+        front_overhang=0.9,
+        rear_overhang=0.9,
+        wheelbase=2.7,
+        width=1.8,
+        action_space_lb=[-3.0, -0.5235987755983],
+        action_space_ub=[+3.0, +0.5235987755983],
+        max_lat_acc=2.0,
+    )
+    hyper_parameters = dict(
+        rearwheel_to_cog=dynamics_model.hyper_parameter.bicycle_model.rearwheel_to_cog,
+        cog_relative_position_between_axles=dynamics_model.cog_relative_position_between_axles,
+        max_lat_acc=dynamics_model.hyper_parameter.bicycle_model.max_lat_acc,
+    )
+    delta_t = 0.1
+    batch_size = 256
+    # speeds cover regimes where steering angle is unlimited, within the limit, and clipped
+    states = np.random.uniform((-10.0, -10.0, -2.0, 0.5), (10.0, 10.0, 2.0, 20.0), size=(batch_size, 4))
+    actions = np.random.uniform((-3.0, -0.5235987755983), (+3.0, +0.5235987755983), size=(batch_size, 2))
+    max_steers = BicycleModel.compute_batch_max_steers(states[:, 3], **hyper_parameters)
+    clipped = np.abs(actions[:, 1]) > max_steers
+    assert 0 < clipped.sum() < batch_size
+    # keep away from the kink of clipping for finite difference
+    kept = np.abs(np.abs(actions[:, 1]) - max_steers) > 1e-2
+    states, actions = states[kept], actions[kept]
+
+    # central finite difference in float64
+    step_size = 1e-6
+    inputs = np.concatenate((states, actions), axis=1)
+    for integration_settings in (
+        dict(integrator='euler', n_substeps=1),
+        dict(integrator='midpoint', n_substeps=2),
+        dict(integrator='rk4', n_substeps=3),
+    ):
+        jacobians = BicycleModel.compute_batch_jacobians(
+            states, actions, delta_t=delta_t, **hyper_parameters, **integration_settings
+        )
+        assert jacobians.shape == (len(states), 4, 6)
+        finite_difference_jacobians = np.empty_like(jacobians)
+        for input_idx in range(6):
+            perturbation = np.zeros((6,))
+            perturbation[input_idx] = step_size
+            next_states = list()
+            for perturbed_inputs in (inputs + perturbation, inputs - perturbation):
+                next_states.append(
+                    BicycleModel.compute_batch_next_states(
+                        perturbed_inputs[:, :4],
+                        perturbed_inputs[:, 4:],
+                        delta_t=delta_t,
+                        dtype=np.float64,
+                        **hyper_parameters,
+                        **integration_settings,
+                    )
+                )
+            finite_difference_jacobians[:, :, input_idx] = (next_states[0] - next_states[1]) / (2 * step_size)
+        assert np.allclose(jacobians, finite_difference_jacobians, rtol=1e-4, atol=1e-5)
+
+    jacobians = BicycleModel.compute_batch_jacobians(states, actions, delta_t=delta_t, **hyper_parameters)
+    # steering angle has no effect when it is clipped
+    assert np.all(jacobians[np.abs(actions[:, 1]) > max_steers[kept], :, 5] == 0.0)
+
+    # unbatched version
+    assert np.allclose(dynamics_model.jacobian(states[0], actions[0], delta_t=delta_t), jacobians[0])
+
+
 if __name__ == '__main__':
     test_bicycle_model()
+    test_bicycle_model_step()
+    test_bicycle_model_integrators()
+    test_bicycle_model_jacobian()
@@ -6,6 +6,7 @@ from gym.spaces import Space
 from drltt.common import build_object_within_registry_from_config
 from drltt_proto.dynamics_model.hyper_parameter_pb2 import HyperParameter
 from . import BaseDynamicsModel, DYNAMICS_MODELS
+from .bicycle_model import BicycleModelParameterTable
 
 
 class DynamicsModelManager:
@@ -15,11 +16,13 @@ class DynamicsModelManager:
         dynamics_models: Collection of dynamics models
         sampled_dynamics_model: The currently sampled dynamics model.
         sampled_dynamics_model_index: THe index of currently sampled dynamics model.
+        probabilities: Probabilities of sampling dynamics models.
     """
 
     dynamics_models: List[BaseDynamicsModel]
     sampled_dynamics_model: Union[BaseDynamicsModel, None] = None
     sampled_dynamics_model_index: int = -1
+    probabilities: Tuple[float, ...]
 
     def __init__(
         self, hyper_parameters: Iterable[HyperParameter] = tuple(), dynamics_model_configs: Iterable = tuple()
@@ -54,6 +57,41 @@ class DynamicsModelManager:
         self.names_to_indexes_and_dynamics_models = {
             dm.get_name(): (dm_idx, dm) for dm_idx, dm in enumerate(self.dynamics_models)
         }
+        self._parameter_table: Union[BicycleModelParameterTable, None] = None
+
+    def get_parameter_table(self) -> BicycleModelParameterTable:
+        """Get the struct-of-arrays table of hyper-parameters of all dynamics models, compiled on first call.
+
+        Returns:
+            BicycleModelParameterTable: Hyper-parameter table indexed by dynamics model index.
+
+        Raises:
+            TypeError: If any dynamics model is not supported by the table.
+        """
+        if self._parameter_table is None:
+            self._parameter_table = BicycleModelParameterTable(self.dynamics_models)
+
+        return self._parameter_table
+
+    def compute_batch_next_states(
+        self,
+        states: np.ndarray,
+        actions: np.ndarray,
+        dynamics_model_indices: np.ndarray,
+        delta_t: float,
+    ) -> np.ndarray:
+        """Step a batch of states, each with its own dynamics model, in one vectorized call.
+
+        Args:
+            states: Vectorized states, shape=(B, 4).
+            actions: Vectorized actions, shape=(B, 2).
+            dynamics_model_indices: Indices of dynamics models, shape=(B,).
+            delta_t: Time interval.
+
+        Returns:
+            np.ndarray: Next states, shape=(B, 4).
+        """
+        return self.get_parameter_table().compute_batch_next_states(states, actions, dynamics_model_indices, delta_t)
 
     def get_dynamics_model_observation_space(self) -> Space:
         """Get the dynamics model observation space. Assuming this space is identical across models within the collection
@@ -97,7 +135,8 @@ class DynamicsModelManager:
         Returns:
             Tuple[int, BaseDynamicsModel]: The index and object of the selected dynamics model.
         """
-        return self.names_to_indexes_and_dynamics_models[name]
+        self.sampled_dynamics_model_index, self.sampled_dynamics_model = self.names_to_indexes_and_dynamics_models[name]
+        return self.sampled_dynamics_model_index, self.get_sampled_dynamics_model()
 
     def sample_dynamics_model(self) -> Tuple[int, BaseDynamicsModel]:
         """Randomly sample a dynamics model.
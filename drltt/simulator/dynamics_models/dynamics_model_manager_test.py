@@ -0,0 +1,80 @@
+import numpy as np
+
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.dynamics_models import DynamicsModelManager
+
+
+def test_dynamics_model_manager_batch_step():
+    np.random.seed(0)
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    dynamics_model_manager = DynamicsModelManager(
+        dynamics_model_configs=config['environment']['dynamics_model_configs'],
+    )
+    dynamics_models = dynamics_model_manager.dynamics_models
+    parameter_table = dynamics_model_manager.get_parameter_table()
+    assert parameter_table is dynamics_model_manager.get_parameter_table()
+    assert len(parameter_table) == len(dynamics_models)
+    for dm_idx, dm in enumerate(dynamics_models):
+        assert parameter_table.wheelbases[dm_idx] == dm.hyper_parameter.bicycle_model.wheelbase
+        assert np.array_equal(parameter_table.action_space_ubs[dm_idx], dm.get_action_space().high)
+        assert np.array_equal(parameter_table.dynamics_model_observations[dm_idx], dm.get_dynamics_model_observation())
+
+    # heterogeneous fleet stepped in one call, compared with stepping each dynamics model
+    batch_size = 64
+    dynamics_model_indices = np.random.randint(len(dynamics_models), size=batch_size)
+    states = np.random.uniform((-10.0, -10.0, -np.pi, 0.0), (10.0, 10.0, np.pi, 20.0), size=(batch_size, 4))
+    actions = np.random.uniform(
+        parameter_table.action_space_lbs[dynamics_model_indices],
+        parameter_table.action_space_ubs[dynamics_model_indices],
+    )
+    next_states = dynamics_model_manager.compute_batch_next_states(
+        states.astype(np.float32), actions.astype(np.float32), dynamics_model_indices, delta_t=0.1
+    )
+    max_steers = parameter_table.compute_batch_max_steers(next_states[:, 3], dynamics_model_indices)
+    assert next_states.shape == (batch_size, 4)
+    for state, action, dm_idx, next_state, max_steer in zip(
+        states, actions, dynamics_model_indices, next_states, max_steers
+    ):
+        dynamics_model = dynamics_models[dm_idx]
+        dynamics_model.set_state(state)
+        dynamics_model.step(action, delta_t=0.1)
+        assert np.allclose(dynamics_model.get_state(), next_state, atol=1e-4)
+        assert np.isclose(dynamics_model.max_steer, max_steer, atol=1e-4)
+
+
+def test_dynamics_model_manager_mixed_integrators():
+    np.random.seed(0)
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    dynamics_model_configs = [dict(dm_config) for dm_config in config['environment']['dynamics_model_configs']]
+    for dm_config, (integrator, n_substeps) in zip(dynamics_model_configs, (('euler', 1), ('midpoint', 2), ('rk4', 4))):
+        dm_config.update(integrator=integrator, n_substeps=n_substeps)
+    dynamics_model_manager = DynamicsModelManager(dynamics_model_configs=dynamics_model_configs)
+    dynamics_models = dynamics_model_manager.dynamics_models
+    parameter_table = dynamics_model_manager.get_parameter_table()
+    assert parameter_table.integrators == tuple(dm.integrator for dm in dynamics_models)
+
+    batch_size = 64
+    dynamics_model_indices = np.random.randint(len(dynamics_models), size=batch_size)
+    states = np.random.uniform((-10.0, -10.0, -np.pi, 0.0), (10.0, 10.0, np.pi, 20.0), size=(batch_size, 4))
+    actions = np.random.uniform(
+        parameter_table.action_space_lbs[dynamics_model_indices],
+        parameter_table.action_space_ubs[dynamics_model_indices],
+    )
+    next_states = dynamics_model_manager.compute_batch_next_states(
+        states.astype(np.float32), actions.astype(np.float32), dynamics_model_indices, delta_t=0.3
+    )
+    jacobians = parameter_table.compute_batch_jacobians(states, actions, dynamics_model_indices, delta_t=0.3)
+    for state, action, dm_idx, next_state, jacobian in zip(
+        states, actions, dynamics_model_indices, next_states, jacobians
+    ):
+        dynamics_model = dynamics_models[dm_idx]
+        dynamics_model.set_state(state)
+        dynamics_model.step(action, delta_t=0.3)
+        assert np.allclose(dynamics_model.get_state(), next_state, atol=1e-4)
+        assert np.allclose(dynamics_model.jacobian(state, action, delta_t=0.3), jacobian)
+
+
+if __name__ == '__main__':
+    test_dynamics_model_manager_batch_step()
+    test_dynamics_model_manager_mixed_integrators()
@@ -0,0 +1,158 @@
+"""Explicit Runge-Kutta integrators of dynamics with zero-order hold on actions.
+
+A step of `delta_t` is divided into `n_substeps` sub-steps, each of which is integrated by the selected method:
+
+* euler: first order, 1 evaluation of derivative per sub-step.
+* midpoint: second order, 2 evaluations of derivative per sub-step.
+* rk4: classic fourth order, 4 evaluations of derivative per sub-step.
+"""
+
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+# Butcher tableaus of explicit methods, i.e. coefficients of previous slopes for each stage, and weights of slopes
+BUTCHER_TABLEAUS: Dict[str, Tuple[Tuple[Tuple[float, ...], ...], Tuple[float, ...]]] = {
+    'euler': (((),), (1.0,)),
+    'midpoint': (((), (0.5,)), (0.0, 1.0)),
+    'rk4': (((), (0.5,), (0.0, 0.5), (0.0, 0.0, 1.0)), (1 / 6, 1 / 3, 1 / 3, 1 / 6)),
+}
+INTEGRATORS = tuple(BUTCHER_TABLEAUS.keys())
+
+
+def check_integrator(integrator: str, n_substeps: int):
+    """Check integration settings.
+
+    Args:
+        integrator: Name of integrator, see `INTEGRATORS`.
+        n_substeps: Number of sub-steps.
+    """
+    if integrator not in BUTCHER_TABLEAUS:
+        raise ValueError(f'Unknown integrator: {integrator}, supported: {INTEGRATORS}')
+    if n_substeps < 1:
+        raise ValueError(f'Illegal `n_substeps`: {n_substeps}')
+
+
+def integrate(
+    derivative_func: Callable[[np.ndarray], np.ndarray],
+    states: np.ndarray,
+    delta_t: float,
+    integrator: str = 'euler',
+    n_substeps: int = 1,
+) -> np.ndarray:
+    """Integrate vectorized states over a time interval.
+
+    Args:
+        derivative_func: Function computing derivatives of states, with actions bound.
+        states: States, shape=(..., state_dim).
+        delta_t: Time interval.
+        integrator: Name of integrator, see `INTEGRATORS`.
+        n_substeps: Number of sub-steps.
+
+    Returns:
+        np.ndarray: Integrated states, shape=(..., state_dim).
+    """
+    stage_coefficients, weights = BUTCHER_TABLEAUS[integrator]
+    h = delta_t / n_substeps
+    for _ in range(n_substeps):
+        slopes = list()
+        for coefficients in stage_coefficients:
+            stage_states = states
+            for coefficient, slope in zip(coefficients, slopes):
+                if coefficient != 0.0:
+                    stage_states = stage_states + (h * coefficient) * slope
+            slopes.append(derivative_func(stage_states))
+        increment = sum(weight * slope for weight, slope in zip(weights, slopes) if weight != 0.0)
+        states = states + h * increment
+
+    return states
+
+
+def integrate_scalars(
+    derivative_func: Callable[..., Tuple[float, ...]],
+    state: Tuple[float, ...],
+    delta_t: float,
+    integrator: str = 'euler',
+    n_substeps: int = 1,
+) -> Tuple[float, ...]:
+    """Scalar version of `integrate` on a single state, which is cheaper than NumPy.
+
+    Args:
+        derivative_func: Function computing derivative of state, `derivative_func(*state) -> derivative`.
+        state: State.
+        delta_t: Time interval.
+        integrator: Name of integrator, see `INTEGRATORS`.
+        n_substeps: Number of sub-steps.
+
+    Returns:
+        Tuple[float, ...]: Integrated state.
+    """
+    stage_coefficients, weights = BUTCHER_TABLEAUS[integrator]
+    h = delta_t / n_substeps
+    for _ in range(n_substeps):
+        slopes = list()
+        for coefficients in stage_coefficients:
+            stage_state = state
+            for coefficient, slope in zip(coefficients, slopes):
+                if coefficient != 0.0:
+                    stage_state = tuple(x + h * coefficient * dx_dt for x, dx_dt in zip(stage_state, slope))
+            slopes.append(derivative_func(*stage_state))
+        if len(slopes) == 1:
+            state = tuple(x + dx_dt * h for x, dx_dt in zip(state, slopes[0]))
+        else:
+            state = tuple(
+                x + h * sum(weight * slope[dim] for weight, slope in zip(weights, slopes) if weight != 0.0)
+                for dim, x in enumerate(state)
+            )
+
+    return state
+
+
+def integrate_jacobians(
+    derivative_func: Callable[[np.ndarray], np.ndarray],
+    derivative_jacobian_func: Callable[[np.ndarray], np.ndarray],
+    states: np.ndarray,
+    action_dim: int,
+    delta_t: float,
+    integrator: str = 'euler',
+    n_substeps: int = 1,
+) -> np.ndarray:
+    """Jacobians of `integrate` w.r.t. states and actions, by chain rule through stages and sub-steps.
+
+    Args:
+        derivative_func: Function computing derivatives of states, with actions bound.
+        derivative_jacobian_func: Function computing Jacobians of derivatives w.r.t. states and actions,
+            shape=(B, state_dim, state_dim + action_dim), with actions bound.
+        states: States, shape=(B, state_dim).
+        action_dim: Dimension of action.
+        delta_t: Time interval.
+        integrator: Name of integrator, see `INTEGRATORS`.
+        n_substeps: Number of sub-steps.
+
+    Returns:
+        np.ndarray: Jacobians, shape=(B, state_dim, state_dim + action_dim).
+    """
+    stage_coefficients, weights = BUTCHER_TABLEAUS[integrator]
+    batch_size, state_dim = states.shape
+    h = delta_t / n_substeps
+    jacobians = np.zeros((batch_size, state_dim, state_dim + action_dim))
+    jacobians[:, :, :state_dim] = np.eye(state_dim)
+    for _ in range(n_substeps):
+        slopes, slope_jacobians = list(), list()
+        for coefficients in stage_coefficients:
+            stage_states, stage_jacobians = states, jacobians
+            for coefficient, slope, slope_jacobian in zip(coefficients, slopes, slope_jacobians):
+                if coefficient != 0.0:
+                    stage_states = stage_states + (h * coefficient) * slope
+                    stage_jacobians = stage_jacobians + (h * coefficient) * slope_jacobian
+            derivative_jacobians = derivative_jacobian_func(stage_states)
+            slope_jacobian = derivative_jacobians[:, :, :state_dim] @ stage_jacobians
+            slope_jacobian[:, :, state_dim:] += derivative_jacobians[:, :, state_dim:]
+            slopes.append(derivative_func(stage_states))
+            slope_jacobians.append(slope_jacobian)
+        states = states + h * sum(weight * slope for weight, slope in zip(weights, slopes) if weight != 0.0)
+        jacobians = jacobians + h * sum(
+            weight * slope_jacobian for weight, slope_jacobian in zip(weights, slope_jacobians) if weight != 0.0
+        )
+
+    return jacobians
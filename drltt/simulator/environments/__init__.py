@@ -4,10 +4,14 @@ ENVIRONMENTS = Registry()
 
 from .env_interface import CustomizedEnvInterface
 from .trajectory_tracking_env import TrajectoryTrackingEnv
+from .batched_trajectory_tracking_env import BatchedTrajectoryTrackingEnv
+from .shared_memory_vec_env import SharedMemoryVecEnv
 from .env_interface import ExtendedGymEnv
 
 __all__ = [
     'TrajectoryTrackingEnv',
+    'BatchedTrajectoryTrackingEnv',
+    'SharedMemoryVecEnv',
     'CustomizedEnvInterface',
     'ExtendedGymEnv',
 ]
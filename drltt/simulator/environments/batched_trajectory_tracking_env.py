@@ -0,0 +1,397 @@
+from typing import List, Dict, Union, Any, Iterable, Sequence, Tuple
+import inspect
+import random
+
+import numpy as np
+import gym
+from gym.spaces import Space
+from stable_baselines3.common.vec_env import VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import VecEnvIndices, VecEnvObs, VecEnvStepReturn
+
+from drltt.common.future import override
+from drltt.common.geometry import batch_transform_to_local_from_world
+from drltt.common.gym_helper import convert_box_space_to_gymnasium
+from . import ENVIRONMENTS
+from drltt.simulator.environments.env_interface import CustomizedEnvInterface
+from drltt.simulator.environments.trajectory_tracking_env import TrajectoryTrackingEnv
+from drltt.simulator import DTYPE
+from drltt.simulator.dynamics_models import DynamicsModelManager
+from drltt.simulator.trajectory.random_walk import batch_random_walk
+from drltt.simulator.trajectory.reference_line import ReferenceLineManager
+from drltt.simulator.trajectory.reference_line_pool import ReferenceLinePool
+from drltt.simulator.observation.observation_manager import ObservationManager
+from drltt.simulator.reward import RewardManager
+from drltt_proto.environment.environment_pb2 import Environment
+
+
+@ENVIRONMENTS.register
+class BatchedTrajectoryTrackingEnv(VecEnv, CustomizedEnvInterface):
+    """Natively batched environment for Trajectory Tracking, exposing the interface of `VecEnv` from Stable Baselines3.
+
+    Data of all concurrent episodes are stored as struct-of-arrays and stepped with a single vectorized call.
+    Reward and observation follow the semantics of `TrajectoryTrackingEnv`.
+    Finished episodes are reset automatically, with their last observations stored in `info['terminal_observation']`.
+
+    Attributes:
+        env_info: Serialized data structure that contains hyper-parameter.
+        states: States of all episodes, shape=(n_envs, 4).
+        reference_lines: Padded reference lines of all episodes, shape=(n_envs, max_reference_line_length, 2).
+        step_indices: Step indices of all episodes, shape=(n_envs,).
+        tracking_lengths: Tracking lengths of all episodes, shape=(n_envs,).
+        dynamics_model_indices: Indices of dynamics models of all episodes, shape=(n_envs,).
+        dynamics_model_parameter_table: Hyper-parameters of dynamics models indexed by `dynamics_model_indices`.
+    """
+
+    render_mode = None
+    # attributes indexed by sub-environments along the first axis
+    PER_ENV_ATTRIBUTES = ('states', 'reference_lines', 'step_indices', 'tracking_lengths', 'dynamics_model_indices')
+
+    def __init__(
+        self,
+        n_envs: int = 1,
+        env_info: Union[Environment, None] = None,
+        dynamics_model_configs: Union[Iterable[Dict[str, Any]], None] = None,
+        recording_level: str = 'none',
+        reference_line_pool_dir: Union[str, None] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            n_envs: Number of concurrent episodes.
+            env_info: Environment data containing the hyper-parameter.
+            dynamics_model_configs: Configurations of all dynamics models.
+            recording_level: Recording level of episode data. Only 'none' is supported.
+            reference_line_pool_dir: Directory of pre-generated reference line pool, see `ReferenceLinePool`.
+        """
+        if recording_level != 'none':
+            raise ValueError(f'Unsupported `recording_level` for batched environment: {recording_level}')
+
+        self.env_info = Environment()
+        if env_info is not None:
+            self.env_info.trajectory_tracking.hyper_parameter.CopyFrom(env_info.trajectory_tracking.hyper_parameter)
+        else:
+            TrajectoryTrackingEnv.parse_hyper_parameter(self.env_info.trajectory_tracking.hyper_parameter, **kwargs)
+        hyper_parameter = self.env_info.trajectory_tracking.hyper_parameter
+
+        if hyper_parameter.reference_line_pad_mode != 'repeat':
+            raise ValueError(
+                'Unsupported `reference_line_pad_mode` for batched environment:'
+                f' {hyper_parameter.reference_line_pad_mode}'
+            )
+        if hyper_parameter.reference_line_observation_mode not in ('', 'index'):
+            raise ValueError(
+                'Unsupported `reference_line_observation_mode` for batched environment:'
+                f' {hyper_parameter.reference_line_observation_mode}'
+            )
+
+        # build manager classes
+        self.reference_line_manager = ReferenceLineManager(
+            n_observation_steps=hyper_parameter.n_observation_steps,
+            pad_mode=hyper_parameter.reference_line_pad_mode,
+        )
+        self.dynamics_model_manager = DynamicsModelManager(
+            hyper_parameters=hyper_parameter.dynamics_models_hyper_parameters,
+            dynamics_model_configs=dynamics_model_configs,
+        )
+        TrajectoryTrackingEnv.parse_dynamics_model_hyper_parameter(hyper_parameter, self.dynamics_model_manager)
+        self.observation_manager = ObservationManager(
+            self.reference_line_manager,
+            self.dynamics_model_manager,
+        )
+        self.reward_manager = RewardManager({
+            reward_term.name: reward_term.weight for reward_term in hyper_parameter.reward_terms
+        })
+        self.dynamics_model_parameter_table = self.dynamics_model_manager.get_parameter_table()
+        self.reference_line_pool: Union[ReferenceLinePool, None] = None
+        if reference_line_pool_dir is not None:
+            self.reference_line_pool = ReferenceLinePool(reference_line_pool_dir)
+            self.reference_line_pool.check_hyper_parameter(hyper_parameter)
+
+        # build spaces
+        self.gym_observation_space: Space = self.observation_manager.get_observation_space()
+        self.gym_action_space: Space = self.dynamics_model_manager.get_sampled_dynamics_model().get_action_space()
+        self.init_state_space: Space = gym.spaces.Box(
+            low=np.array((hyper_parameter.init_state_lb), dtype=DTYPE),
+            high=np.array((hyper_parameter.init_state_ub), dtype=DTYPE),
+            dtype=DTYPE,
+        )
+
+        # allocate struct-of-arrays
+        self.max_reference_line_length = hyper_parameter.tracking_length_ub + hyper_parameter.n_observation_steps
+        self.states = np.zeros((n_envs, 4), dtype=DTYPE)
+        self.reference_lines = np.zeros((n_envs, self.max_reference_line_length, 2), dtype=DTYPE)
+        self.step_indices = np.zeros((n_envs,), dtype=np.int64)
+        self.tracking_lengths = np.zeros((n_envs,), dtype=np.int64)
+        self.dynamics_model_indices = np.zeros((n_envs,), dtype=np.int64)
+        self._actions = np.zeros((n_envs,) + self.gym_action_space.shape, dtype=DTYPE)
+
+        super().__init__(
+            num_envs=n_envs,
+            observation_space=convert_box_space_to_gymnasium(self.gym_observation_space),
+            action_space=convert_box_space_to_gymnasium(self.gym_action_space),
+        )
+
+    def reset_episodes(self, env_indices: np.ndarray):
+        """Reset a subset of episodes with randomly sampled dynamics models, initial states, and reference lines.
+
+        Reference lines of all reset episodes are generated by a single batched random walk.
+
+        Args:
+            env_indices: Indices of episodes to be reset.
+        """
+        n_reset_envs = len(env_indices)
+        if n_reset_envs == 0:
+            return
+        hyper_parameter = self.env_info.trajectory_tracking.hyper_parameter
+        if self.reference_line_pool is not None:
+            self._reset_episodes_from_pool(env_indices)
+            return
+        dynamics_model_indices = np.random.choice(
+            len(self.dynamics_model_manager.dynamics_models),
+            size=n_reset_envs,
+            p=self.dynamics_model_manager.probabilities,
+        )
+        tracking_lengths = np.random.randint(
+            hyper_parameter.tracking_length_lb, hyper_parameter.tracking_length_ub + 1, size=n_reset_envs
+        )
+        init_states = self.init_state_space.np_random.uniform(
+            self.init_state_space.low, self.init_state_space.high, size=(n_reset_envs,) + self.init_state_space.shape
+        ).astype(DTYPE)
+        # walks are padded with their last states, which coincides with 'repeat' padding
+        states, _, _ = batch_random_walk(
+            init_states,
+            tracking_lengths,
+            step_interval=hyper_parameter.step_interval,
+            **self.dynamics_model_parameter_table.gather_dynamics_parameters(dynamics_model_indices),
+            **self.dynamics_model_parameter_table.gather_action_space_bounds(dynamics_model_indices),
+            **self.dynamics_model_parameter_table.gather_batch_integration_settings(dynamics_model_indices),
+            max_walk_length=hyper_parameter.tracking_length_ub,
+        )
+
+        self.states[env_indices] = init_states
+        self.reference_lines[env_indices, : hyper_parameter.tracking_length_ub] = states[..., :2]
+        self.reference_lines[env_indices, hyper_parameter.tracking_length_ub :] = states[:, -1:, :2]
+        self.step_indices[env_indices] = 0
+        self.tracking_lengths[env_indices] = tracking_lengths
+        self.dynamics_model_indices[env_indices] = dynamics_model_indices
+
+    def _reset_episodes_from_pool(self, env_indices: np.ndarray):
+        """Reset a subset of episodes with entries sampled from reference line pool.
+
+        Args:
+            env_indices: Indices of episodes to be reset.
+        """
+        for env_idx, pool_index in zip(
+            env_indices, np.random.randint(len(self.reference_line_pool), size=len(env_indices))
+        ):
+            waypoints, init_state, dynamics_model_index = self.reference_line_pool[pool_index]
+            tracking_length = len(waypoints)
+            self.states[env_idx] = init_state
+            self.reference_lines[env_idx, :tracking_length] = waypoints
+            self.reference_lines[env_idx, tracking_length:] = waypoints[-1]
+            self.step_indices[env_idx] = 0
+            self.tracking_lengths[env_idx] = tracking_length
+            self.dynamics_model_indices[env_idx] = dynamics_model_index
+
+    def get_observations(self) -> np.ndarray:
+        """Get vectorized observations of all episodes, which are ego-centric.
+
+        Returns:
+            np.ndarray: Observations, shape=(n_envs, observation_dim).
+        """
+        n_observation_steps = self.env_info.trajectory_tracking.hyper_parameter.n_observation_steps
+        env_indices = np.arange(self.num_envs)
+
+        # reference line observation
+        window_indices = self.step_indices[:, np.newaxis] + np.arange(n_observation_steps)[np.newaxis, :]
+        waypoints = self.reference_lines[env_indices[:, np.newaxis], window_indices]  # (n_envs, n_obs_steps, 2)
+        waypoints_in_body_frame = batch_transform_to_local_from_world(
+            waypoints, self.states[:, :3], out=waypoints
+        ).reshape(self.num_envs, -1)
+        forward_tracking_lengths = (self.tracking_lengths - self.step_indices)[:, np.newaxis]
+
+        # state observation
+        max_steers = self.dynamics_model_parameter_table.compute_batch_max_steers(
+            self.states[:, 3], self.dynamics_model_indices
+        )
+        state_observations = np.stack((self.states[:, 3], max_steers), axis=-1)
+
+        # dynamics model observation
+        dynamics_model_observations = self.dynamics_model_parameter_table.dynamics_model_observations[
+            self.dynamics_model_indices
+        ]
+
+        observations = np.concatenate(
+            (
+                waypoints_in_body_frame,
+                forward_tracking_lengths,
+                state_observations,
+                dynamics_model_observations,
+            ),
+            axis=1,
+        ).astype(DTYPE)
+
+        return observations
+
+    def compute_rewards(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute rewards of all episodes at current step.
+
+        Args:
+            actions: Actions given to all episodes, shape=(n_envs, action_dim).
+
+        Returns:
+            np.ndarray: Rewards, shape=(n_envs,).
+            np.ndarray: Unweighted reward terms, shape=(n_envs, n_terms), see `RewardManager.compute_rewards`.
+        """
+        env_indices = np.arange(self.num_envs)
+
+        return self.reward_manager.compute_rewards(
+            states=self.states,
+            actions=actions,
+            waypoints=self.reference_lines[env_indices, self.step_indices],
+            # reference lines are padded beyond tracking length
+            next_waypoints=self.reference_lines[env_indices, self.step_indices + 1],
+            action_space_lbs=self.dynamics_model_parameter_table.action_space_lbs[self.dynamics_model_indices],
+            action_space_ubs=self.dynamics_model_parameter_table.action_space_ubs[self.dynamics_model_indices],
+        )
+
+    @override
+    def reset(self) -> VecEnvObs:
+        """Reset all episodes.
+
+        Returns:
+            VecEnvObs: First observations, shape=(n_envs, observation_dim).
+        """
+        self.reset_episodes(np.arange(self.num_envs))
+
+        return self.get_observations()
+
+    @override
+    def step_async(self, actions: np.ndarray):
+        self._actions[...] = np.asarray(actions).reshape(self._actions.shape)
+
+    @override
+    def step_wait(self) -> VecEnvStepReturn:
+        actions = self._actions
+        rewards, _ = self.compute_rewards(actions)
+        rewards = rewards.astype(np.float32)
+
+        # ABOVE: step t
+        # BELLOW: step t+1
+
+        self.states = self.dynamics_model_manager.compute_batch_next_states(
+            self.states,
+            actions,
+            self.dynamics_model_indices,
+            delta_t=self.env_info.trajectory_tracking.hyper_parameter.step_interval,
+        )
+        self.step_indices += 1
+        observations = self.get_observations()
+
+        dones = self.step_indices >= self.tracking_lengths
+        infos = [dict() for _ in range(self.num_envs)]
+        done_indices = np.flatnonzero(dones)
+        if len(done_indices) > 0:
+            for env_idx in done_indices:
+                infos[env_idx]['terminal_observation'] = observations[env_idx].copy()
+                infos[env_idx]['TimeLimit.truncated'] = False
+            self.reset_episodes(done_indices)
+            observations[done_indices] = self.get_observations()[done_indices]
+
+        return observations, rewards, dones, infos
+
+    @override
+    def close(self):
+        pass
+
+    @override
+    def get_state(self) -> np.ndarray:
+        return self.states.copy()
+
+    @override
+    def seed(self, seed: Union[int, None] = None) -> Sequence[Union[None, int]]:
+        """Seed the underlying random number generators.
+
+        Args:
+            seed: Random seed.
+
+        Returns:
+            Sequence[Union[None, int]]: Seed of each episode.
+        """
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+            self.init_state_space.seed(seed)
+
+        return [seed] * self.num_envs
+
+    def _get_indices(self, indices: VecEnvIndices) -> Iterable[int]:
+        if indices is None:
+            indices = range(self.num_envs)
+        elif isinstance(indices, int):
+            indices = [indices]
+
+        return indices
+
+    @override
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        """Get attribute of selected sub-environments.
+
+        Per-env attributes (see `PER_ENV_ATTRIBUTES`) are indexed by sub-environments,
+            while other attributes are shared by all sub-environments.
+        """
+        value = getattr(self, attr_name)
+        if attr_name in self.PER_ENV_ATTRIBUTES:
+            return [value[env_index] for env_index in self._get_indices(indices)]
+
+        return [value for _ in self._get_indices(indices)]
+
+    @override
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None):
+        """Set attribute of selected sub-environments.
+
+        Per-env attributes (see `PER_ENV_ATTRIBUTES`) are set for selected sub-environments only,
+            while other attributes are shared and thus can only be set for all sub-environments.
+        """
+        env_indices = np.array(list(self._get_indices(indices)), dtype=np.int64)
+        if attr_name in self.PER_ENV_ATTRIBUTES:
+            getattr(self, attr_name)[env_indices] = value
+            return
+        if len(env_indices) == 0:
+            return
+        if set(env_indices.tolist()) != set(range(self.num_envs)):
+            raise ValueError(f'Shared attribute `{attr_name}` can not be set for a subset of sub-environments')
+        setattr(self, attr_name, value)
+
+    @override
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
+        """Call method of selected sub-environments.
+
+        Per-env methods, i.e. with argument `env_indices` (e.g. `reset_episodes`), are called once per selected
+            sub-environment. Other methods are shared by all sub-environments, thus called once if any sub-environment
+            is selected, with the result returned for each selected sub-environment.
+        """
+        env_indices = list(self._get_indices(indices))
+        method = getattr(self, method_name)
+        if 'env_indices' in inspect.signature(method).parameters:
+            return [
+                method(*method_args, env_indices=np.array([env_index], dtype=np.int64), **method_kwargs)
+                for env_index in env_indices
+            ]
+        if len(env_indices) == 0:
+            return list()
+        result = method(*method_args, **method_kwargs)
+
+        return [result for _ in env_indices]
+
+    @override
+    def env_is_wrapped(self, wrapper_class: type, indices: VecEnvIndices = None) -> List[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+    def get_dynamics_model_info(self) -> str:
+        """Get the infromation about configuration of dynamics models.
+
+        Returns:
+            str: Pretty string of information for dynamics models.
+        """
+        return self.dynamics_model_manager.get_dynamics_model_info()
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv, BatchedTrajectoryTrackingEnv
+from drltt.simulator.trajectory.reference_line import ReferenceLineManager
+
+
+def test_batched_trajectory_tracking_env():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = dict(config['environment'])
+    env_config['type'] = 'BatchedTrajectoryTrackingEnv'
+    n_envs = 4
+    batched_env: BatchedTrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, env_config, n_envs=n_envs
+    )
+
+    observations = batched_env.reset()
+    assert observations.shape == (n_envs,) + batched_env.observation_space.shape
+
+    max_tracking_length = batched_env.tracking_lengths.max()
+    n_finished_episodes = 0
+    for _ in range(max_tracking_length):
+        actions = np.stack([batched_env.action_space.sample() for _ in range(n_envs)], axis=0)
+        observations, rewards, dones, infos = batched_env.step(actions)
+        assert observations.shape == (n_envs,) + batched_env.observation_space.shape
+        assert rewards.shape == dones.shape == (n_envs,)
+        for done, info in zip(dones, infos):
+            if done:
+                assert 'terminal_observation' in info
+        n_finished_episodes += dones.sum()
+
+    assert n_finished_episodes >= n_envs
+
+    # projection-based observation is not vectorized
+    env_config['reference_line_observation_mode'] = 'projection'
+    with pytest.raises(ValueError):
+        build_object_within_registry_from_config(ENVIRONMENTS, env_config, n_envs=n_envs)
+
+
+def test_batched_trajectory_tracking_env_parity():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = dict(config['environment'])
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    env_config['type'] = 'BatchedTrajectoryTrackingEnv'
+    n_envs = 3
+    batched_env: BatchedTrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, env_config, n_envs=n_envs
+    )
+
+    batched_observations = batched_env.reset()
+    tracking_lengths = batched_env.tracking_lengths.copy()
+    for env_idx in range(n_envs):
+        dynamics_model_index = batched_env.dynamics_model_indices[env_idx]
+        dynamics_model_name = batched_env.dynamics_model_manager.dynamics_models[dynamics_model_index].get_name()
+        reference_line = ReferenceLineManager.np_array_to_reference_line(
+            batched_env.reference_lines[env_idx, : tracking_lengths[env_idx]]
+        )
+        observation = env.reset(
+            init_state=batched_env.states[env_idx].copy(),
+            dynamics_model_name=dynamics_model_name,
+            reference_line=reference_line,
+        )
+        assert np.allclose(observation, batched_observations[env_idx], rtol=1e-4, atol=1e-4)
+
+    # step all episodes with identical actions, the single environment replays the first episode
+    replayed_env_idx = 0
+    env.reset(
+        init_state=batched_env.states[replayed_env_idx].copy(),
+        dynamics_model_name=batched_env.dynamics_model_manager.dynamics_models[
+            batched_env.dynamics_model_indices[replayed_env_idx]
+        ].get_name(),
+        reference_line=ReferenceLineManager.np_array_to_reference_line(
+            batched_env.reference_lines[replayed_env_idx, : tracking_lengths[replayed_env_idx]]
+        ),
+    )
+    for step_idx in range(tracking_lengths[replayed_env_idx]):
+        actions = np.stack([batched_env.action_space.sample() for _ in range(n_envs)], axis=0)
+        batched_observations, batched_rewards, batched_dones, infos = batched_env.step(actions)
+        observation, reward, done, extra_info = env.step(actions[replayed_env_idx])
+
+        assert np.isclose(reward, batched_rewards[replayed_env_idx], rtol=1e-4, atol=1e-4)
+        assert done == batched_dones[replayed_env_idx]
+        if done:
+            batched_observation = infos[replayed_env_idx]['terminal_observation']
+        else:
+            batched_observation = batched_observations[replayed_env_idx]
+        assert np.allclose(observation, batched_observation, rtol=1e-3, atol=1e-3)
+
+
+def test_batched_trajectory_tracking_env_indices():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = dict(config['environment'])
+    env_config['type'] = 'BatchedTrajectoryTrackingEnv'
+    n_envs = 4
+    batched_env: BatchedTrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, env_config, n_envs=n_envs
+    )
+    batched_env.reset()
+
+    # per-env attributes
+    step_indices = batched_env.get_attr('step_indices', indices=[1, 3])
+    assert step_indices == [batched_env.step_indices[1], batched_env.step_indices[3]]
+    batched_env.set_attr('step_indices', 2, indices=[1, 3])
+    assert batched_env.step_indices.tolist() == [0, 2, 0, 2]
+
+    # shared attributes
+    assert batched_env.get_attr('num_envs', indices=2) == [n_envs]
+    with pytest.raises(ValueError):
+        batched_env.set_attr('render_mode', 'rgb_array', indices=[0])
+    batched_env.set_attr('render_mode', 'rgb_array')
+    assert batched_env.render_mode == 'rgb_array'
+
+    # per-env methods are called on selected sub-environments only
+    batched_env.env_method('reset_episodes', indices=[1, 3])
+    assert batched_env.step_indices.tolist() == [0, 0, 0, 0]
+    batched_env.step_indices[:] = 1
+    batched_env.env_method('reset_episodes', indices=[2])
+    assert batched_env.step_indices.tolist() == [1, 1, 0, 1]
+
+    # shared methods are called once
+    n_calls = list()
+    batched_env.count_calls = lambda: n_calls.append(1) or len(n_calls)
+    assert batched_env.env_method('count_calls', indices=[0, 2]) == [1, 1]
+    assert batched_env.env_method('count_calls', indices=[]) == []
+    assert len(n_calls) == 1
+
+
+if __name__ == '__main__':
+    test_batched_trajectory_tracking_env()
+    test_batched_trajectory_tracking_env_parity()
+    test_batched_trajectory_tracking_env_indices()
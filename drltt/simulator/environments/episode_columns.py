@@ -0,0 +1,210 @@
+"""
+Columnar representation of episodes of bicycle models, with one row per step, for metrics and analytics.
+
+Tables are saved to NPZ (uncompressed, memory-mapped on loading) or Parquet (requires the package `pyarrow`).
+"""
+
+from typing import Dict, Iterable, Sequence
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from drltt.simulator import DTYPE
+
+from drltt_proto.environment.trajectory_tracking_pb2 import TrajectoryTrackingEpisode
+
+# names and data types of columns, in order
+EPISODE_COLUMNS = dict(
+    episode_id=np.int64,
+    step=np.int32,
+    dynamics_model_index=np.int32,
+    x=DTYPE,
+    y=DTYPE,
+    r=DTYPE,
+    v=DTYPE,
+    a=DTYPE,
+    s=DTYPE,
+    reward=DTYPE,
+    ref_x=DTYPE,
+    ref_y=DTYPE,
+)
+EPISODE_COLUMNS_FORMATS = ('npz', 'parquet')
+# size of local file header of zip, before file name and extra field
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('Parquet export of episode columns requires `pyarrow`: `pip install pyarrow`') from e
+
+    return pyarrow
+
+
+def episode_to_columns(episode: TrajectoryTrackingEpisode, episode_id: int = 0) -> Dict[str, np.ndarray]:
+    """Convert an episode into columns, in a single pass over each repeated field.
+
+    Rewards not recorded are filled with NaN.
+
+    Args:
+        episode: Episode with recorded states and actions of a bicycle model.
+        episode_id: Value of column `episode_id`.
+
+    Returns:
+        Dict[str, np.ndarray]: Columns indexed by names in `EPISODE_COLUMNS`, shape=(n_steps,).
+    """
+    states = episode.dynamics_model.states
+    n_steps = len(states)
+    state_values = np.array(
+        [
+            (
+                state.bicycle_model.body_state.x,
+                state.bicycle_model.body_state.y,
+                state.bicycle_model.body_state.r,
+                state.bicycle_model.v,
+            )
+            for state in states
+        ],
+        dtype=DTYPE,
+    ).reshape(n_steps, 4)
+    action_values = np.array(
+        [(action.bicycle_model.a, action.bicycle_model.s) for action in episode.dynamics_model.actions[:n_steps]],
+        dtype=DTYPE,
+    ).reshape(n_steps, 2)
+    reference_values = np.array(
+        [(waypoint.x, waypoint.y) for waypoint in episode.reference_line.waypoints[:n_steps]],
+        dtype=DTYPE,
+    ).reshape(n_steps, 2)
+    rewards = np.full((n_steps,), np.nan, dtype=DTYPE)
+    n_rewards = min(len(episode.rewards), n_steps)
+    rewards[:n_rewards] = episode.rewards[:n_rewards]
+
+    columns = dict(
+        episode_id=np.full((n_steps,), episode_id, dtype=EPISODE_COLUMNS['episode_id']),
+        step=np.arange(n_steps, dtype=EPISODE_COLUMNS['step']),
+        dynamics_model_index=np.full(
+            (n_steps,), episode.selected_dynamics_model_index, dtype=EPISODE_COLUMNS['dynamics_model_index']
+        ),
+        x=state_values[:, 0],
+        y=state_values[:, 1],
+        r=state_values[:, 2],
+        v=state_values[:, 3],
+        a=action_values[:, 0],
+        s=action_values[:, 1],
+        reward=rewards,
+        ref_x=reference_values[:, 0],
+        ref_y=reference_values[:, 1],
+    )
+
+    return {name: np.ascontiguousarray(column) for name, column in columns.items()}
+
+
+def episodes_to_columns(episodes: Iterable[TrajectoryTrackingEpisode]) -> Dict[str, np.ndarray]:
+    """Convert episodes into a single table, e.g. from `read_episode_log`.
+
+    Args:
+        episodes: Episodes, with `episode_id` assigned in the iterated order.
+
+    Returns:
+        Dict[str, np.ndarray]: Columns indexed by names in `EPISODE_COLUMNS`, shape=(n_total_steps,).
+    """
+    return concatenate_episode_columns([
+        episode_to_columns(episode, episode_id) for episode_id, episode in enumerate(episodes)
+    ])
+
+
+def concatenate_episode_columns(all_columns: Sequence[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Concatenate columns of episodes into a single table.
+
+    Args:
+        all_columns: Columns of episodes, see `episode_to_columns`.
+
+    Returns:
+        Dict[str, np.ndarray]: Columns indexed by names in `EPISODE_COLUMNS`, shape=(n_total_steps,).
+    """
+    if len(all_columns) == 0:
+        return {name: np.zeros((0,), dtype=dtype) for name, dtype in EPISODE_COLUMNS.items()}
+
+    return {name: np.concatenate([columns[name] for columns in all_columns]) for name in EPISODE_COLUMNS}
+
+
+def _get_columns_format(path: str) -> str:
+    columns_format = os.path.splitext(path)[1].lstrip('.')
+    if columns_format not in EPISODE_COLUMNS_FORMATS:
+        raise ValueError(f'Unknown format of episode columns: {path}, supported: {EPISODE_COLUMNS_FORMATS}')
+
+    return columns_format
+
+
+def save_episode_columns(path: str, columns: Dict[str, np.ndarray]):
+    """Save columns to a file, whose format is determined by the extension, see `EPISODE_COLUMNS_FORMATS`.
+
+    Args:
+        path: Path to the file.
+        columns: Columns indexed by names.
+    """
+    columns_format = _get_columns_format(path)
+    if columns_format == 'npz':
+        # uncompressed, thus memory-mappable
+        np.savez(path, **columns)
+    elif columns_format == 'parquet':
+        pyarrow = _import_pyarrow()
+        pyarrow.parquet.write_table(pyarrow.table(columns), path)
+
+
+def _memory_map_npz(path: str) -> Dict[str, np.ndarray]:
+    """Memory-map arrays of an uncompressed NPZ file, which `np.load` does not support."""
+    arrays = dict()
+    with zipfile.ZipFile(path) as zip_file, open(path, 'rb') as f:
+        for info in zip_file.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f'Compressed NPZ file can not be memory-mapped: {path}')
+            f.seek(info.header_offset)
+            local_header = f.read(_ZIP_LOCAL_HEADER_SIZE)
+            file_name_size, extra_field_size = struct.unpack('<HH', local_header[26:30])
+            f.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + file_name_size + extra_field_size)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = os.path.splitext(info.filename)[0]
+            if np.prod(shape) == 0:
+                # empty array can not be memory-mapped
+                arrays[name] = np.zeros(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(
+                path, dtype=dtype, mode='r', offset=f.tell(), shape=shape, order='F' if fortran_order else 'C'
+            )
+
+    return arrays
+
+
+def load_episode_columns(path: str) -> Dict[str, np.ndarray]:
+    """Load columns without copy: NPZ is memory-mapped, and Parquet is viewed from Arrow buffers.
+
+    Args:
+        path: Path to the file, see `save_episode_columns`.
+
+    Returns:
+        Dict[str, np.ndarray]: Read-only columns indexed by names.
+    """
+    columns_format = _get_columns_format(path)
+    if columns_format == 'npz':
+        return _memory_map_npz(path)
+    elif columns_format == 'parquet':
+        pyarrow = _import_pyarrow()
+        table = pyarrow.parquet.read_table(path, memory_map=True).combine_chunks()
+        columns = dict()
+        for name in table.column_names:
+            column = table.column(name)
+            if column.num_chunks == 0:
+                columns[name] = np.zeros((0,), dtype=column.type.to_pandas_dtype())
+                continue
+            columns[name] = column.chunk(0).to_numpy(zero_copy_only=True)
+
+        return columns
@@ -0,0 +1,73 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs, generate_random_string
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.environments.episode_columns import (
+    EPISODE_COLUMNS,
+    episodes_to_columns,
+    save_episode_columns,
+    load_episode_columns,
+)
+from drltt.simulator.rl_learning.sb3_utils import roll_out_one_episode
+
+
+@pytest.mark.parametrize('columns_format', ['npz', 'parquet'])
+def test_episode_columns(columns_format: str):
+    if columns_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, config['environment'], recording_level='summary'
+    )
+    episodes = list()
+    for _ in range(3):
+        roll_out_one_episode(env, lambda obs: env.action_space.sample())
+        episodes.append(env.export_episode_data())
+
+    columns = episodes_to_columns(episodes)
+    assert tuple(columns.keys()) == tuple(EPISODE_COLUMNS.keys())
+    n_steps = sum(len(episode.dynamics_model.states) for episode in episodes)
+    for name, dtype in EPISODE_COLUMNS.items():
+        assert columns[name].shape == (n_steps,) and columns[name].dtype == dtype
+
+    # rows are consistent with episodes
+    row = int(np.flatnonzero(columns['episode_id'] == 1)[3])
+    episode, step = episodes[1], columns['step'][row]
+    assert step == 3
+    assert columns['dynamics_model_index'][row] == episode.selected_dynamics_model_index
+    state = episode.dynamics_model.states[step].bicycle_model
+    action = episode.dynamics_model.actions[step].bicycle_model
+    waypoint = episode.reference_line.waypoints[step]
+    assert columns['x'][row] == state.body_state.x and columns['y'][row] == state.body_state.y
+    assert columns['r'][row] == state.body_state.r and columns['v'][row] == state.v
+    assert columns['a'][row] == action.a and columns['s'][row] == action.s
+    assert columns['reward'][row] == episode.rewards[step]
+    assert columns['ref_x'][row] == waypoint.x and columns['ref_y'][row] == waypoint.y
+
+    test_dir = f'/tmp/drltt-pytest-{generate_random_string(6)}'
+    os.makedirs(test_dir)
+    path = f'{test_dir}/episodes.{columns_format}'
+    save_episode_columns(path, columns)
+    loaded_columns = load_episode_columns(path)
+    assert tuple(loaded_columns.keys()) == tuple(columns.keys())
+    for name in columns:
+        assert np.array_equal(loaded_columns[name], columns[name])
+        # viewed without copy
+        assert not loaded_columns[name].flags.owndata
+    del loaded_columns
+
+    with pytest.raises(ValueError):
+        save_episode_columns(f'{test_dir}/episodes.csv', columns)
+
+    shutil.rmtree(test_dir)
+
+
+if __name__ == '__main__':
+    test_episode_columns('npz')
+    test_episode_columns('parquet')
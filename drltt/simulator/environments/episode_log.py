@@ -0,0 +1,565 @@
+"""
+Streaming log of episodes, stored as length-delimited records.
+
+Each record is a varint-encoded length followed by a serialized `TrajectoryTrackingEpisode`,
+    i.e. the delimited format of Protobuf (e.g. `writeDelimitedTo` in Java).
+Records are optionally compressed with zstd, one frame per record, which requires the package `zstandard`.
+
+A sidecar index (`<log>.index.npz`) stores the offset and summary fields of each record,
+    allowing O(1) random access and filtered scans without parsing the whole log, see `EpisodeLogIndex`.
+"""
+
+from typing import BinaryIO, Iterator, List, Sequence, Tuple, Union
+import os
+import mmap
+import logging
+
+import numpy as np
+
+from drltt_proto.environment.trajectory_tracking_pb2 import TrajectoryTrackingEpisode
+
+EPISODE_LOG_COMPRESSIONS = ('none', 'zstd')
+ZSTD_MAGIC_NUMBER = b'\x28\xb5\x2f\xfd'
+EPISODE_LOG_INDEX_SUFFIX = '.index.npz'
+# offset/number of bytes of record within the log, followed by summary fields of episode
+EPISODE_LOG_INDEX_DTYPE = np.dtype([
+    ('offset', np.int64),
+    ('nbytes', np.int64),
+    ('tracking_length', np.int32),
+    ('dynamics_model_index', np.int32),
+    ('reward_mean', np.float32),
+])
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError('zstd compression of episode log requires `zstandard`: `pip install zstandard`') from e
+
+    return zstandard
+
+
+def _encode_varint(value: int) -> bytes:
+    """Encode an unsigned integer into varint.
+
+    Args:
+        value: Unsigned integer.
+
+    Returns:
+        bytes: Varint bytes.
+    """
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+
+    return bytes(encoded)
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    """Read a given number of bytes from a stream, which may return fewer bytes per read (e.g. decompressor).
+
+    Args:
+        stream: Stream to read from.
+        size: Number of bytes.
+
+    Returns:
+        bytes: Read bytes, shorter than `size` only if the stream ends.
+    """
+    chunks = list()
+    while size > 0:
+        chunk = stream.read(size)
+        if len(chunk) == 0:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+
+    return b''.join(chunks)
+
+
+def _read_varint(stream: BinaryIO) -> Union[int, None]:
+    """Read a varint from a stream.
+
+    Args:
+        stream: Stream to read from.
+
+    Returns:
+        Union[int, None]: Decoded unsigned integer. `None` if the stream ends before the first byte.
+    """
+    value, shift = 0, 0
+    while True:
+        byte = _read_exactly(stream, 1)
+        if len(byte) == 0:
+            if shift > 0:
+                raise EOFError('Stream ends within varint')
+            return None
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+def _decode_varint(buffer: Union[bytes, mmap.mmap], position: int) -> Tuple[int, int]:
+    """Decode a varint from a buffer.
+
+    Args:
+        buffer: Buffer to decode from.
+        position: Position of the varint within the buffer.
+
+    Returns:
+        int: Decoded unsigned integer.
+        int: Position right after the varint.
+    """
+    value, shift = 0, 0
+    while True:
+        if position >= len(buffer):
+            raise EOFError('Buffer ends within varint')
+        byte = buffer[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class _ZstdStreamReader:
+    """Reader of zstd stream, which also decompresses frames unfinished by an interrupted writer.
+
+    `stream_reader` of `zstandard` is not used as it may end prematurely within an unfinished frame.
+    """
+
+    def __init__(self, stream: BinaryIO, chunk_size: int = 1 << 16):
+        """
+        Args:
+            stream: Compressed stream.
+            chunk_size: Size of chunks read from the compressed stream.
+        """
+        self._zstandard = _import_zstandard()
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decompressor = self._zstandard.ZstdDecompressor().decompressobj()
+        self._buffer = bytearray()
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk = self._stream.read(self._chunk_size)
+            if len(chunk) == 0:
+                break
+            while len(chunk) > 0:
+                self._buffer += self._decompressor.decompress(chunk)
+                # continue with the next frame, if any
+                chunk = self._decompressor.unused_data if self._decompressor.eof else b''
+                if self._decompressor.eof:
+                    self._decompressor = self._zstandard.ZstdDecompressor().decompressobj()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+
+        return data
+
+
+class EpisodeLogWriter:
+    """Streaming writer of episode log, appending each episode as soon as it is written.
+
+    Records are flushed upon each write, thus a partially written log remains readable up to the last record.
+    The sidecar index is saved upon closing, and may be rebuilt from the log with `build_episode_log_index`.
+
+    Attributes:
+        path: Path to the log file.
+        compression: Compression, see `EPISODE_LOG_COMPRESSIONS`.
+        n_episodes: Number of written episodes.
+        nbytes: Number of written bytes before compression.
+    """
+
+    path: str
+    compression: str
+    n_episodes: int
+    nbytes: int
+
+    def __init__(self, path: str, compression: str = 'none', compression_level: int = 3):
+        """
+        Args:
+            path: Path to the log file, which is overwritten along with its stale sidecar index.
+            compression: Compression, see `EPISODE_LOG_COMPRESSIONS`.
+            compression_level: Level of zstd compression.
+        """
+        if compression not in EPISODE_LOG_COMPRESSIONS:
+            raise ValueError(f'Unknown `compression`: {compression}, supported: {EPISODE_LOG_COMPRESSIONS}')
+        self.path = path
+        self.compression = compression
+        self.n_episodes = 0
+        self.nbytes = 0
+
+        index_path = get_episode_log_index_path(path)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        self._file = open(path, 'wb')
+        self._compressor = None
+        if compression == 'zstd':
+            zstandard = _import_zstandard()
+            self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._offset = 0
+        self._index_records: List[tuple] = list()
+        self._dynamics_model_names: List[str] = list()
+
+    def write(self, episode: TrajectoryTrackingEpisode):
+        """Append an episode to the log.
+
+        Args:
+            episode: Episode to be written.
+        """
+        data = episode.SerializeToString()
+        record = _encode_varint(len(data)) + data
+        self.nbytes += len(record)
+        if self._compressor is not None:
+            # one frame per record, allowing random access
+            record = self._compressor.compress(record)
+        self._file.write(record)
+        self._file.flush()
+        self.n_episodes += 1
+
+        self._index_records.append((self._offset, len(record)) + summarize_episode(episode))
+        self._offset += len(record)
+        self._dynamics_model_names = _update_dynamics_model_names(self._dynamics_model_names, episode)
+
+    def close(self):
+        """Close the log and save its sidecar index."""
+        if self._file.closed:
+            return
+        self._file.close()
+        save_episode_log_index(
+            self.path,
+            np.array(self._index_records, dtype=EPISODE_LOG_INDEX_DTYPE),
+            self._dynamics_model_names,
+        )
+        logging.info(f'Episode log with {self.n_episodes} episodes ({self.nbytes} bytes) saved at: {self.path}')
+
+    def __enter__(self) -> 'EpisodeLogWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_episode_log(path: str) -> Iterator[TrajectoryTrackingEpisode]:
+    """Iterate over episodes of a log in constant memory. Compression is detected from the content.
+
+    A truncated last record, e.g. from an interrupted writer, is skipped with a warning.
+
+    Args:
+        path: Path to the log file.
+
+    Yields:
+        TrajectoryTrackingEpisode: Episodes, in the written order.
+    """
+    with open(path, 'rb') as f:
+        is_compressed = f.read(len(ZSTD_MAGIC_NUMBER)) == ZSTD_MAGIC_NUMBER
+        f.seek(0)
+        stream = _ZstdStreamReader(f) if is_compressed else f
+
+        while True:
+            try:
+                size = _read_varint(stream)
+                if size is None:
+                    break
+                data = _read_exactly(stream, size)
+                if len(data) < size:
+                    raise EOFError('Stream ends within record')
+            except EOFError:
+                logging.warning(f'Truncated record skipped at the end of episode log: {path}')
+                break
+            episode = TrajectoryTrackingEpisode()
+            episode.ParseFromString(data)
+            yield episode
+
+
+def summarize_episode(episode: TrajectoryTrackingEpisode) -> Tuple[int, int, float]:
+    """Summarize an episode into fields of index.
+
+    Args:
+        episode: Episode to be summarized.
+
+    Returns:
+        Tuple[int, int, float]: Tracking length, dynamics model index, and mean reward (NaN if no reward recorded).
+    """
+    reward_mean = float(np.mean(episode.rewards)) if len(episode.rewards) > 0 else np.nan
+
+    return episode.tracking_length, episode.selected_dynamics_model_index, reward_mean
+
+
+def _update_dynamics_model_names(dynamics_model_names: List[str], episode: TrajectoryTrackingEpisode) -> List[str]:
+    """Update names of dynamics models, indexed by dynamics model index, with hyper-parameter of an episode."""
+    hyper_parameters = episode.hyper_parameter.dynamics_models_hyper_parameters
+    if len(hyper_parameters) > len(dynamics_model_names):
+        dynamics_model_names = [hyper_parameter.name for hyper_parameter in hyper_parameters]
+
+    return dynamics_model_names
+
+
+def get_episode_log_index_path(path: str) -> str:
+    """Get path of the sidecar index of an episode log.
+
+    Args:
+        path: Path to the log file.
+
+    Returns:
+        str: Path to the index file.
+    """
+    return f'{path}{EPISODE_LOG_INDEX_SUFFIX}'
+
+
+def save_episode_log_index(path: str, records: np.ndarray, dynamics_model_names: Sequence[str]):
+    """Save the sidecar index of an episode log.
+
+    Args:
+        path: Path to the log file.
+        records: Index records, dtype=`EPISODE_LOG_INDEX_DTYPE`, shape=(n_episodes,).
+        dynamics_model_names: Names of dynamics models, indexed by dynamics model index.
+    """
+    np.savez(
+        get_episode_log_index_path(path),
+        records=records,
+        dynamics_model_names=np.array(dynamics_model_names, dtype=np.str_),
+    )
+
+
+def _iterate_raw_records(
+    buffer: Union[bytes, mmap.mmap], is_compressed: bool, chunk_size: int = 1 << 16
+) -> Iterator[Tuple[int, int, bytes]]:
+    """Iterate over raw records of a log, stopping at a truncated last record with a warning.
+
+    Args:
+        buffer: Content of the log.
+        is_compressed: Whether records are compressed with zstd, one frame per record.
+        chunk_size: Size of chunks fed to the decompressor, which bounds the data copied beyond each frame.
+
+    Yields:
+        int: Offset of record.
+        int: Number of bytes of record.
+        bytes: Serialized episode.
+    """
+    if is_compressed:
+        zstandard = _import_zstandard()
+    offset = 0
+    while offset < len(buffer):
+        try:
+            if is_compressed:
+                decompressor = zstandard.ZstdDecompressor().decompressobj()
+                chunks, position = list(), offset
+                while not decompressor.eof and position < len(buffer):
+                    chunks.append(decompressor.decompress(buffer[position : position + chunk_size]))
+                    position = min(position + chunk_size, len(buffer))
+                if not decompressor.eof:
+                    raise EOFError('Buffer ends within frame')
+                end = position - len(decompressor.unused_data)
+                record = b''.join(chunks)
+                size, position = _decode_varint(record, 0)
+                if position + size != len(record):
+                    raise ValueError(
+                        'Records of episode log are not compressed individually, random access unsupported'
+                    )
+                data = record[position:]
+            else:
+                size, position = _decode_varint(buffer, offset)
+                end = position + size
+                if end > len(buffer):
+                    raise EOFError('Buffer ends within record')
+                data = buffer[position:end]
+        except EOFError:
+            logging.warning('Truncated record skipped at the end of episode log')
+            break
+        yield offset, end - offset, data
+        offset = end
+
+
+def _parse_raw_record(record: bytes, is_compressed: bool) -> TrajectoryTrackingEpisode:
+    """Parse a raw record, as located by the index, into an episode."""
+    if is_compressed:
+        record = _import_zstandard().ZstdDecompressor().decompress(record)
+    size, position = _decode_varint(record, 0)
+    episode = TrajectoryTrackingEpisode()
+    episode.ParseFromString(record[position : position + size])
+
+    return episode
+
+
+def _is_compressed(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(ZSTD_MAGIC_NUMBER)) == ZSTD_MAGIC_NUMBER
+
+
+def build_episode_log_index(path: str) -> np.ndarray:
+    """Build and save the sidecar index of an existing episode log, e.g. one from an interrupted writer.
+
+    Args:
+        path: Path to the log file.
+
+    Returns:
+        np.ndarray: Index records, dtype=`EPISODE_LOG_INDEX_DTYPE`, shape=(n_episodes,).
+    """
+    is_compressed = _is_compressed(path)
+    index_records = list()
+    dynamics_model_names = list()
+    if os.path.getsize(path) > 0:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for offset, nbytes, data in _iterate_raw_records(buffer, is_compressed):
+                episode = TrajectoryTrackingEpisode()
+                episode.ParseFromString(data)
+                index_records.append((offset, nbytes) + summarize_episode(episode))
+                dynamics_model_names = _update_dynamics_model_names(dynamics_model_names, episode)
+    records = np.array(index_records, dtype=EPISODE_LOG_INDEX_DTYPE)
+    save_episode_log_index(path, records, dynamics_model_names)
+
+    return records
+
+
+class EpisodeLogIndex:
+    """Random access to episodes of a log through its sidecar index.
+
+    The log is memory-mapped, and only the accessed records are read and parsed.
+    Filtered scans select records on summary fields, e.g.:
+
+    ```python
+    with EpisodeLogIndex('eval_episodes.bin') as index:
+        for episode in index.iterate_episodes(index.select(dynamics_model_name='LongVehicle', max_reward_mean=-1.0)):
+            ...
+    ```
+
+    Attributes:
+        path: Path to the log file.
+        records: Index records, dtype=`EPISODE_LOG_INDEX_DTYPE`, shape=(n_episodes,).
+        dynamics_model_names: Names of dynamics models, indexed by dynamics model index.
+    """
+
+    path: str
+    records: np.ndarray
+    dynamics_model_names: Tuple[str, ...]
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path to the log file. The index is built if missing, and rebuilt if it does not match the log.
+        """
+        self.path = path
+        index_path = get_episode_log_index_path(path)
+        if not os.path.exists(index_path):
+            logging.info(f'Building missing index of episode log: {path}')
+            build_episode_log_index(path)
+        self._load_index(index_path)
+        if self._get_indexed_nbytes() != os.path.getsize(path):
+            logging.info(f'Rebuilding stale index of episode log: {path}')
+            build_episode_log_index(path)
+            self._load_index(index_path)
+
+        self._is_compressed = _is_compressed(path)
+        self._file = open(path, 'rb')
+        self._mmap = None
+        if os.path.getsize(path) > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load_index(self, index_path: str):
+        with np.load(index_path) as index_data:
+            self.records = index_data['records']
+            self.dynamics_model_names = tuple(index_data['dynamics_model_names'].tolist())
+
+    def _get_indexed_nbytes(self) -> int:
+        """Get size of the log covered by the index, which equals to the file size for a consistent index."""
+        if len(self.records) == 0:
+            return 0
+        last_record = self.records[-1]
+
+        return int(last_record['offset']) + int(last_record['nbytes'])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> TrajectoryTrackingEpisode:
+        """Read and parse a single episode in O(1).
+
+        Args:
+            index: Index of episode in the written order.
+
+        Returns:
+            TrajectoryTrackingEpisode: Episode.
+        """
+        record = self.records[index]
+        offset, nbytes = int(record['offset']), int(record['nbytes'])
+
+        return _parse_raw_record(self._mmap[offset : offset + nbytes], self._is_compressed)
+
+    def get_dynamics_model_index(self, dynamics_model_name: str) -> int:
+        """Get the dynamics model index from its name.
+
+        Args:
+            dynamics_model_name: Name of dynamics model, e.g. `LongVehicle`.
+
+        Returns:
+            int: Dynamics model index.
+        """
+        if dynamics_model_name not in self.dynamics_model_names:
+            raise ValueError(f'Unknown dynamics model: {dynamics_model_name}, available: {self.dynamics_model_names}')
+
+        return self.dynamics_model_names.index(dynamics_model_name)
+
+    def select(
+        self,
+        dynamics_model_name: Union[str, None] = None,
+        min_reward_mean: Union[float, None] = None,
+        max_reward_mean: Union[float, None] = None,
+        min_tracking_length: Union[int, None] = None,
+        max_tracking_length: Union[int, None] = None,
+    ) -> np.ndarray:
+        """Select episodes on summary fields, without reading the log. Bounds are inclusive.
+
+        Args:
+            dynamics_model_name: Name of dynamics model.
+            min_reward_mean: Lower bound of mean reward.
+            max_reward_mean: Upper bound of mean reward.
+            min_tracking_length: Lower bound of tracking length.
+            max_tracking_length: Upper bound of tracking length.
+
+        Returns:
+            np.ndarray: Indices of selected episodes, in the written order.
+        """
+        mask = np.ones(len(self.records), dtype=bool)
+        if dynamics_model_name is not None:
+            mask &= self.records['dynamics_model_index'] == self.get_dynamics_model_index(dynamics_model_name)
+        if min_reward_mean is not None:
+            mask &= self.records['reward_mean'] >= min_reward_mean
+        if max_reward_mean is not None:
+            mask &= self.records['reward_mean'] <= max_reward_mean
+        if min_tracking_length is not None:
+            mask &= self.records['tracking_length'] >= min_tracking_length
+        if max_tracking_length is not None:
+            mask &= self.records['tracking_length'] <= max_tracking_length
+
+        return np.flatnonzero(mask)
+
+    def iterate_episodes(
+        self, indices: Union[Sequence[int], np.ndarray, None] = None
+    ) -> Iterator[TrajectoryTrackingEpisode]:
+        """Iterate over episodes, e.g. selected by `select`.
+
+        Args:
+            indices: Indices of episodes. Default to all episodes.
+
+        Yields:
+            TrajectoryTrackingEpisode: Episodes.
+        """
+        if indices is None:
+            indices = range(len(self))
+        for index in indices:
+            yield self[index]
+
+    def close(self):
+        """Close the memory-mapped log."""
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'EpisodeLogIndex':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,136 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs, generate_random_string
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.environments.episode_log import (
+    EpisodeLogWriter,
+    EpisodeLogIndex,
+    read_episode_log,
+    build_episode_log_index,
+    get_episode_log_index_path,
+)
+from drltt.simulator.rl_learning.sb3_utils import roll_out_one_episode
+
+
+@pytest.mark.parametrize('compression', ['none', 'zstd'])
+def test_episode_log(compression: str):
+    if compression == 'zstd':
+        pytest.importorskip('zstandard')
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, config['environment'], recording_level='full'
+    )
+    test_dir = f'/tmp/drltt-pytest-{generate_random_string(6)}'
+    os.makedirs(test_dir)
+    log_path = f'{test_dir}/episodes.bin'
+
+    n_episodes = 5
+    episodes = list()
+    with EpisodeLogWriter(log_path, compression=compression) as writer:
+        for _ in range(n_episodes):
+            roll_out_one_episode(env, lambda obs: env.action_space.sample())
+            episodes.append(env.export_episode_data())
+            writer.write(episodes[-1])
+            # records are readable as soon as written
+            assert len(list(read_episode_log(log_path))) == len(episodes)
+    assert writer.n_episodes == n_episodes
+    assert list(read_episode_log(log_path)) == episodes
+    # identical to the current episode of environment data
+    assert episodes[-1] == env.export_environment_data(n_archived_episodes=0).trajectory_tracking.episode
+    # more episodes than archived
+    n_archived_episodes = len(env.archived_episodes)
+    assert len(env.export_environment_data(n_archived_episodes + 1).trajectory_tracking.episodes) == n_archived_episodes
+
+    # truncated last record is skipped
+    if compression == 'none':
+        with open(log_path, 'rb+') as f:
+            f.truncate(os.path.getsize(log_path) - 1)
+        assert list(read_episode_log(log_path)) == episodes[:-1]
+
+    shutil.rmtree(test_dir)
+
+
+@pytest.mark.parametrize('compression', ['none', 'zstd'])
+def test_episode_log_index(compression: str):
+    if compression == 'zstd':
+        pytest.importorskip('zstandard')
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, config['environment'], recording_level='summary'
+    )
+    test_dir = f'/tmp/drltt-pytest-{generate_random_string(6)}'
+    os.makedirs(test_dir)
+    log_path = f'{test_dir}/episodes.bin'
+
+    n_episodes = 12
+    episodes = list()
+    with EpisodeLogWriter(log_path, compression=compression) as writer:
+        for _ in range(n_episodes):
+            roll_out_one_episode(env, lambda obs: env.action_space.sample())
+            episodes.append(env.export_episode_data())
+            writer.write(episodes[-1])
+
+    with EpisodeLogIndex(log_path) as index:
+        assert len(index) == n_episodes
+        assert index.dynamics_model_names == tuple(
+            hyper_parameter.name
+            for hyper_parameter in env.env_info.trajectory_tracking.hyper_parameter.dynamics_models_hyper_parameters
+        )
+        # random access
+        for episode_index in reversed(range(n_episodes)):
+            assert index[episode_index] == episodes[episode_index]
+
+        # filtered scan
+        dynamics_model_index = episodes[0].selected_dynamics_model_index
+        dynamics_model_name = index.dynamics_model_names[dynamics_model_index]
+        reward_means = np.array([np.mean(episode.rewards) for episode in episodes], dtype=np.float32)
+        max_reward_mean = float(np.median(reward_means))
+        selected_indices = index.select(dynamics_model_name=dynamics_model_name, max_reward_mean=max_reward_mean)
+        expected_indices = [
+            episode_index
+            for episode_index, episode in enumerate(episodes)
+            if episode.selected_dynamics_model_index == dynamics_model_index
+            and reward_means[episode_index] <= max_reward_mean
+        ]
+        assert selected_indices.tolist() == expected_indices
+        assert list(index.iterate_episodes(selected_indices)) == [episodes[i] for i in expected_indices]
+
+        with pytest.raises(ValueError):
+            index.select(dynamics_model_name='UnknownVehicle')
+        records = index.records.copy()
+
+    # rebuilt index is identical to the one saved by writer
+    os.remove(get_episode_log_index_path(log_path))
+    with EpisodeLogIndex(log_path) as index:
+        assert index.records.tobytes() == records.tobytes()
+
+    # truncated last record is excluded from the rebuilt index
+    with open(log_path, 'rb+') as f:
+        f.truncate(os.path.getsize(log_path) - 1)
+    assert build_episode_log_index(log_path).tobytes() == records[:-1].tobytes()
+
+    # sidecar index of an overwritten log is removed, and a stale index is rebuilt
+    stale_index_path = f'{test_dir}/stale.index.npz'
+    shutil.copy(get_episode_log_index_path(log_path), stale_index_path)
+    with EpisodeLogWriter(log_path, compression=compression) as writer:
+        assert not os.path.exists(get_episode_log_index_path(log_path))
+        for episode in episodes[:3]:
+            writer.write(episode)
+    shutil.copy(stale_index_path, get_episode_log_index_path(log_path))
+    with EpisodeLogIndex(log_path) as index:
+        assert index.records.tobytes() == records[:3].tobytes()
+
+    shutil.rmtree(test_dir)
+
+
+if __name__ == '__main__':
+    test_episode_log('none')
+    test_episode_log('zstd')
+    test_episode_log_index('none')
+    test_episode_log_index('zstd')
@@ -0,0 +1,396 @@
+from typing import Callable, Dict, Iterator, List, Sequence, Union
+
+import numpy as np
+
+from drltt.simulator import DTYPE
+from drltt.simulator.dynamics_models import BaseDynamicsModel
+from drltt.simulator.trajectory.reference_line import ReferenceLineManager
+
+from drltt_proto.dynamics_model.basics_pb2 import DebugInfo
+from drltt_proto.environment.trajectory_tracking_pb2 import (
+    TrajectoryTrackingEpisode,
+    TrajectoryTrackingHyperParameter,
+)
+
+RECORDING_LEVELS = (
+    'none',  # no per-step data, only episode metadata (tracking length, reference line, dynamics model)
+    'summary',  # states, actions, and rewards
+    'full',  # states, actions, rewards, observations, and debug infos
+)
+
+
+def check_recording_level(recording_level: str):
+    """Check if a recording level is valid.
+
+    Args:
+        recording_level: Recording level to be checked.
+    """
+    if recording_level not in RECORDING_LEVELS:
+        raise ValueError(f'Unknown `recording_level`: {recording_level}, valid levels: {RECORDING_LEVELS}')
+
+
+def is_recording_level_sufficient(recording_level: str, required_recording_level: str) -> bool:
+    """Check if a recording level covers the data of a required recording level.
+
+    Args:
+        recording_level: Recording level to be checked.
+        required_recording_level: Required recording level.
+
+    Returns:
+        bool: Whether `recording_level` is sufficient.
+    """
+    return RECORDING_LEVELS.index(recording_level) >= RECORDING_LEVELS.index(required_recording_level)
+
+
+def requires_recording_level(required_recording_level: str) -> Callable:
+    """Decorator declaring the recording level that a consumer of episode data (metrics, visualization, etc.) needs.
+
+    The level is stored in the attribute `required_recording_level` of the decorated function.
+
+    Args:
+        required_recording_level: Required recording level.
+
+    Returns:
+        Callable: Decorator.
+    """
+    check_recording_level(required_recording_level)
+
+    def decorator(func: Callable) -> Callable:
+        func.required_recording_level = required_recording_level
+        return func
+
+    return decorator
+
+
+def check_episode_recorded(episode: TrajectoryTrackingEpisode, required_recording_level: str):
+    """Check if an exported episode contains the data of a required recording level.
+
+    Args:
+        episode: Exported episode.
+        required_recording_level: Required recording level.
+    """
+    check_recording_level(required_recording_level)
+    n_steps = episode.step_index
+    n_recorded_steps = n_steps
+    if is_recording_level_sufficient(required_recording_level, 'summary'):
+        n_recorded_steps = min(n_recorded_steps, len(episode.dynamics_model.states))
+    if is_recording_level_sufficient(required_recording_level, 'full'):
+        n_recorded_steps = min(n_recorded_steps, len(episode.dynamics_model.observations))
+    if n_recorded_steps < n_steps:
+        raise ValueError(
+            f'Episode data recorded with insufficient recording level ({n_recorded_steps}/{n_steps} steps available),'
+            f' required recording level: {required_recording_level}'
+        )
+
+
+class EpisodeRecorder:
+    """Recorder of episode data backed by preallocated arrays.
+
+    Recording a step only writes into the arrays, thus is O(1) and allocation-free.
+    The episode is converted to proto (`TrajectoryTrackingEpisode`) only upon export.
+
+    The amount of recorded data is controlled by the recording level (see `RECORDING_LEVELS`).
+
+    Attributes:
+        recording_level: Recording level of the current episode.
+        next_recording_level: Recording level to be applied from the next episode.
+        step_index: Current step index, i.e. number of recorded steps.
+        tracking_length: Tracking length of the episode.
+        dynamics_model_index: Index of the dynamics model used by the episode.
+        reference_line: Raw reference line of the episode, shape=(L, 2).
+        states: Recorded states, shape=(capacity, state_dim).
+        actions: Recorded actions, shape=(capacity, action_dim).
+        rewards: Recorded rewards, shape=(capacity,).
+        observations: Recorded observations, shape=(capacity, observation_dim).
+        n_observations: Number of recorded observations.
+        debug_infos: Non-empty debug information, indexed by step index.
+    """
+
+    recording_level: str
+    next_recording_level: str
+    step_index: int
+    tracking_length: int
+    dynamics_model_index: int
+    reference_line: Union[np.ndarray, None]
+    states: np.ndarray
+    actions: np.ndarray
+    rewards: np.ndarray
+    observations: np.ndarray
+    n_observations: int
+    debug_infos: Dict[int, List[float]]
+
+    def __init__(
+        self,
+        state_dim: int,
+        action_dim: int,
+        observation_dim: int,
+        capacity: int = 0,
+        recording_level: str = 'full',
+    ):
+        """
+        Args:
+            state_dim: Dimension of vectorized state.
+            action_dim: Dimension of vectorized action.
+            observation_dim: Dimension of vectorized observation.
+            capacity: Initial number of steps that buffers can hold.
+            recording_level: Recording level.
+        """
+        self.state_dim = state_dim
+        self.action_dim = action_dim
+        self.observation_dim = observation_dim
+        self.set_recording_level(recording_level)
+        self._apply_recording_level()
+        self._allocate(capacity)
+        self.clear()
+
+    def _allocate(self, capacity: int):
+        """Allocate buffers.
+
+        Args:
+            capacity: Number of steps that buffers can hold.
+        """
+        self.capacity = capacity
+        self.states = np.zeros((capacity, self.state_dim), dtype=DTYPE)
+        self.actions = np.zeros((capacity, self.action_dim), dtype=DTYPE)
+        self.rewards = np.zeros((capacity,), dtype=DTYPE)
+        self.observations = np.zeros((capacity, self.observation_dim), dtype=DTYPE)
+
+    def set_recording_level(self, recording_level: str):
+        """Set recording level, which takes effect from the next episode to keep recorded episodes consistent.
+
+        Args:
+            recording_level: Recording level.
+        """
+        check_recording_level(recording_level)
+        self.next_recording_level = recording_level
+
+    def _apply_recording_level(self):
+        """Apply the recording level set by `set_recording_level`."""
+        self.recording_level = self.next_recording_level
+        self._record_summary = is_recording_level_sufficient(self.recording_level, 'summary')
+        self._record_full = is_recording_level_sufficient(self.recording_level, 'full')
+
+    def clear(self):
+        """Clear recorded data while keeping the buffers."""
+        self.step_index = 0
+        self.tracking_length = 0
+        self.dynamics_model_index = -1
+        self.reference_line = None
+        self.n_observations = 0
+        self.debug_infos = dict()
+
+    def reset(
+        self,
+        tracking_length: int,
+        dynamics_model_index: int,
+        reference_line: np.ndarray,
+    ):
+        """Start recording a new episode. Buffers are re-allocated only if the tracking length exceeds the capacity.
+
+        Args:
+            tracking_length: Tracking length of the new episode.
+            dynamics_model_index: Index of the dynamics model used by the new episode.
+            reference_line: Raw reference line of the new episode, shape=(L, 2).
+                Stored by reference, thus should not be modified.
+        """
+        if tracking_length > self.capacity:
+            self._allocate(tracking_length)
+        self.clear()
+        self._apply_recording_level()
+        self.tracking_length = tracking_length
+        self.dynamics_model_index = dynamics_model_index
+        self.reference_line = reference_line
+
+    def record_observation(self, observation: np.ndarray):
+        """Record an observation.
+
+        Args:
+            observation: Vectorized observation.
+        """
+        if not self._record_full:
+            return
+        self.observations[self.n_observations] = observation
+        self.n_observations += 1
+
+    def record_step(
+        self,
+        state: np.ndarray,
+        action: np.ndarray,
+        reward: float,
+        debug_info: Union[DebugInfo, None] = None,
+    ):
+        """Record a step and move the step index forward.
+
+        Args:
+            state: Vectorized state before stepping.
+            action: Vectorized action.
+            reward: Scalar reward.
+            debug_info: Debug information, recorded only if not empty.
+        """
+        if self._record_summary:
+            self.states[self.step_index] = state
+            self.actions[self.step_index] = action
+            self.rewards[self.step_index] = reward
+        if self._record_full and debug_info is not None and len(debug_info.data) > 0:
+            self.debug_infos[self.step_index] = list(debug_info.data)
+        self.step_index += 1
+
+    def snapshot(self) -> 'EpisodeRecorder':
+        """Take a snapshot of the recorded episode, with buffers trimmed to the recorded length.
+
+        Returns:
+            EpisodeRecorder: Snapshot of the recorded episode.
+        """
+        snapshot = EpisodeRecorder(
+            self.state_dim, self.action_dim, self.observation_dim, recording_level=self.recording_level
+        )
+        n_recorded_steps = self.step_index if self._record_summary else 0
+        snapshot.capacity = n_recorded_steps
+        snapshot.states = self.states[:n_recorded_steps].copy()
+        snapshot.actions = self.actions[:n_recorded_steps].copy()
+        snapshot.rewards = self.rewards[:n_recorded_steps].copy()
+        snapshot.observations = self.observations[: self.n_observations].copy()
+        snapshot.step_index = self.step_index
+        snapshot.tracking_length = self.tracking_length
+        snapshot.dynamics_model_index = self.dynamics_model_index
+        snapshot.reference_line = self.reference_line
+        snapshot.n_observations = self.n_observations
+        snapshot.debug_infos = dict(self.debug_infos)
+
+        return snapshot
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint of the recorded data in bytes, dominated by buffers and reference line."""
+        nbytes = self.states.nbytes + self.actions.nbytes + self.rewards.nbytes + self.observations.nbytes
+        if self.reference_line is not None:
+            nbytes += self.reference_line.nbytes
+
+        return nbytes
+
+    def export_episode(
+        self,
+        episode: TrajectoryTrackingEpisode,
+        hyper_parameter: TrajectoryTrackingHyperParameter,
+        dynamics_models: Sequence[BaseDynamicsModel],
+    ):
+        """Export the recorded episode to proto.
+
+        Args:
+            episode: Destination of the exported episode.
+            hyper_parameter: Hyper-parameter of the environment.
+            dynamics_models: All dynamics models of the environment, indexed by dynamics model index.
+        """
+        episode.Clear()
+        episode.step_index = self.step_index
+        episode.hyper_parameter.CopyFrom(hyper_parameter)
+        episode.tracking_length = self.tracking_length
+        if self.reference_line is not None:
+            episode.reference_line.CopyFrom(ReferenceLineManager.np_array_to_reference_line(self.reference_line))
+        if self.dynamics_model_index < 0:
+            return
+
+        dynamics_model = dynamics_models[self.dynamics_model_index]
+        episode.selected_dynamics_model_index = self.dynamics_model_index
+        episode.dynamics_model.type = type(dynamics_model).__name__
+        episode.dynamics_model.hyper_parameter.CopyFrom(dynamics_model.hyper_parameter)
+        if not self._record_summary:
+            return
+
+        for step_index in range(self.step_index):
+            episode.dynamics_model.states.append(dynamics_model.serialize_state(self.states[step_index]))
+            episode.dynamics_model.actions.append(dynamics_model.serialize_action(self.actions[step_index]))
+        episode.rewards.extend(self.rewards[: self.step_index].tolist())
+        if not self._record_full:
+            return
+
+        for step_index in range(self.step_index):
+            episode.dynamics_model.debug_infos.append(DebugInfo(data=self.debug_infos.get(step_index, tuple())))
+        for observation in self.observations[: self.n_observations]:
+            episode.dynamics_model.observations.append(dynamics_model.serialize_observation(observation))
+
+
+class EpisodeArchive:
+    """Fixed-capacity ring buffer of archived episodes, bounded by number of episodes and memory budget.
+
+    Insertion and eviction of the oldest episode are O(1) (amortized O(1) with memory budget).
+    Episodes are assembled in chronological order only upon iteration, e.g. at export.
+
+    Attributes:
+        max_n_episodes: Maximum number of archived episodes.
+        max_nbytes: Memory budget in bytes. `None` denotes no limit.
+        nbytes: Approximate memory footprint of archived episodes in bytes.
+    """
+
+    max_n_episodes: int
+    max_nbytes: Union[int, None]
+    nbytes: int
+
+    def __init__(
+        self,
+        max_n_episodes: int,
+        max_nbytes: Union[int, None] = None,
+    ):
+        """
+        Args:
+            max_n_episodes: Maximum number of archived episodes.
+            max_nbytes: Memory budget in bytes. `None` denotes no limit.
+        """
+        if max_n_episodes < 0:
+            raise ValueError(f'Illegal `max_n_episodes`: {max_n_episodes}')
+        self.max_n_episodes = max_n_episodes
+        self.max_nbytes = max_nbytes
+        self._episodes: List[Union[EpisodeRecorder, None]] = [None] * max_n_episodes
+        self._head = 0  # index of the oldest episode
+        self._size = 0
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[EpisodeRecorder]:
+        """Iterate over archived episodes, from the oldest to the newest."""
+        for offset in range(self._size):
+            yield self._episodes[(self._head + offset) % self.max_n_episodes]
+
+    def append(self, episode: EpisodeRecorder):
+        """Archive an episode, evicting the oldest episodes if limits are exceeded.
+
+        An episode larger than the whole memory budget is not archived.
+
+        Args:
+            episode: Episode to be archived. Should not be modified afterward, e.g. a snapshot.
+        """
+        episode_nbytes = episode.nbytes
+        if self.max_n_episodes == 0 or (self.max_nbytes is not None and episode_nbytes > self.max_nbytes):
+            return
+
+        if self._size == self.max_n_episodes:
+            self.pop_oldest()
+        while self.max_nbytes is not None and self.nbytes + episode_nbytes > self.max_nbytes:
+            self.pop_oldest()
+
+        self._episodes[(self._head + self._size) % self.max_n_episodes] = episode
+        self._size += 1
+        self.nbytes += episode_nbytes
+
+    def pop_oldest(self) -> EpisodeRecorder:
+        """Evict the oldest episode.
+
+        Returns:
+            EpisodeRecorder: The evicted episode.
+        """
+        if self._size == 0:
+            raise IndexError('Pop from empty episode archive')
+        episode = self._episodes[self._head]
+        self._episodes[self._head] = None
+        self._head = (self._head + 1) % self.max_n_episodes
+        self._size -= 1
+        self.nbytes -= episode.nbytes
+
+        return episode
+
+    def clear(self):
+        """Remove all archived episodes."""
+        while self._size > 0:
+            self.pop_oldest()
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.environments.episode_recorder import EpisodeRecorder, EpisodeArchive, check_episode_recorded
+from drltt.simulator.rl_learning.sb3_utils import roll_out_one_episode
+
+from drltt_proto.environment.environment_pb2 import Environment
+
+
+def test_episode_recorder():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = config['environment']
+    max_n_episodes = 2
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, env_config, max_n_episodes=max_n_episodes, recording_level='full'
+    )
+
+    for _ in range(max_n_episodes + 2):
+        states, actions, observations = roll_out_one_episode(env, lambda obs: env.action_space.sample())
+    env_data: Environment = env.export_environment_data()
+
+    assert len(env_data.trajectory_tracking.episodes) == max_n_episodes
+    episode = env_data.trajectory_tracking.episode
+    tracking_length = episode.tracking_length
+    assert episode.step_index == tracking_length
+    assert len(episode.reference_line.waypoints) == tracking_length
+    assert len(episode.dynamics_model.states) == tracking_length
+    assert len(episode.dynamics_model.actions) == tracking_length
+    assert len(episode.dynamics_model.observations) == tracking_length
+    assert len(episode.dynamics_model.debug_infos) == tracking_length
+    assert len(episode.rewards) == tracking_length
+
+    dynamics_model = env.get_current_dynamics_model()
+    assert episode.dynamics_model.hyper_parameter == dynamics_model.hyper_parameter
+    for step_index in range(tracking_length):
+        exported_state = dynamics_model.deserialize_state(episode.dynamics_model.states[step_index])
+        exported_action = dynamics_model.deserialize_action(episode.dynamics_model.actions[step_index])
+        exported_observation = np.array(episode.dynamics_model.observations[step_index].bicycle_model.feature)
+        # recorded in float32, thus compared with an absolute tolerance
+        assert np.allclose(exported_state, states[step_index], atol=1e-6)
+        assert np.allclose(exported_action, actions[step_index], atol=1e-6)
+        assert np.allclose(exported_observation, observations[step_index], atol=1e-6)
+
+
+def test_episode_recorder_recording_level():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = config['environment']
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, env_config, recording_level='none'
+    )
+    roll_out_one_episode(env, lambda obs: env.action_space.sample())
+    env_data: Environment = env.export_environment_data()
+    episode = env_data.trajectory_tracking.episode
+    assert episode.step_index == episode.tracking_length
+    assert len(episode.dynamics_model.states) == 0
+    with pytest.raises(ValueError):
+        check_episode_recorded(episode, 'summary')
+
+    env.set_recording_level('summary')
+    roll_out_one_episode(env, lambda obs: env.action_space.sample())
+    env_data: Environment = env.export_environment_data()
+    episode = env_data.trajectory_tracking.episode
+    assert len(env_data.trajectory_tracking.episodes) == 0
+    assert len(episode.dynamics_model.states) == episode.tracking_length
+    assert len(episode.dynamics_model.observations) == 0
+    check_episode_recorded(episode, 'summary')
+    with pytest.raises(ValueError):
+        check_episode_recorded(episode, 'full')
+
+
+def test_episode_archive():
+    def make_episode(n_steps: int, marker: float) -> EpisodeRecorder:
+        episode = EpisodeRecorder(state_dim=4, action_dim=2, observation_dim=3, capacity=n_steps)
+        episode.states[...] = marker
+        return episode
+
+    episode_nbytes = make_episode(4, 0.0).nbytes
+    archive = EpisodeArchive(max_n_episodes=3, max_nbytes=None)
+    for marker in range(5):
+        archive.append(make_episode(4, marker))
+    assert len(archive) == 3
+    assert [episode.states[0, 0] for episode in archive] == [2.0, 3.0, 4.0]
+    assert archive.nbytes == 3 * episode_nbytes
+
+    archive = EpisodeArchive(max_n_episodes=3, max_nbytes=2 * episode_nbytes)
+    for marker in range(3):
+        archive.append(make_episode(4, marker))
+    assert [episode.states[0, 0] for episode in archive] == [1.0, 2.0]
+    # a large episode evicts multiple episodes
+    archive.append(make_episode(8, 3))
+    assert [episode.states[0, 0] for episode in archive] == [3.0]
+    # an episode exceeding the whole budget is not archived
+    archive.append(make_episode(16, 4))
+    assert [episode.states[0, 0] for episode in archive] == [3.0]
+    assert archive.nbytes <= archive.max_nbytes
+
+    archive.clear()
+    assert len(archive) == 0 and archive.nbytes == 0
+
+
+if __name__ == '__main__':
+    test_episode_recorder()
+    test_episode_recorder_recording_level()
+    test_episode_archive()
@@ -0,0 +1,310 @@
+"""Purely functional trajectory tracking simulator in JAX.
+
+Follows the semantics of `TrajectoryTrackingEnv` with bicycle models (dynamics, reward, and observation),
+written in `jax.numpy` so that it supports `jax.jit` and `jax.vmap`, and rolls out whole episodes with `lax.scan`.
+
+Data are held in dictionaries of arrays, which are pytrees:
+
+* Parameter table: fields of `BicycleModelParameterTable` indexed by dynamics model index.
+* Episode: `reference_line` padded by 'repeat' with shape=(L, 2), `tracking_length`, `init_state`,
+    and `dynamics_model_index`. Leading batch dimensions are added for batched rollouts.
+
+This module is not imported by `drltt.simulator.environments`, to keep JAX out of environment workers.
+"""
+
+from typing import Callable, Dict, Iterable, Any, Union
+from functools import partial
+
+import numpy as np
+import jax
+from jax import numpy as jnp
+from jax import lax
+
+from drltt.simulator import DTYPE, EPSILON
+from drltt.simulator.dynamics_models import BicycleModelParameterTable
+from drltt.simulator.reward import DEFAULT_REWARD_WEIGHTS, RewardManager
+
+JAX_PARAMETER_TABLE_FIELDS = (
+    'rearwheel_to_cogs',
+    'cog_relative_positions_between_axles',
+    'max_lat_accs',
+    'action_space_lbs',
+    'action_space_ubs',
+    'dynamics_model_observations',
+)
+
+
+def build_jax_parameter_table(
+    parameter_table: BicycleModelParameterTable,
+    reward_weights: Union[Dict[str, float], None] = None,
+) -> Dict[str, jnp.ndarray]:
+    """Convert hyper-parameter table of dynamics models to JAX arrays.
+
+    Only single-step Euler integration is implemented, as in the default of dynamics models.
+    Only `DEFAULT_REWARD_WEIGHTS` is implemented, see `compute_reward`.
+
+    Args:
+        parameter_table: Hyper-parameter table, e.g. from `DynamicsModelManager.get_parameter_table`.
+        reward_weights: Reward weights of the environment, e.g. from `RewardManager.get_reward_weights`.
+            Default to `DEFAULT_REWARD_WEIGHTS`.
+
+    Returns:
+        Dict[str, jnp.ndarray]: Parameter table in JAX arrays.
+    """
+    for integrator, n_substeps in zip(parameter_table.integrators, parameter_table.n_substeps):
+        if integrator != 'euler' or n_substeps != 1:
+            raise NotImplementedError(f'Unsupported integration in JAX: {integrator} with {n_substeps} sub-step(s)')
+    reward_weights = RewardManager(reward_weights).get_reward_weights()
+    if reward_weights != DEFAULT_REWARD_WEIGHTS:
+        raise NotImplementedError(f'Unsupported reward weights in JAX: {reward_weights}')
+
+    return {name: jnp.asarray(getattr(parameter_table, name), dtype=DTYPE) for name in JAX_PARAMETER_TABLE_FIELDS}
+
+
+def build_jax_episodes(
+    reference_lines: Iterable[np.ndarray],
+    init_states: np.ndarray,
+    dynamics_model_indices: np.ndarray,
+    reference_line_length: int,
+) -> Dict[str, jnp.ndarray]:
+    """Build a batch of episodes, padding reference lines by repeating their last waypoints.
+
+    Args:
+        reference_lines: Reference lines with their tracking lengths, each shape=(tracking_length, 2).
+        init_states: Initial states, shape=(B, 4).
+        dynamics_model_indices: Indices of dynamics models, shape=(B,).
+        reference_line_length: Length of padded reference lines, which should be at least
+            `tracking_length_ub + n_observation_steps`.
+
+    Returns:
+        Dict[str, jnp.ndarray]: Batch of episodes.
+    """
+    reference_lines = list(reference_lines)
+    padded_reference_lines = np.empty((len(reference_lines), reference_line_length, 2), dtype=DTYPE)
+    tracking_lengths = np.empty((len(reference_lines),), dtype=np.int32)
+    for episode_idx, reference_line in enumerate(reference_lines):
+        tracking_length = len(reference_line)
+        padded_reference_lines[episode_idx, :tracking_length] = reference_line
+        padded_reference_lines[episode_idx, tracking_length:] = reference_line[-1]
+        tracking_lengths[episode_idx] = tracking_length
+
+    return dict(
+        reference_line=jnp.asarray(padded_reference_lines),
+        tracking_length=jnp.asarray(tracking_lengths),
+        init_state=jnp.asarray(init_states, dtype=DTYPE),
+        dynamics_model_index=jnp.asarray(dynamics_model_indices, dtype=jnp.int32),
+    )
+
+
+def normalize_angle(angle: jnp.ndarray) -> jnp.ndarray:
+    """JAX version of `drltt.common.geometry.normalize_angle`."""
+    return (angle + jnp.pi) % (2 * jnp.pi) - jnp.pi
+
+
+def compute_max_steer(v: jnp.ndarray, parameters: Dict[str, jnp.ndarray]) -> jnp.ndarray:
+    """JAX version of `BicycleModel.compute_batch_max_steers`.
+
+    Args:
+        v: Speed.
+        parameters: Row of parameter table of the dynamics model.
+
+    Returns:
+        jnp.ndarray: Maximum steering angle.
+    """
+    asin_arg = parameters['rearwheel_to_cogs'] * parameters['max_lat_accs'] / jnp.maximum(v**2, EPSILON)
+    valid = asin_arg <= 1.0
+    max_s = jnp.arctan(
+        jnp.tan(jnp.arcsin(jnp.where(valid, asin_arg, 1.0))) / parameters['cog_relative_positions_between_axles']
+    )
+
+    return jnp.where(valid, max_s, jnp.pi)
+
+
+def compute_next_state(
+    state: jnp.ndarray,
+    action: jnp.ndarray,
+    parameters: Dict[str, jnp.ndarray],
+    delta_t: float,
+) -> jnp.ndarray:
+    """JAX version of `BicycleModel.compute_batch_next_states` on a single state.
+
+    Args:
+        state: State, shape=(4,), format=<x, y, r, v>.
+        action: Action, shape=(2,), format=<a, s>.
+        parameters: Row of parameter table of the dynamics model.
+        delta_t: Time interval.
+
+    Returns:
+        jnp.ndarray: Next state, shape=(4,).
+    """
+    x, y, r, v = state
+    a, s = action
+
+    # clip steering angle due to limit on lateral acceleration.
+    max_s = compute_max_steer(v, parameters)
+    s = jnp.clip(s, -max_s, +max_s)
+
+    omega = normalize_angle(jnp.arctan(parameters['cog_relative_positions_between_axles'] * jnp.tan(s)))
+    rotation_radius_inv = jnp.sin(omega) / parameters['rearwheel_to_cogs']
+
+    return jnp.stack(
+        (
+            x + v * jnp.cos(r + omega) * delta_t,
+            y + v * jnp.sin(r + omega) * delta_t,
+            normalize_angle(r + v * rotation_radius_inv * delta_t),
+            v + a * delta_t,
+        )
+    )
+
+
+def compute_observation(
+    state: jnp.ndarray,
+    step_index: jnp.ndarray,
+    episode: Dict[str, jnp.ndarray],
+    parameters: Dict[str, jnp.ndarray],
+    n_observation_steps: int,
+) -> jnp.ndarray:
+    """Compute observation, i.e. reference line observation, state observation, and dynamics model observation.
+
+    Args:
+        state: State, shape=(4,).
+        step_index: Step index.
+        episode: Episode.
+        parameters: Row of parameter table of the dynamics model.
+        n_observation_steps: Number of observation steps on the forward part of the reference line.
+
+    Returns:
+        jnp.ndarray: Observation, shape=(observation_dim,).
+    """
+    waypoints = lax.dynamic_slice_in_dim(episode['reference_line'], step_index, n_observation_steps, axis=0)
+    x, y, r, v = state
+    cos_r, sin_r = jnp.cos(r), jnp.sin(r)
+    dx, dy = waypoints[:, 0] - x, waypoints[:, 1] - y
+    waypoints_in_body_frame = jnp.stack((cos_r * dx + sin_r * dy, -sin_r * dx + cos_r * dy), axis=-1)
+
+    return jnp.concatenate(
+        (
+            waypoints_in_body_frame.reshape(-1),
+            (episode['tracking_length'] - step_index)[jnp.newaxis].astype(DTYPE),
+            jnp.stack((v, compute_max_steer(v, parameters))),
+            parameters['dynamics_model_observations'],
+        )
+    )
+
+
+def compute_reward(
+    state: jnp.ndarray,
+    action: jnp.ndarray,
+    step_index: jnp.ndarray,
+    episode: Dict[str, jnp.ndarray],
+    parameters: Dict[str, jnp.ndarray],
+) -> jnp.ndarray:
+    """Compute reward, i.e. sum of tracking reward and action reward, following `DEFAULT_REWARD_WEIGHTS`.
+
+    Args:
+        state: State, shape=(4,).
+        action: Action, shape=(2,).
+        step_index: Step index.
+        episode: Episode.
+        parameters: Row of parameter table of the dynamics model.
+
+    Returns:
+        jnp.ndarray: Scalar reward.
+    """
+    waypoint = episode['reference_line'][step_index]
+    tracking_reward = -jnp.linalg.norm(state[:2] - waypoint)
+    lb, ub = parameters['action_space_lbs'], parameters['action_space_ubs']
+    scaled_action = 2 * (action - lb) / (ub - lb) - 1
+    action_reward = -(scaled_action**2).sum()
+
+    return tracking_reward + action_reward
+
+
+def roll_out_episode(
+    policy: Callable[[Any, jnp.ndarray, jnp.ndarray], jnp.ndarray],
+    policy_params: Any,
+    episode: Dict[str, jnp.ndarray],
+    parameter_table: Dict[str, jnp.ndarray],
+    step_interval: float,
+    n_observation_steps: int,
+    n_steps: int,
+) -> Dict[str, jnp.ndarray]:
+    """Roll out an episode with `lax.scan`.
+
+    The scan runs for a static number of steps. Steps beyond tracking length are computed but masked out.
+
+    Args:
+        policy: Policy function `policy(policy_params, observation, step_index) -> action`.
+            E.g. `lambda actions, observation, step_index: actions[step_index]` for open-loop actions.
+        policy_params: Parameters of the policy, a pytree.
+        episode: Episode.
+        parameter_table: Parameter table of dynamics models.
+        step_interval: Time interval of a step.
+        n_observation_steps: Number of observation steps on the forward part of the reference line.
+        n_steps: Number of scanned steps, which should be at least the tracking length, e.g. `tracking_length_ub`.
+
+    Returns:
+        Dict[str, jnp.ndarray]: Rollout:
+
+        * states: States before each step, shape=(n_steps, 4).
+        * actions: Actions, shape=(n_steps, 2).
+        * rewards: Rewards, shape=(n_steps,).
+        * observations: Observations before each step and after the last step, shape=(n_steps + 1, observation_dim).
+        * masks: Masks of steps within tracking length, shape=(n_steps,).
+    """
+    parameters = jax.tree_util.tree_map(lambda array: array[episode['dynamics_model_index']], parameter_table)
+    observe = partial(
+        compute_observation, episode=episode, parameters=parameters, n_observation_steps=n_observation_steps
+    )
+
+    def step(state, step_index):
+        observation = observe(state, step_index)
+        action = policy(policy_params, observation, step_index).astype(DTYPE)
+        reward = compute_reward(state, action, step_index, episode, parameters)
+        next_state = compute_next_state(state, action, parameters, step_interval)
+
+        return next_state, (state, action, reward, observation)
+
+    step_indices = jnp.arange(n_steps)
+    last_state, (states, actions, rewards, observations) = lax.scan(step, episode['init_state'], step_indices)
+    observations = jnp.concatenate((observations, observe(last_state, n_steps)[jnp.newaxis]), axis=0)
+
+    return dict(
+        states=states,
+        actions=actions,
+        rewards=rewards,
+        observations=observations,
+        masks=step_indices < episode['tracking_length'],
+    )
+
+
+def build_batch_roll_out_function(
+    policy: Callable[[Any, jnp.ndarray, jnp.ndarray], jnp.ndarray],
+    step_interval: float,
+    n_observation_steps: int,
+    n_steps: int,
+    batch_policy_params: bool = False,
+) -> Callable[[Any, Dict[str, jnp.ndarray], Dict[str, jnp.ndarray]], Dict[str, jnp.ndarray]]:
+    """Build a jitted function rolling out a batch of episodes, vectorized with `jax.vmap`.
+
+    Args:
+        policy: Policy function, see `roll_out_episode`.
+        step_interval: Time interval of a step.
+        n_observation_steps: Number of observation steps on the forward part of the reference line.
+        n_steps: Number of scanned steps, see `roll_out_episode`.
+        batch_policy_params: Whether policy parameters have a batch dimension, e.g. open-loop actions.
+            Otherwise they are shared by all episodes, e.g. weights of a network.
+
+    Returns:
+        Callable: `batch_roll_out(policy_params, episodes, parameter_table) -> rollouts`,
+            where rollouts have a leading batch dimension.
+    """
+    roll_out = partial(
+        roll_out_episode,
+        policy,
+        step_interval=step_interval,
+        n_observation_steps=n_observation_steps,
+        n_steps=n_steps,
+    )
+
+    return jax.jit(jax.vmap(roll_out, in_axes=(0 if batch_policy_params else None, 0, None)))
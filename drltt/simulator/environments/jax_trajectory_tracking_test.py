@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.environments.jax_trajectory_tracking import (
+    build_jax_parameter_table,
+    build_jax_episodes,
+    build_batch_roll_out_function,
+)
+
+
+def test_jax_trajectory_tracking_parity():
+    np.random.seed(0)
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(ENVIRONMENTS, config['environment'])
+    env.seed(0)
+    hyper_parameter = env.env_info.trajectory_tracking.hyper_parameter
+    n_steps = hyper_parameter.tracking_length_ub
+
+    # roll out episodes with open-loop actions in the environment
+    n_episodes = 4
+    reference_lines, init_states, dynamics_model_indices = list(), list(), list()
+    all_actions, all_rewards, all_observations = list(), list(), list()
+    for _ in range(n_episodes):
+        observations = [env.reset()]
+        tracking_length = env.episode_recorder.tracking_length
+        reference_lines.append(env.reference_line_manager.raw_waypoints[:tracking_length].copy())
+        init_states.append(env.get_state())
+        dynamics_model_indices.append(env.dynamics_model_manager.sampled_dynamics_model_index)
+        action_space = env.get_current_dynamics_model().get_action_space()
+        actions = np.zeros((n_steps, 2), dtype=np.float32)
+        rewards = list()
+        for step_idx in range(tracking_length):
+            actions[step_idx] = np.random.uniform(action_space.low, action_space.high)
+            observation, reward, done, _ = env.step(actions[step_idx])
+            observations.append(observation)
+            rewards.append(reward)
+        assert done
+        all_actions.append(actions)
+        all_rewards.append(np.array(rewards))
+        all_observations.append(np.stack(observations, axis=0))
+
+    # replay with the functional simulator
+    episodes = build_jax_episodes(
+        reference_lines,
+        np.stack(init_states, axis=0),
+        np.array(dynamics_model_indices),
+        reference_line_length=n_steps + hyper_parameter.n_observation_steps,
+    )
+    batch_roll_out = build_batch_roll_out_function(
+        lambda actions, observation, step_index: actions[step_index],
+        step_interval=hyper_parameter.step_interval,
+        n_observation_steps=hyper_parameter.n_observation_steps,
+        n_steps=n_steps,
+        batch_policy_params=True,
+    )
+    rollouts = batch_roll_out(
+        np.stack(all_actions, axis=0),
+        episodes,
+        build_jax_parameter_table(
+            env.dynamics_model_manager.get_parameter_table(), env.reward_manager.get_reward_weights()
+        ),
+    )
+    assert rollouts['observations'].shape == (n_episodes, n_steps + 1) + env.observation_space.shape
+    for episode_idx in range(n_episodes):
+        tracking_length = len(reference_lines[episode_idx])
+        assert np.array_equal(np.asarray(rollouts['masks'][episode_idx]), np.arange(n_steps) < tracking_length)
+        assert np.allclose(rollouts['rewards'][episode_idx, :tracking_length], all_rewards[episode_idx], atol=1e-3)
+        assert np.allclose(
+            rollouts['observations'][episode_idx, : tracking_length + 1],
+            all_observations[episode_idx],
+            rtol=1e-3,
+            atol=1e-3,
+        )
+
+    # configured reward weights are not silently ignored
+    with pytest.raises(NotImplementedError):
+        build_jax_parameter_table(env.dynamics_model_manager.get_parameter_table(), dict(tracking=1.0, heading=0.5))
+
+
+if __name__ == '__main__':
+    test_jax_trajectory_tracking_parity()
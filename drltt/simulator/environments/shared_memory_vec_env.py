@@ -0,0 +1,364 @@
+from typing import List, Dict, Union, Any, Iterable, Sequence, Tuple
+from copy import deepcopy
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import Connection
+
+import numpy as np
+from gym.spaces import Space
+from stable_baselines3.common.vec_env import VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import VecEnvIndices, VecEnvObs, VecEnvStepReturn
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.future import override
+from drltt.common.gym_helper import convert_box_space_to_gymnasium
+from . import ENVIRONMENTS
+from drltt.simulator.environments.env_interface import CustomizedEnvInterface, ExtendedGymEnv
+from drltt.simulator import DTYPE
+
+
+def _build_shared_array(
+    ctx: mp.context.BaseContext,
+    shape: Tuple[int, ...],
+    dtype: np.dtype,
+) -> Tuple[Any, np.ndarray]:
+    """Allocate a lock-free shared-memory array and its NumPy view.
+
+    Args:
+        ctx: Multiprocessing context.
+        shape: Shape of the array.
+        dtype: Data type of the array.
+
+    Returns:
+        Tuple[Any, np.ndarray]: Raw shared-memory buffer and its NumPy view.
+    """
+    dtype = np.dtype(dtype)
+    raw_array = ctx.RawArray('b', int(np.prod(shape)) * dtype.itemsize)
+
+    return raw_array, np.frombuffer(raw_array, dtype=dtype).reshape(shape)
+
+
+def _execute_command(
+    environment: ExtendedGymEnv,
+    command: str,
+    data: Any,
+    worker_index: int,
+    buffers: Dict[str, np.ndarray],
+) -> Any:
+    """Execute a command on the hosted environment.
+
+    Args:
+        environment: Hosted environment.
+        command: Command name.
+        data: Data attached to the command.
+        worker_index: Index of the worker.
+        buffers: Shared-memory buffers.
+
+    Returns:
+        Any: Reply to the command.
+    """
+    if command == 'step':
+        observation, reward, done, _ = environment.step(buffers['actions'][worker_index].copy())
+        buffers['rewards'][worker_index] = reward
+        buffers['dones'][worker_index] = done
+        if done:
+            buffers['terminal_observations'][worker_index] = observation
+            observation = environment.reset()
+        buffers['observations'][worker_index] = observation
+    elif command == 'reset':
+        buffers['observations'][worker_index] = environment.reset()
+    elif command == 'get_state':
+        buffers['states'][worker_index] = environment.get_state()
+    elif command == 'get_attr':
+        return getattr(environment, data)
+    elif command == 'set_attr':
+        setattr(environment, *data)
+    elif command == 'env_method':
+        method_name, method_args, method_kwargs = data
+        return getattr(environment, method_name)(*method_args, **method_kwargs)
+    else:
+        raise NotImplementedError(f'Unknown command: {command}')
+
+    return None
+
+
+def _worker(
+    worker_index: int,
+    env_config: Dict[str, Any],
+    seed: Union[int, None],
+    pipe: Connection,
+    raw_buffers: Dict[str, Any],
+    buffer_specs: Dict[str, Tuple[Tuple[int, ...], np.dtype]],
+):
+    """Main loop of a worker process, which hosts one environment.
+
+    Observations, actions, rewards, and done flags are exchanged through shared-memory buffers,
+    while the pipe only carries commands and replies.
+    Each reply is a tuple of (succeeded, result), where the result of a failed command is the formatted traceback,
+        re-raised in the main process. A worker whose environment fails to be built fails all commands but 'close'.
+
+    Args:
+        worker_index: Index of the worker.
+        env_config: Config of the hosted environment.
+        seed: Base random seed. The worker is seeded with `seed + worker_index`.
+        pipe: Pipe for receiving commands.
+        raw_buffers: Raw shared-memory buffers.
+        buffer_specs: Shapes and data types of the shared-memory buffers.
+    """
+    buffers = {
+        name: np.frombuffer(raw_buffers[name], dtype=dtype).reshape(shape)
+        for name, (shape, dtype) in buffer_specs.items()
+    }
+    environment: Union[ExtendedGymEnv, None] = None
+    build_error: Union[str, None] = None
+    try:
+        environment = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+        if seed is not None:
+            environment.seed(seed + worker_index)
+    except Exception:
+        build_error = traceback.format_exc()
+
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == 'close':
+                if environment is not None:
+                    environment.close()
+                pipe.send((True, None))
+                break
+            if build_error is not None:
+                pipe.send((False, build_error))
+                continue
+            try:
+                result = _execute_command(environment, command, data, worker_index, buffers)
+            except Exception:
+                pipe.send((False, traceback.format_exc()))
+                continue
+            pipe.send((True, result))
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        pipe.close()
+
+
+class SharedMemoryVecEnv(VecEnv, CustomizedEnvInterface):
+    """Vectorized environment running each environment in a subprocess, exposing the interface of `VecEnv`.
+
+    Environments are built within `ENVIRONMENTS` from config in worker processes.
+    Observations, actions, rewards, and done flags are exchanged through shared-memory arrays instead of pickled pipes.
+    Finished episodes are reset automatically, with their last observations stored in `info['terminal_observation']`.
+
+    Attributes:
+        env_info: Serialized data structure that contains hyper-parameter. Episode data stay within workers.
+        n_workers: Number of worker processes.
+        seed_value: Base random seed, worker `i` is seeded with `seed_value + i`.
+    """
+
+    render_mode = None
+
+    def __init__(
+        self,
+        env_config: Dict[str, Any],
+        n_workers: int,
+        seed: Union[int, None] = 0,
+        start_method: Union[str, None] = None,
+    ):
+        """
+        Args:
+            env_config: Config of the environment hosted in each worker, e.g. the `environment` section of config.
+            n_workers: Number of worker processes.
+            seed: Base random seed. Worker `i` is seeded with `seed + i`. `None` denotes no seeding.
+            start_method: Start method of `multiprocessing`. Default to 'forkserver' if available, otherwise 'spawn'.
+        """
+        if n_workers < 1:
+            raise ValueError(f'Illegal `n_workers`: {n_workers}')
+        self.n_workers = n_workers
+        self.seed_value = seed
+        self.closed = True
+
+        # environment in main process for providing spaces and hyper-parameter
+        self.environment: ExtendedGymEnv = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+        if isinstance(self.environment, VecEnv):
+            raise TypeError(f'Unsupported environment for subprocess: {type(self.environment)}')
+        self.env_info = self.environment.export_environment_data()
+        self.gym_observation_space: Space = self.environment.observation_space
+        self.gym_action_space: Space = self.environment.action_space
+
+        # allocate shared-memory buffers
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+        ctx = mp.get_context(start_method)
+        buffer_specs = dict(
+            observations=((n_workers,) + self.gym_observation_space.shape, DTYPE),
+            terminal_observations=((n_workers,) + self.gym_observation_space.shape, DTYPE),
+            actions=((n_workers,) + self.gym_action_space.shape, DTYPE),
+            rewards=((n_workers,), np.float32),
+            dones=((n_workers,), np.bool_),
+            states=((n_workers,) + self.environment.state_space.shape, DTYPE),
+        )
+        raw_buffers = dict()
+        for name, (shape, dtype) in buffer_specs.items():
+            raw_buffers[name], buffer = _build_shared_array(ctx, shape, dtype)
+            setattr(self, f'_{name}', buffer)
+
+        # launch workers
+        self.pipes: List[Connection] = list()
+        self.processes: List[mp.Process] = list()
+        for worker_index in range(n_workers):
+            pipe, worker_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(worker_index, deepcopy(env_config), seed, worker_pipe, raw_buffers, buffer_specs),
+                daemon=True,
+            )
+            process.start()
+            worker_pipe.close()
+            self.pipes.append(pipe)
+            self.processes.append(process)
+        self.closed = False
+
+        super().__init__(
+            num_envs=n_workers,
+            observation_space=convert_box_space_to_gymnasium(self.gym_observation_space),
+            action_space=convert_box_space_to_gymnasium(self.gym_action_space),
+        )
+
+    def _get_indices(self, indices: VecEnvIndices) -> Iterable[int]:
+        if indices is None:
+            indices = range(self.num_envs)
+        elif isinstance(indices, int):
+            indices = [indices]
+
+        return indices
+
+    def _request(self, command: str, data: Any = None, indices: VecEnvIndices = None) -> List[Any]:
+        """Send a command to workers and wait for their replies.
+
+        Args:
+            command: Command name.
+            data: Data attached to the command, which is pickled.
+            indices: Indices of workers.
+
+        Returns:
+            List[Any]: Replies of workers.
+        """
+        indices = list(self._get_indices(indices))
+        for worker_index in indices:
+            self.pipes[worker_index].send((command, data))
+
+        return self._receive(indices)
+
+    def _receive(self, indices: Iterable[int]) -> List[Any]:
+        """Receive replies of workers, re-raising errors of workers after all replies are received.
+
+        Args:
+            indices: Indices of workers.
+
+        Returns:
+            List[Any]: Replies of workers.
+
+        Raises:
+            RuntimeError: If a command fails in a worker, with the traceback of the worker,
+                or if a worker exits unexpectedly.
+        """
+        results, errors = list(), list()
+        for worker_index in indices:
+            try:
+                succeeded, result = self.pipes[worker_index].recv()
+            except EOFError:
+                self.processes[worker_index].join(timeout=1.0)
+                succeeded = False
+                result = f'Worker exited unexpectedly with exit code {self.processes[worker_index].exitcode}'
+            if succeeded:
+                results.append(result)
+            else:
+                errors.append(f'Error in worker {worker_index}:\n{result}')
+        if len(errors) > 0:
+            raise RuntimeError('\n'.join(errors))
+
+        return results
+
+    @override
+    def reset(self) -> VecEnvObs:
+        self._request('reset')
+
+        return self._observations.copy()
+
+    @override
+    def step_async(self, actions: np.ndarray):
+        self._actions[...] = np.asarray(actions).reshape(self._actions.shape)
+        for pipe in self.pipes:
+            pipe.send(('step', None))
+
+    @override
+    def step_wait(self) -> VecEnvStepReturn:
+        self._receive(range(self.num_envs))
+
+        dones = self._dones.copy()
+        infos = [dict() for _ in range(self.num_envs)]
+        for env_idx in np.flatnonzero(dones):
+            infos[env_idx]['terminal_observation'] = self._terminal_observations[env_idx].copy()
+            infos[env_idx]['TimeLimit.truncated'] = False
+
+        return self._observations.copy(), self._rewards.copy(), dones, infos
+
+    @override
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._request('close')
+        finally:
+            for process in self.processes:
+                process.join()
+            self.closed = True
+
+    @override
+    def get_state(self) -> np.ndarray:
+        self._request('get_state')
+
+        return self._states.copy()
+
+    @override
+    def seed(self, seed: Union[int, None] = None) -> Sequence[Union[None, int]]:
+        """Seed all workers. Worker `i` is seeded with `seed + i`.
+
+        Args:
+            seed: Base random seed.
+
+        Returns:
+            Sequence[Union[None, int]]: Seed of each worker.
+        """
+        if seed is None:
+            return [None] * self.num_envs
+        self.seed_value = seed
+        worker_seeds = [seed + worker_index for worker_index in range(self.num_envs)]
+        for pipe, worker_seed in zip(self.pipes, worker_seeds):
+            pipe.send(('env_method', ('seed', (worker_seed,), dict())))
+        self._receive(range(self.num_envs))
+
+        return worker_seeds
+
+    @override
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        return self._request('get_attr', attr_name, indices=indices)
+
+    @override
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None):
+        self._request('set_attr', (attr_name, value), indices=indices)
+
+    @override
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
+        return self._request('env_method', (method_name, method_args, method_kwargs), indices=indices)
+
+    @override
+    def env_is_wrapped(self, wrapper_class: type, indices: VecEnvIndices = None) -> List[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+    def get_dynamics_model_info(self) -> str:
+        """Get the infromation about configuration of dynamics models.
+
+        Returns:
+            str: Pretty string of information for dynamics models.
+        """
+        return self.environment.get_dynamics_model_info()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import SharedMemoryVecEnv
+
+
+def test_shared_memory_vec_env():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = config['environment']
+    n_workers = 2
+    n_steps = 20
+    all_rollouts = list()
+    for _ in range(2):
+        vec_env = SharedMemoryVecEnv(env_config, n_workers=n_workers, seed=0)
+        action_space = vec_env.gym_action_space
+        action_space.seed(0)
+        observations = vec_env.reset()
+        assert observations.shape == (n_workers,) + vec_env.observation_space.shape
+
+        rollout = [observations]
+        for _ in range(n_steps):
+            actions = np.stack([action_space.sample() for _ in range(n_workers)], axis=0)
+            observations, rewards, dones, infos = vec_env.step(actions)
+            assert observations.shape == (n_workers,) + vec_env.observation_space.shape
+            assert rewards.shape == dones.shape == (n_workers,)
+            for done, info in zip(dones, infos):
+                assert done == ('terminal_observation' in info)
+            rollout.extend((observations, rewards, vec_env.get_state()))
+        vec_env.close()
+        all_rollouts.append(rollout)
+
+    # deterministic across runs, while different across workers
+    for data, replayed_data in zip(*all_rollouts):
+        assert np.array_equal(data, replayed_data)
+    assert not np.allclose(all_rollouts[0][0][0], all_rollouts[0][0][1])
+
+
+def test_shared_memory_vec_env_worker_error():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    n_workers = 2
+    vec_env = SharedMemoryVecEnv(config['environment'], n_workers=n_workers, seed=0)
+    vec_env.reset()
+
+    # errors of workers are re-raised with their tracebacks, and workers keep serving
+    with pytest.raises(RuntimeError, match='AttributeError'):
+        vec_env.env_method('unknown_method', indices=1)
+    vec_env.set_attr('reference_line_manager', None, indices=0)
+    with pytest.raises(RuntimeError, match='Error in worker 0'):
+        vec_env.step(np.zeros((n_workers,) + vec_env.action_space.shape, dtype=np.float32))
+    assert vec_env.get_attr('reference_line_manager', indices=1)[0] is not None
+    vec_env.close()
+
+
+if __name__ == '__main__':
+    test_shared_memory_vec_env()
+    test_shared_memory_vec_env_worker_error()
@@ -9,20 +9,25 @@ import gym
 from gym.spaces import Space
 
 from drltt.common.future import override
-from drltt.common.gym_helper import scale_action
 from drltt.common import GLOBAL_DEBUG_INFO
 from . import ENVIRONMENTS
 from drltt.simulator.environments.env_interface import CustomizedEnvInterface
+from drltt.simulator.environments.episode_recorder import EpisodeRecorder, EpisodeArchive
 from drltt.simulator import DTYPE
 from drltt.simulator.dynamics_models import (
     BaseDynamicsModel,
+    BicycleModel,
     DynamicsModelManager,
 )
-from drltt.simulator.trajectory.random_walk import random_walk
+from drltt.simulator.trajectory.random_walk import random_walk, batch_random_walk
 from drltt.simulator.trajectory.reference_line import ReferenceLineManager
+from drltt.simulator.trajectory.reference_line_pool import ReferenceLinePool
+from drltt.simulator.trajectory.reference_line_prefetcher import ReferenceLinePrefetcher
 from drltt.simulator.observation.observation_manager import ObservationManager
+from drltt.simulator.reward import RewardManager
 from drltt_proto.environment.environment_pb2 import Environment
 from drltt_proto.environment.trajectory_tracking_pb2 import (
+    TrajectoryTrackingEpisode,
     TrajectoryTrackingHyperParameter,
 )
 from drltt_proto.trajectory.trajectory_pb2 import ReferenceLine
@@ -38,6 +43,8 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
         state_space: State space.
         init_state_space: Initial state space.
         env_info: Serialized data structure that contains hyper-parameter and episode data.
+        episode_recorder: Recorder of the current episode.
+        archived_episodes: Recorded previous episodes.
     """
 
     state_space: Space = None
@@ -49,17 +56,32 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
         self,
         env_info: Union[Environment, None] = None,
         dynamics_model_configs: Union[Iterable[Dict[str, Any]], None] = None,
+        recording_level: str = 'full',
+        max_archived_episodes_nbytes: Union[int, None] = None,
+        reference_line_pool_dir: Union[str, None] = None,
+        n_prefetched_episodes: int = 0,
         **kwargs,
     ):
         """
         Args:
             dynamics_model_configs: Configurations of all dynamics models.
+            recording_level: Recording level of episode data, see `RECORDING_LEVELS`.
+                'none' for training where episode data are not consumed.
+            max_archived_episodes_nbytes: Memory budget in bytes for archived episodes. `None` denotes no limit.
+                The number of archived episodes is bounded by hyper-parameter `max_n_episodes` as well.
+            reference_line_pool_dir: Directory of pre-generated reference line pool, see `ReferenceLinePool`.
+                If provided, episodes are sampled from the pool instead of being generated by random walk.
+            n_prefetched_episodes: Number of episodes generated ahead on a background thread, see
+                `ReferenceLinePrefetcher`. 0 denotes no prefetching.
         """
         self.env_info = Environment()
 
         if env_info is not None:
             # TODO: add test for this branch
             self.env_info.CopyFrom(env_info)
+            # episode data are recorded by `episode_recorder` and assembled upon export
+            self.env_info.trajectory_tracking.ClearField('episode')
+            self.env_info.trajectory_tracking.ClearField('episodes')
         else:
             # parse hyper-parameters
             self.env_info = Environment()
@@ -81,11 +103,48 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
         self.observation_manager = ObservationManager(
             self.reference_line_manager,
             self.dynamics_model_manager,
+            reference_line_observation_mode=(
+                self.env_info.trajectory_tracking.hyper_parameter.reference_line_observation_mode or 'index'
+            ),
         )
+        self.reward_manager = RewardManager({
+            reward_term.name: reward_term.weight
+            for reward_term in self.env_info.trajectory_tracking.hyper_parameter.reward_terms
+        })
 
         # build spaces
         self._build_spaces()
 
+        # build episode recorder
+        self.episode_recorder = EpisodeRecorder(
+            state_dim=self.state_space.shape[0],
+            action_dim=self.action_space.shape[0],
+            observation_dim=self.observation_space.shape[0],
+            capacity=self.env_info.trajectory_tracking.hyper_parameter.tracking_length_ub,
+            recording_level=recording_level,
+        )
+        self.archived_episodes = EpisodeArchive(
+            max_n_episodes=self.env_info.trajectory_tracking.hyper_parameter.max_n_episodes,
+            max_nbytes=max_archived_episodes_nbytes,
+        )
+
+        # load reference line pool
+        self.reference_line_pool: Union[ReferenceLinePool, None] = None
+        if reference_line_pool_dir is not None:
+            self.reference_line_pool = ReferenceLinePool(reference_line_pool_dir)
+            self.reference_line_pool.check_hyper_parameter(self.env_info.trajectory_tracking.hyper_parameter)
+
+        # launch prefetcher
+        self.reference_line_prefetcher: Union[ReferenceLinePrefetcher, None] = None
+        if n_prefetched_episodes > 0:
+            if self.reference_line_pool is not None:
+                raise ValueError('Prefetching is not supported with reference line pool')
+            self.reference_line_prefetcher = ReferenceLinePrefetcher(
+                self.env_info.trajectory_tracking.hyper_parameter,
+                self.dynamics_model_manager,
+                n_prefetched_episodes=n_prefetched_episodes,
+            )
+
     @classmethod
     def parse_hyper_parameter(
         cls,
@@ -98,6 +157,8 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
         init_state_ub: List[Union[float, None]],
         n_observation_steps: int,
         max_n_episodes: int = 1000,
+        reward_weights: Union[Dict[str, float], None] = None,
+        reference_line_observation_mode: str = 'index',
     ):
         """Parse hyper-parameter.
 
@@ -110,6 +171,11 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
             init_state_lb: lower Bound of state space.
             init_state_ub: upper Bound of state space.
             n_observation_steps: Number of the steps within the observation.
+            reward_weights: Weights indexed by names of reward terms, see `REWARD_TERMS`.
+                Default to `DEFAULT_REWARD_WEIGHTS`.
+            reference_line_observation_mode: Mode of selecting the first observed waypoint on the reference line,
+                see `REFERENCE_LINE_OBSERVATION_MODES`. 'index' observes from the waypoint of the current step,
+                while 'projection' observes from the waypoint nearest to the projection of the current state.
         """
         hyper_parameter.step_interval = step_interval
         hyper_parameter.tracking_length_lb = tracking_length_lb
@@ -119,6 +185,9 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
         hyper_parameter.init_state_ub.extend(init_state_ub)
         hyper_parameter.n_observation_steps = n_observation_steps
         hyper_parameter.max_n_episodes = max_n_episodes
+        for term_name, weight in RewardManager(reward_weights).get_reward_weights().items():
+            hyper_parameter.reward_terms.add(name=term_name, weight=weight)
+        hyper_parameter.reference_line_observation_mode = reference_line_observation_mode
 
     @classmethod
     def parse_dynamics_model_hyper_parameter(
@@ -148,7 +217,7 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
 
         - Clear and replace episode data.
         - Randomly sample a dynamics model.
-        - Setup reference line and initial state.
+        - Setup reference line and initial state, sampled from reference line pool if provided.
 
         Args:
             init_state: Specified initial state of dynamics model. Default to `None` which denotes random sampling from pre-defined initial state space.
@@ -159,21 +228,26 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
         extra_info = dict()
 
         # store previous episode
-        if self.env_info.trajectory_tracking.episode.step_index > 0:
-            self.env_info.trajectory_tracking.episodes.append(self.env_info.trajectory_tracking.episode)
-        while (
-            len(self.env_info.trajectory_tracking.episodes)
-            > self.env_info.trajectory_tracking.hyper_parameter.max_n_episodes
-        ):
-            self.env_info.trajectory_tracking.episodes.pop(0)
-
-        # clear data
-        self.env_info.trajectory_tracking.episode.Clear()
-        # reset data
-        self.env_info.trajectory_tracking.episode.step_index = 0
-        self.env_info.trajectory_tracking.episode.hyper_parameter.CopyFrom(
-            self.env_info.trajectory_tracking.hyper_parameter
-        )
+        if self.episode_recorder.step_index > 0 and self.episode_recorder.recording_level != 'none':
+            self.archived_episodes.append(self.episode_recorder.snapshot())
+
+        # reference line is handled in array, proto is built only for export
+        reference_waypoints: Union[np.ndarray, None] = None
+        if reference_line is not None:
+            reference_waypoints = ReferenceLineManager.reference_line_to_np_array(reference_line, dtype=DTYPE)
+        elif self.reference_line_pool is not None:
+            reference_waypoints, pool_init_state, pool_dynamics_model_index = self.reference_line_pool[
+                np.random.randint(len(self.reference_line_pool))
+            ]
+            if init_state is None:
+                init_state = np.array(pool_init_state)
+            if len(dynamics_model_name) == 0:
+                dynamics_model_name = self.dynamics_model_manager.dynamics_models[pool_dynamics_model_index].get_name()
+        elif init_state is None and len(dynamics_model_name) == 0 and self.reference_line_prefetcher is not None:
+            prefetched_dynamics_model_index, init_state, reference_waypoints = self.reference_line_prefetcher.pop()
+            dynamics_model_name = self.dynamics_model_manager.dynamics_models[
+                prefetched_dynamics_model_index
+            ].get_name()
 
         if len(dynamics_model_name) > 0:
             sampled_dynamics_model_index, sampled_dynamics_model = (
@@ -182,13 +256,7 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
         else:
             sampled_dynamics_model_index, sampled_dynamics_model = self.dynamics_model_manager.sample_dynamics_model()
 
-        self.env_info.trajectory_tracking.episode.dynamics_model.type = type(sampled_dynamics_model).__name__
-        self.env_info.trajectory_tracking.episode.dynamics_model.hyper_parameter.CopyFrom(
-            sampled_dynamics_model.hyper_parameter
-        )
-        self.env_info.trajectory_tracking.episode.selected_dynamics_model_index = sampled_dynamics_model_index
-
-        if reference_line is None:
+        if reference_waypoints is None:
             tracking_length = random.randint(
                 self.env_info.trajectory_tracking.hyper_parameter.tracking_length_lb,
                 self.env_info.trajectory_tracking.hyper_parameter.tracking_length_ub,
@@ -196,35 +264,56 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
             if init_state is None:
                 init_state = self.init_state_space.sample()
             sampled_dynamics_model.set_state(init_state)
-            reference_dynamics_model = deepcopy(sampled_dynamics_model)
-            reference_line, trajectory = random_walk(
-                dynamics_model=reference_dynamics_model,
-                step_interval=self.env_info.trajectory_tracking.hyper_parameter.step_interval,
-                walk_length=tracking_length,
-            )
+            if isinstance(sampled_dynamics_model, BicycleModel):
+                # vectorized random walk without building protos
+                action_space = sampled_dynamics_model.get_action_space()
+                states, _, _ = batch_random_walk(
+                    sampled_dynamics_model.get_state()[np.newaxis],
+                    np.array((tracking_length,)),
+                    step_interval=self.env_info.trajectory_tracking.hyper_parameter.step_interval,
+                    rearwheel_to_cog=sampled_dynamics_model.hyper_parameter.bicycle_model.rearwheel_to_cog,
+                    cog_relative_position_between_axles=sampled_dynamics_model.cog_relative_position_between_axles,
+                    max_lat_acc=sampled_dynamics_model.hyper_parameter.bicycle_model.max_lat_acc,
+                    action_space_lb=action_space.low,
+                    action_space_ub=action_space.high,
+                    integrator=sampled_dynamics_model.integrator,
+                    n_substeps=sampled_dynamics_model.n_substeps,
+                )
+                reference_waypoints = states[0, :, :2]
+            else:
+                reference_dynamics_model = deepcopy(sampled_dynamics_model)
+                reference_line, trajectory = random_walk(
+                    dynamics_model=reference_dynamics_model,
+                    step_interval=self.env_info.trajectory_tracking.hyper_parameter.step_interval,
+                    walk_length=tracking_length,
+                )
+                reference_waypoints = ReferenceLineManager.reference_line_to_np_array(reference_line, dtype=DTYPE)
         else:
-            tracking_length = len(reference_line.waypoints)
+            tracking_length = len(reference_waypoints)
             if init_state is None:
                 init_state = ReferenceLineManager.estimate_init_state_from_reference_line(
-                    reference_line,
+                    reference_waypoints,
                     delta_t=self.env_info.trajectory_tracking.hyper_parameter.step_interval,
                 )
             sampled_dynamics_model.set_state(init_state)
             # TODO: optional estimate from init state
-        self.reference_line_manager.set_reference_line(reference_line, tracking_length=tracking_length)
-        self.env_info.trajectory_tracking.episode.tracking_length = tracking_length
-        self.env_info.trajectory_tracking.episode.reference_line.CopyFrom(
-            self.reference_line_manager.raw_reference_line
+        self.reference_line_manager.set_reference_line(reference_waypoints, tracking_length=tracking_length)
+        self.episode_recorder.reset(
+            tracking_length=tracking_length,
+            dynamics_model_index=sampled_dynamics_model_index,
+            reference_line=self.reference_line_manager.raw_waypoints,
         )
 
-        # TODO: use closest waypoint assignment for observation
+        self.observation_manager.reset()
+
+        # observed from the waypoint of the first step or the projected one, see `reference_line_observation_mode`
         observation = self.observation_manager.get_observation(
-            episode_data=self.env_info.trajectory_tracking.episode,
+            episode_data=self.episode_recorder,
             body_state=sampled_dynamics_model.get_body_state_proto(),
         )
-        self.env_info.trajectory_tracking.episode.dynamics_model.observations.append(
-            deepcopy(sampled_dynamics_model.serialize_observation(observation))
-        )
+        self.episode_recorder.record_observation(observation)
+        # the observation manager reuses its buffer
+        observation = observation.copy()
 
         # TODO: verify interface: gym==0.21 or gym==0.26
         # reference: https://gymnasium.farama.org/content/migration-guide/
@@ -254,6 +343,22 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
                 dtype=DTYPE,
             )
 
+    def set_recording_level(self, recording_level: str):
+        """Set recording level of episode data, which takes effect from the next episode.
+
+        Args:
+            recording_level: Recording level, see `RECORDING_LEVELS`.
+        """
+        self.episode_recorder.set_recording_level(recording_level)
+
+    def get_recording_level(self) -> str:
+        """Get recording level of episode data.
+
+        Returns:
+            str: Recording level of the next episode.
+        """
+        return self.episode_recorder.next_recording_level
+
     def get_current_dynamics_model(self) -> BaseDynamicsModel:
         return self.dynamics_model_manager.get_sampled_dynamics_model()
 
@@ -267,32 +372,23 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
 
         current_dynamics_model = self.get_current_dynamics_model()
 
-        # TODO configurable reward weighting
-        all_rewards = dict()
-        # tracking
         state_vec: np.ndarray = current_dynamics_model.get_state()
-        waypoint_vec = self.reference_line_manager.get_reference_line_waypoint(
-            self.env_info.trajectory_tracking.episode.step_index
-        )
-        dist = np.linalg.norm(state_vec[:2] - waypoint_vec)
-        all_rewards['tracking'] = -dist
-        # TODO: add heading error
-        # action
-        scaled_action = scale_action(action, current_dynamics_model.get_action_space())
-
-        all_rewards['action'] = -(scaled_action**2).sum()
-        # sum up
-        scalar_reward = sum(all_rewards.values())
-        extra_info['all_rewards'] = all_rewards
-
-        self.env_info.trajectory_tracking.episode.dynamics_model.states.append(
-            deepcopy(current_dynamics_model.get_state_proto())
+        step_index = self.episode_recorder.step_index
+        waypoints = self.reference_line_manager.waypoints
+        action_space = current_dynamics_model.get_action_space()
+        rewards, reward_terms = self.reward_manager.compute_rewards(
+            states=state_vec[np.newaxis],
+            actions=np.asarray(action)[np.newaxis],
+            waypoints=waypoints[step_index][np.newaxis],
+            next_waypoints=waypoints[min(step_index + 1, len(waypoints) - 1)][np.newaxis],
+            action_space_lbs=action_space.low[np.newaxis],
+            action_space_ubs=action_space.high[np.newaxis],
         )
-        self.env_info.trajectory_tracking.episode.dynamics_model.actions.append(
-            deepcopy(current_dynamics_model.serialize_action(action))
-        )
-        self.env_info.trajectory_tracking.episode.rewards.append(deepcopy(scalar_reward))
-        self.env_info.trajectory_tracking.episode.dynamics_model.debug_infos.append(deepcopy(GLOBAL_DEBUG_INFO))
+        scalar_reward = float(rewards[0])
+        # unweighted reward terms indexed by names
+        extra_info['all_rewards'] = dict(zip(self.reward_manager.term_names, reward_terms[0].tolist()))
+
+        self.episode_recorder.record_step(state_vec, action, scalar_reward, debug_info=GLOBAL_DEBUG_INFO)
         GLOBAL_DEBUG_INFO.Clear()
 
         # ABOVE: step t
@@ -300,22 +396,17 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
 
         # update state
         current_dynamics_model.step(action, delta_t=self.env_info.trajectory_tracking.hyper_parameter.step_interval)
-        self.env_info.trajectory_tracking.episode.step_index += 1
         observation = self.observation_manager.get_observation(
-            episode_data=self.env_info.trajectory_tracking.episode,
+            episode_data=self.episode_recorder,
             body_state=current_dynamics_model.get_body_state_proto(),
         )
 
-        terminated: bool = (
-            self.env_info.trajectory_tracking.episode.step_index
-            >= self.env_info.trajectory_tracking.episode.tracking_length
-        )
+        terminated: bool = self.episode_recorder.step_index >= self.episode_recorder.tracking_length
         truncated: bool = False
 
         if not terminated:
-            self.env_info.trajectory_tracking.episode.dynamics_model.observations.append(
-                deepcopy(current_dynamics_model.serialize_observation(observation))
-            )
+            self.episode_recorder.record_observation(observation)
+        observation = observation.copy()
         # TODO: verify interface: gym==0.21 or gym==0.26
         # reference: https://gymnasium.farama.org/content/migration-guide/
 
@@ -326,6 +417,70 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
     def get_state(self) -> np.ndarray:
         return self.dynamics_model_manager.get_sampled_dynamics_model().get_state()
 
+    def seed(self, seed: Union[int, None] = None) -> List[Union[int, None]]:
+        """Seed the underlying random number generators.
+
+        NOTE: `random` and `np.random` are process-wide, thus environments in the same process share them.
+
+        Args:
+            seed: Random seed.
+
+        Returns:
+            List[Union[int, None]]: List of the seed.
+        """
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+            self.init_state_space.seed(seed)
+            if self.reference_line_prefetcher is not None:
+                self.reference_line_prefetcher.seed(seed)
+
+        return [seed]
+
+    @override
+    def close(self):
+        if self.reference_line_prefetcher is not None:
+            self.reference_line_prefetcher.close()
+
+    @override
+    def export_environment_data(self, n_archived_episodes: Union[int, None] = None) -> Environment:
+        """Export environment data, assembling recorded episodes into proto.
+
+        Args:
+            n_archived_episodes: Number of the most recent archived episodes to be exported. `None` for all.
+
+        Return:
+            Environment: Environment data in proto structure.
+        """
+        env_data = super().export_environment_data()
+        hyper_parameter = self.env_info.trajectory_tracking.hyper_parameter
+        dynamics_models = self.dynamics_model_manager.dynamics_models
+        archived_episodes = list(self.archived_episodes)
+        if n_archived_episodes is not None:
+            archived_episodes = archived_episodes[max(len(archived_episodes) - n_archived_episodes, 0) :]
+        for archived_episode in archived_episodes:
+            archived_episode.export_episode(
+                env_data.trajectory_tracking.episodes.add(), hyper_parameter, dynamics_models
+            )
+        self.episode_recorder.export_episode(env_data.trajectory_tracking.episode, hyper_parameter, dynamics_models)
+
+        return env_data
+
+    def export_episode_data(self) -> TrajectoryTrackingEpisode:
+        """Export data of the current episode only, e.g. for streaming to `EpisodeLogWriter`.
+
+        Return:
+            TrajectoryTrackingEpisode: Episode data in proto structure.
+        """
+        episode = TrajectoryTrackingEpisode()
+        self.episode_recorder.export_episode(
+            episode,
+            self.env_info.trajectory_tracking.hyper_parameter,
+            self.dynamics_model_manager.dynamics_models,
+        )
+
+        return episode
+
     def get_dynamics_model_info(self) -> str:
         """Get the infromation about configuration of dynamics models.
 
@@ -340,10 +495,7 @@ class TrajectoryTrackingEnv(gym.Env, CustomizedEnvInterface):
         Returns:
             ReferenceLine: The current reference line.
         """
-        reference_line = ReferenceLine()
-        reference_line.CopyFrom(self.reference_line_manager.raw_reference_line)
-
-        return reference_line
+        return self.reference_line_manager.raw_reference_line
 
     # TODO: rendering
     # refernce: https://github.com/openai/gym/blob/dcd185843a62953e27c2d54dc8c2d647d604b635/gym/core.py#L153
@@ -1,36 +1,86 @@
+from typing import Dict, Tuple
+
 import numpy as np
 import gym
 from gym.spaces import Space
 
+from drltt.simulator import DTYPE
 from drltt.simulator.dynamics_models import DynamicsModelManager
-from drltt.simulator.trajectory.reference_line import ReferenceLineManager
+from drltt.simulator.trajectory.reference_line import ReferenceLineManager, REFERENCE_LINE_OBSERVATION_MODES
 
 from drltt_proto.dynamics_model.basics_pb2 import BodyState
 
+OBSERVATION_BLOCK_NAMES = ('reference_line', 'state', 'dynamics_model')
+
 
 class ObservationManager:
     """Manager for observation.
 
+    The flattened observation has a static layout of blocks (reference line, state, dynamics model), computed once
+        at construction. Observations are written in place into a preallocated buffer, where the dynamics model block,
+        constant within an episode, is only written upon `reset`.
+
     Attributes:
         reference_line_manager: handler of underlying reference line manager
         dynamics_model_manager: handler of underlying Dynamics model manager
+        reference_line_observation_mode: Mode of selecting the first observed waypoint,
+            see `REFERENCE_LINE_OBSERVATION_MODES`.
+        observation_layout: Slices of blocks within the flattened observation, indexed by block names.
+        observation_dim: Dimension of the flattened observation.
     """
 
     reference_line_manager: ReferenceLineManager
     dynamics_model_manager: DynamicsModelManager
+    reference_line_observation_mode: str
+    observation_layout: Dict[str, slice]
+    observation_dim: int
 
     def __init__(
         self,
         reference_line_manager: ReferenceLineManager,
         dynamics_model_manager: DynamicsModelManager,
+        reference_line_observation_mode: str = 'index',
     ):
         """
         Args:
             reference_line_manager: Underlying reference line manager
             dynamics_model_manager: underlying Dynamics model manager
+            reference_line_observation_mode: Mode of selecting the first observed waypoint,
+                see `REFERENCE_LINE_OBSERVATION_MODES`.
         """
+        if reference_line_observation_mode not in REFERENCE_LINE_OBSERVATION_MODES:
+            raise ValueError(
+                f'Unknown `reference_line_observation_mode`: {reference_line_observation_mode},'
+                f' supported: {REFERENCE_LINE_OBSERVATION_MODES}'
+            )
         self.reference_line_manager = reference_line_manager
         self.dynamics_model_manager = dynamics_model_manager
+        self.reference_line_observation_mode = reference_line_observation_mode
+
+        self.observation_layout = dict()
+        offset = 0
+        for block_name, block_space in zip(OBSERVATION_BLOCK_NAMES, self._get_observation_subspaces()):
+            block_dim = gym.spaces.flatdim(block_space)
+            self.observation_layout[block_name] = slice(offset, offset + block_dim)
+            offset += block_dim
+        self.observation_dim = offset
+
+        self._observation = np.zeros((self.observation_dim,), dtype=DTYPE)
+        self._observation_blocks: Dict[str, np.ndarray] = {
+            block_name: self._observation[block_slice] for block_name, block_slice in self.observation_layout.items()
+        }
+
+    def _get_observation_subspaces(self) -> Tuple[Space, ...]:
+        """Return sub-observation spaces, in the order of `OBSERVATION_BLOCK_NAMES`.
+
+        Returns:
+            Tuple[Space, ...]: Sub-observation spaces.
+        """
+        return (
+            self.reference_line_manager.get_observation_space(),
+            self.dynamics_model_manager.get_state_observation_space(),
+            self.dynamics_model_manager.get_dynamics_model_observation_space(),
+        )
 
     def get_observation_space(self) -> Space:
         """Return observation space, usually consisting of multiple sub-observation spaces.
@@ -38,46 +88,43 @@ class ObservationManager:
         Returns:
             Space: observation space.
         """
-        reference_line_observation_space = self.reference_line_manager.get_observation_space()
-        state_observation_space = self.dynamics_model_manager.get_state_observation_space()
-        synamics_model_observation_space = self.dynamics_model_manager.get_dynamics_model_observation_space()
-
-        observation_space_tuple = gym.spaces.Tuple(
-            (
-                reference_line_observation_space,
-                state_observation_space,
-                synamics_model_observation_space,
-            )
-        )
+        observation_space_tuple = gym.spaces.Tuple(self._get_observation_subspaces())
         observation_space = gym.spaces.flatten_space(observation_space_tuple)
 
         return observation_space
 
+    def reset(self):
+        """Write the dynamics model block of the sampled dynamics model, which is constant within an episode.
+
+        Need to be called after a dynamics model is sampled and before `get_observation`.
+        """
+        self.dynamics_model_manager.get_sampled_dynamics_model().get_dynamics_model_observation(
+            out=self._observation_blocks['dynamics_model']
+        )
+
     def get_observation(self, episode_data, body_state: BodyState) -> np.ndarray:
         """Return the vectorized observation, which is usually ego-centric.
 
+        Only the reference line block and the state block are updated in place.
+
         Args:
             episode_data: Episode data.
             body_state: (Serialized) body state of agent/dynamics model.
 
         Returns:
-            np.ndarray: Vectorized observation.
+            np.ndarray: Vectorized observation, shape=(observation_dim,).
+                NOTE: it is the internal buffer which is overwritten by the next call, copy it if to be kept.
         """
-        reference_line_observation = self.reference_line_manager.get_observation_by_index(
-            episode_data=episode_data, body_state=body_state
-        )
-        state_observation = self.dynamics_model_manager.get_sampled_dynamics_model().get_state_observation()
-        dynamics_model_observation = (
-            self.dynamics_model_manager.get_sampled_dynamics_model().get_dynamics_model_observation()
-        )
-
-        observation = np.concatenate(
-            (
-                reference_line_observation,
-                state_observation,
-                dynamics_model_observation,
-            ),
-            axis=0,
+        if self.reference_line_observation_mode == 'projection':
+            self.reference_line_manager.get_observation_by_state(
+                body_state=body_state, out=self._observation_blocks['reference_line']
+            )
+        else:
+            self.reference_line_manager.get_observation_by_index(
+                episode_data=episode_data, body_state=body_state, out=self._observation_blocks['reference_line']
+            )
+        self.dynamics_model_manager.get_sampled_dynamics_model().get_state_observation(
+            out=self._observation_blocks['state']
         )
 
-        return observation
+        return self._observation
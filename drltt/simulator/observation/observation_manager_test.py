@@ -0,0 +1,88 @@
+import numpy as np
+from gym import Env
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS
+from drltt.simulator.observation.observation_manager import OBSERVATION_BLOCK_NAMES
+from drltt.simulator.trajectory.reference_line import ReferenceLineManager
+
+
+def test_observation_manager():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env: Env = build_object_within_registry_from_config(ENVIRONMENTS, config['environment'])
+    observation_manager = env.observation_manager
+
+    # static layout covers the flattened observation space without gap
+    layout = observation_manager.observation_layout
+    assert tuple(layout.keys()) == OBSERVATION_BLOCK_NAMES
+    assert layout['reference_line'].start == 0
+    assert layout['reference_line'].stop == layout['state'].start
+    assert layout['state'].stop == layout['dynamics_model'].start
+    assert layout['dynamics_model'].stop == observation_manager.observation_dim == env.observation_space.shape[0]
+
+    for _ in range(3):
+        observation = env.reset()
+        dynamics_model = env.get_current_dynamics_model()
+        dynamics_model_observation = dynamics_model.get_dynamics_model_observation()
+        terminated = False
+        while not terminated:
+            # identical to the concatenation of sub-observations
+            body_state = dynamics_model.get_body_state_proto()
+            expected_observation = np.concatenate(
+                (
+                    env.reference_line_manager.get_observation_by_index(env.episode_recorder, body_state),
+                    dynamics_model.get_state_observation(),
+                    dynamics_model_observation,
+                )
+            )
+            assert np.allclose(observation, expected_observation)
+            assert np.array_equal(observation[layout['dynamics_model']], dynamics_model_observation)
+
+            action = dynamics_model.get_action_space().sample()
+            next_observation, _, terminated, _ = env.step(action)
+            # returned observations are not aliased with the internal buffer
+            assert not np.shares_memory(next_observation, observation)
+            observation = next_observation
+
+
+def test_observation_manager_projection():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env_config = dict(config['environment'])
+    env_config['reference_line_observation_mode'] = 'projection'
+    env: Env = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    env.seed(0)
+    hyper_parameter = env.env_info.trajectory_tracking.hyper_parameter
+    assert hyper_parameter.reference_line_observation_mode == 'projection'
+    layout = env.observation_manager.observation_layout
+
+    n_steps_off_index = 0
+    for _ in range(3):
+        observation = env.reset()
+        dynamics_model = env.get_current_dynamics_model()
+        # replayed projection queries on a separate reference line manager
+        reference_line_manager = ReferenceLineManager(
+            n_observation_steps=hyper_parameter.n_observation_steps, pad_mode=hyper_parameter.reference_line_pad_mode
+        )
+        reference_line_manager.set_reference_line(
+            env.reference_line_manager.raw_waypoints, tracking_length=env.reference_line_manager.tracking_length
+        )
+        terminated = False
+        while not terminated:
+            body_state = dynamics_model.get_body_state_proto()
+            expected_observation = reference_line_manager.get_observation_by_state(body_state)
+            assert np.allclose(observation[layout['reference_line']], expected_observation)
+            index_observation = env.reference_line_manager.get_observation_by_index(env.episode_recorder, body_state)
+            n_steps_off_index += not np.allclose(expected_observation, index_observation)
+
+            action = dynamics_model.get_action_space().sample()
+            observation, _, terminated, _ = env.step(action)
+
+    # the body drifts off the time index under random actions
+    assert n_steps_off_index > 0
+
+
+if __name__ == '__main__':
+    test_observation_manager()
+    test_observation_manager_projection()
@@ -0,0 +1,12 @@
+from drltt.common import Registry
+
+REWARD_TERMS = Registry()
+
+from .reward_terms import tracking, action, heading
+from .reward_manager import RewardManager, DEFAULT_REWARD_WEIGHTS
+
+__all__ = [
+    'REWARD_TERMS',
+    'RewardManager',
+    'DEFAULT_REWARD_WEIGHTS',
+]
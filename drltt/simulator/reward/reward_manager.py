@@ -0,0 +1,56 @@
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from . import REWARD_TERMS
+
+# tracking and action terms with unit weights
+DEFAULT_REWARD_WEIGHTS = dict(tracking=1.0, action=1.0)
+
+
+class RewardManager:
+    """Manager for reward, i.e. weighted sum of reward terms registered in `REWARD_TERMS`.
+
+    Attributes:
+        term_names: Names of weighted reward terms, also the order of columns of the breakdown.
+        weights: Weights of reward terms, shape=(n_terms,).
+    """
+
+    term_names: Tuple[str, ...]
+    weights: np.ndarray
+
+    def __init__(self, reward_weights: Union[Dict[str, float], None] = None):
+        """
+        Args:
+            reward_weights: Weights indexed by names of reward terms. Default to `DEFAULT_REWARD_WEIGHTS`.
+        """
+        if reward_weights is None or len(reward_weights) == 0:
+            reward_weights = DEFAULT_REWARD_WEIGHTS
+        for term_name in reward_weights:
+            if term_name not in REWARD_TERMS:
+                raise ValueError(f'Unknown reward term: {term_name}, supported: {tuple(REWARD_TERMS.keys())}')
+        self.term_names = tuple(reward_weights.keys())
+        self.weights = np.array([reward_weights[term_name] for term_name in self.term_names], dtype=np.float64)
+
+    def get_reward_weights(self) -> Dict[str, float]:
+        """Get weights of reward terms.
+
+        Returns:
+            Dict[str, float]: Weights indexed by names of reward terms.
+        """
+        return {term_name: float(weight) for term_name, weight in zip(self.term_names, self.weights)}
+
+    def compute_rewards(self, **inputs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute rewards in a batched pass over all reward terms.
+
+        Args:
+            inputs: Batched inputs of reward terms, see `drltt.simulator.reward.reward_terms`.
+
+        Returns:
+            np.ndarray: Weighted sum of reward terms, shape=(B,).
+            np.ndarray: Breakdown of unweighted reward terms, shape=(B, n_terms), in the order of `term_names`.
+        """
+        reward_terms = np.stack([REWARD_TERMS[term_name](**inputs) for term_name in self.term_names], axis=1)
+        rewards = reward_terms @ self.weights
+
+        return rewards, reward_terms
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.reward import RewardManager, DEFAULT_REWARD_WEIGHTS
+
+
+def test_reward_manager():
+    batch_size = 8
+    rng = np.random.default_rng(0)
+    states = rng.uniform(-10.0, 10.0, size=(batch_size, 4))
+    waypoints = rng.uniform(-10.0, 10.0, size=(batch_size, 2))
+    next_waypoints = waypoints + rng.uniform(-1.0, 1.0, size=(batch_size, 2))
+    next_waypoints[-1] = waypoints[-1]  # degenerate segment
+    action_space_lbs = np.tile(np.array((-4.5, -0.5)), (batch_size, 1))
+    action_space_ubs = np.tile(np.array((4.5, 0.5)), (batch_size, 1))
+    actions = rng.uniform(action_space_lbs, action_space_ubs)
+    inputs = dict(
+        states=states,
+        actions=actions,
+        waypoints=waypoints,
+        next_waypoints=next_waypoints,
+        action_space_lbs=action_space_lbs,
+        action_space_ubs=action_space_ubs,
+    )
+
+    # default terms
+    reward_manager = RewardManager()
+    assert reward_manager.get_reward_weights() == DEFAULT_REWARD_WEIGHTS
+    rewards, reward_terms = reward_manager.compute_rewards(**inputs)
+    assert rewards.shape == (batch_size,)
+    assert reward_terms.shape == (batch_size, len(DEFAULT_REWARD_WEIGHTS))
+    scaled_actions = 2 * (actions - action_space_lbs) / (action_space_ubs - action_space_lbs) - 1
+    expected_rewards = -np.linalg.norm(states[:, :2] - waypoints, axis=1) - (scaled_actions**2).sum(axis=1)
+    assert np.allclose(rewards, expected_rewards)
+
+    # weighted terms
+    reward_weights = dict(tracking=2.0, heading=0.5)
+    reward_manager = RewardManager(reward_weights)
+    rewards, reward_terms = reward_manager.compute_rewards(**inputs)
+    assert reward_manager.term_names == ('tracking', 'heading')
+    assert np.allclose(rewards, 2.0 * reward_terms[:, 0] + 0.5 * reward_terms[:, 1])
+    assert np.all(reward_terms[:, 1] <= 0.0) and np.all(reward_terms[:, 1] >= -np.pi)
+    assert reward_terms[-1, 1] == 0.0
+
+    with pytest.raises(ValueError):
+        RewardManager(dict(unknown=1.0))
+
+
+def test_reward_manager_in_environment():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env_config = config['environment']
+    env_config['reward_weights'] = dict(tracking=1.0, action=0.5, heading=0.1)
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    reward_terms = env.env_info.trajectory_tracking.hyper_parameter.reward_terms
+    assert {reward_term.name: reward_term.weight for reward_term in reward_terms} == pytest.approx(
+        env_config['reward_weights']
+    )
+
+    env.reset()
+    action = env.action_space.sample()
+    _, reward, _, extra_info = env.step(action)
+    assert set(extra_info['all_rewards'].keys()) == {'tracking', 'action', 'heading'}
+    assert np.isclose(
+        reward, sum(env_config['reward_weights'][name] * value for name, value in extra_info['all_rewards'].items())
+    )
+
+    # reward weights are restored from environment data
+    restored_env = TrajectoryTrackingEnv(env_info=env.export_environment_data())
+    assert restored_env.reward_manager.get_reward_weights() == env.reward_manager.get_reward_weights()
+
+
+if __name__ == '__main__':
+    test_reward_manager()
+    test_reward_manager_in_environment()
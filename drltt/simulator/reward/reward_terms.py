@@ -0,0 +1,50 @@
+"""
+Vectorized reward terms, each of which maps batched inputs to rewards with shape=(B,).
+
+Inputs are passed as keyword arguments, and each term only consumes what it needs:
+
+* states: States, shape=(B, 4), format=<x, y, r, v>.
+* actions: Actions, shape=(B, 2).
+* waypoints: Reference waypoints of the current step, shape=(B, 2).
+* next_waypoints: Reference waypoints of the next step, shape=(B, 2).
+* action_space_lbs: Lower bounds of action spaces, shape=(B, 2).
+* action_space_ubs: Upper bounds of action spaces, shape=(B, 2).
+"""
+
+import numpy as np
+
+from drltt.common.geometry import normalize_angle
+from drltt.simulator import EPSILON
+from . import REWARD_TERMS
+
+
+@REWARD_TERMS.register
+def tracking(states: np.ndarray, waypoints: np.ndarray, **kwargs) -> np.ndarray:
+    """Negative L2 distance between positions and reference waypoints."""
+    return -np.linalg.norm(states[:, :2] - waypoints, axis=1)
+
+
+@REWARD_TERMS.register
+def action(
+    actions: np.ndarray,
+    action_space_lbs: np.ndarray,
+    action_space_ubs: np.ndarray,
+    **kwargs,
+) -> np.ndarray:
+    """Negative squared norm of actions scaled into [-1, +1]."""
+    scaled_actions = 2 * (actions - action_space_lbs) / (action_space_ubs - action_space_lbs) - 1
+
+    return -(scaled_actions**2).sum(axis=1)
+
+
+@REWARD_TERMS.register
+def heading(states: np.ndarray, waypoints: np.ndarray, next_waypoints: np.ndarray, **kwargs) -> np.ndarray:
+    """Negative absolute heading error w.r.t. the direction of the reference line segment ahead.
+
+    Zero on degenerate segments, e.g. the padded tail of reference line.
+    """
+    directions = next_waypoints - waypoints
+    heading_errors = normalize_angle(states[:, 2] - np.arctan2(directions[:, 1], directions[:, 0]))
+    is_valid = (directions**2).sum(axis=1) > EPSILON**2
+
+    return -np.abs(heading_errors) * is_valid
@@ -0,0 +1,55 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+# percentiles of per-step values reported along with medians
+PERCENTILES = (50, 90, 99)
+
+
+def compute_group_medians(values: np.ndarray, group_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute medians of values within each group in a single sort, e.g. per-episode medians of per-step values.
+
+    Args:
+        values: Values, shape=(N,).
+        group_ids: Group ids of values, shape=(N,).
+
+    Returns:
+        np.ndarray: Sorted unique group ids, shape=(n_groups,).
+        np.ndarray: Medians of groups, in the order of group ids, shape=(n_groups,).
+    """
+    # stable sort by group ids (radix sort for integers) after sort by values, faster than `np.lexsort`
+    order = np.argsort(values)
+    order = order[np.argsort(group_ids[order], kind='stable')]
+    sorted_values, sorted_group_ids = values[order], group_ids[order]
+    if len(sorted_group_ids) == 0:
+        return sorted_group_ids, sorted_values
+    starts = np.flatnonzero(np.concatenate(((True,), sorted_group_ids[1:] != sorted_group_ids[:-1])))
+    counts = np.diff(np.append(starts, len(sorted_group_ids)))
+    unique_group_ids = sorted_group_ids[starts]
+    # mean of the two middle values, which coincide if the count is odd
+    medians = (sorted_values[starts + (counts - 1) // 2] + sorted_values[starts + counts // 2]) / 2
+
+    return unique_group_ids, medians
+
+
+def summarize_step_values(values: np.ndarray, episode_medians: np.ndarray) -> Dict[str, float]:
+    """Summarize per-step values of episodes.
+
+    Args:
+        values: Per-step values, shape=(N,).
+        episode_medians: Per-episode medians of values, see `compute_group_medians`, shape=(n_episodes,).
+
+    Returns:
+        Dict[str, float]: Summary.
+
+        - median: median over episodes of per-episode medians
+        - p50/p90/p99: percentiles over all steps
+    """
+    if len(values) == 0:
+        return dict(median=np.nan, **{f'p{percentile}': np.nan for percentile in PERCENTILES})
+
+    percentiles = np.percentile(values, PERCENTILES)
+    summary = dict(median=float(np.median(episode_medians)))
+    summary.update({f'p{percentile}': float(value) for percentile, value in zip(PERCENTILES, percentiles)})
+
+    return summary
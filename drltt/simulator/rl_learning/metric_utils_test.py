@@ -0,0 +1,75 @@
+import numpy as np
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.common.gym_helper import scale_action
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.environments.episode_columns import episodes_to_columns
+from drltt.simulator.rl_learning.metric_utils import PERCENTILES, compute_group_medians, summarize_step_values
+from drltt.simulator.rl_learning.sb3_learner import compute_bicycle_model_metrics
+from drltt.simulator.rl_learning.sb3_utils import roll_out_one_episode
+
+
+def test_compute_group_medians():
+    rng = np.random.default_rng(0)
+    group_ids = rng.integers(0, 10, size=200)
+    values = rng.normal(size=200)
+    unique_group_ids, medians = compute_group_medians(values, group_ids)
+    assert unique_group_ids.tolist() == sorted(set(group_ids.tolist()))
+    for group_id, median in zip(unique_group_ids, medians):
+        assert median == np.median(values[group_ids == group_id])
+
+    summary = summarize_step_values(values, medians)
+    assert summary['median'] == np.median(medians)
+    assert summary['p90'] == np.percentile(values, 90)
+    assert set(summary.keys()) == {'median'} | {f'p{percentile}' for percentile in PERCENTILES}
+
+
+def test_compute_bicycle_model_metrics():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, config['environment'], recording_level='summary'
+    )
+    episodes = list()
+    for _ in range(8):
+        roll_out_one_episode(env, lambda obs: env.action_space.sample())
+        episodes.append(env.export_episode_data())
+    metrics = compute_bicycle_model_metrics(episodes_to_columns(episodes), env)
+
+    # median over episodes of per-episode medians, computed step by step
+    episode_medians = list()
+    for episode in episodes:
+        dists, scaled_action_norms = list(), list()
+        dynamics_model = env.dynamics_model_manager.dynamics_models[episode.selected_dynamics_model_index]
+        for i_step in range(episode.tracking_length):
+            state = episode.dynamics_model.states[i_step].bicycle_model
+            action = episode.dynamics_model.actions[i_step].bicycle_model
+            waypoint = episode.reference_line.waypoints[i_step]
+            dists.append(np.linalg.norm(np.array((state.body_state.x - waypoint.x, state.body_state.y - waypoint.y))))
+            scaled_action = scale_action(np.array((action.a, action.s)), dynamics_model.get_action_space())
+            scaled_action_norms.append(np.linalg.norm(scaled_action))
+        episode_medians.append((np.median(dists), np.median(scaled_action_norms), np.median(list(episode.rewards))))
+    expected_medians = np.median(np.array(episode_medians), axis=0)
+    assert np.allclose(
+        (metrics['l2_distance_median'], metrics['scaled_action_norm_median'], metrics['reward_median']),
+        expected_medians,
+    )
+    assert metrics['n_episodes'] == len(episodes)
+    assert metrics['l2_distance_p50'] <= metrics['l2_distance_p90'] <= metrics['l2_distance_p99']
+
+    # broken down by dynamics model
+    dynamics_model_names = [
+        hyper_parameter.name
+        for hyper_parameter in env.env_info.trajectory_tracking.hyper_parameter.dynamics_models_hyper_parameters
+    ]
+    for dynamics_model_name, dynamics_model_metrics in metrics['by_dynamics_model'].items():
+        dynamics_model_index = dynamics_model_names.index(dynamics_model_name)
+        n_episodes = sum(episode.selected_dynamics_model_index == dynamics_model_index for episode in episodes)
+        assert dynamics_model_metrics['n_episodes'] == n_episodes
+    assert sum(m['n_episodes'] for m in metrics['by_dynamics_model'].values()) == len(episodes)
+
+
+if __name__ == '__main__':
+    test_compute_group_medians()
+    test_compute_bicycle_model_metrics()
@@ -13,11 +13,14 @@ import torch as th
 from torch import nn
 import gym
 import gym.spaces
+import gymnasium
 from stable_baselines3.common.base_class import BaseAlgorithm
 from stable_baselines3.common.policies import BasePolicy
+from stable_baselines3.common.vec_env import VecNormalize
 from stable_baselines3 import TD3, SAC, DDPG
 
 from drltt.common.io import convert_numpy_to_TensorFP, convert_TensorFP_to_numpy
+from drltt.simulator.rl_learning.sb3_normalization import build_policy_func
 
 from drltt_proto.sdk.exported_policy_test_case_pb2 import ExportedPolicyTestCases
 
@@ -28,6 +31,8 @@ class OnnxableActorCriticPolicy(th.nn.Module):
     """Wrapper class for JIT tracing of an RL policy trained with Stabline Baselines 3.
     TODO: docstring
 
+    Frozen observation normalization, if provided, is baked into the module, which thus consumes raw observation.
+
     Reference:
         https://github.com/DLR-RM/stable-baselines3/tree/v2.2.1/stable_baselines3/td3/policies.py
         https://github.com/DLR-RM/stable-baselines3/tree/v2.2.1/stable_baselines3/sac/policies.py
@@ -38,11 +43,21 @@ class OnnxableActorCriticPolicy(th.nn.Module):
     action_space_ub: th.Tensor
     box_action_space: bool
     squash_output: bool
-
-    def __init__(self, actor_critic_algorithm: BaseAlgorithm):
+    normalize_observation: bool
+    observation_mean: th.Tensor
+    observation_var: th.Tensor
+    observation_epsilon: float
+    observation_clip: float
+
+    def __init__(
+        self,
+        actor_critic_algorithm: BaseAlgorithm,
+        vec_normalize: Union[VecNormalize, None] = None,
+    ):
         """
         Args:
             actor_critic_algorithm: Algorithm to be traced.
+            vec_normalize: Frozen normalization whose observation statistics are baked in. `None` for no normalization.
         """
         super().__init__()
         policy: BasePolicy = actor_critic_algorithm.policy
@@ -52,9 +67,18 @@ class OnnxableActorCriticPolicy(th.nn.Module):
         self.action_space_lb = th.from_numpy(policy.action_space.low)
         self.action_space_ub = th.from_numpy(policy.action_space.high)
 
-        self.box_action_space = isinstance(policy.action_space, gym.spaces.Box)
+        # SB3 converts spaces of `gym` environments to `gymnasium` ones
+        self.box_action_space = isinstance(policy.action_space, (gym.spaces.Box, gymnasium.spaces.Box))
         self.squash_output = policy.squash_output
 
+        # https://github.com/DLR-RM/stable-baselines3/tree/v2.2.1/stable_baselines3/common/vec_env/vec_normalize.py#L179
+        self.normalize_observation = vec_normalize is not None and vec_normalize.norm_obs
+        if self.normalize_observation:
+            self.register_buffer('observation_mean', th.from_numpy(vec_normalize.obs_rms.mean.astype(np.float32)))
+            self.register_buffer('observation_var', th.from_numpy(vec_normalize.obs_rms.var.astype(np.float32)))
+            self.observation_epsilon = float(vec_normalize.epsilon)
+            self.observation_clip = float(vec_normalize.clip_obs)
+
         self.eval()
 
     def forward(self, observation: th.Tensor) -> th.Tensor:
@@ -68,6 +92,13 @@ class OnnxableActorCriticPolicy(th.nn.Module):
         Returns:
             th.Tensor: Action, shape=(batch_size, action_dim).
         """
+        if self.normalize_observation:
+            observation = th.clamp(
+                (observation - self.observation_mean) / th.sqrt(self.observation_var + self.observation_epsilon),
+                -self.observation_clip,
+                self.observation_clip,
+            )
+
         # https://github.com/DLR-RM/stable-baselines3/tree/v2.2.1/stable_baselines3/common/policies.py#L366
         scaled_action: th.Tensor = self.actor(observation)
 
@@ -107,6 +138,7 @@ def export_sb3_jit_module(
     test_case_save_format: str = 'protobuf',
     device: Union[th.device, str] = 'cpu',
     n_test_cases: int = 1,
+    vec_normalize: Union[VecNormalize, None] = None,
 ) -> th.jit.ScriptModule:
     """Export jit module from Stable Baselines 3 algorithm.
 
@@ -119,6 +151,8 @@ def export_sb3_jit_module(
         export_dir: Directory to export traced module.
         test_case_save_format: ('protobuf'|'numpy')
         n_test_cases: Number of test cases.
+        vec_normalize: Frozen normalization of observation to be baked into the traced module, see
+            `load_vec_normalize`. `None` for no normalization.
     """
     is_actor_critic_algorithm = any([isinstance(algorithm, ac_algo) for ac_algo in ACTOR_CRITIC_ALGORITHMS])
     assert (
@@ -128,16 +162,17 @@ def export_sb3_jit_module(
     # prepare test cases
     gt_observations = list()
     gt_actions = list()
+    policy_func = build_policy_func(algorithm, vec_normalize)
     for _ in range(n_test_cases):
         observation = environment.reset()
-        action, _states = algorithm.predict(observation)
+        action = policy_func(observation)
         gt_observations.append(observation)
         gt_actions.append(action)
     gt_observations = np.stack(gt_observations, axis=0)
     gt_actions = np.stack(gt_actions, axis=0)
 
     # trace module
-    onnxable_model = OnnxableActorCriticPolicy(algorithm)
+    onnxable_model = OnnxableActorCriticPolicy(algorithm, vec_normalize)
     onnxable_model.to(device)
     dummy_input = th.from_numpy(gt_observations[0:1, ...])
     traced_module: th.jit.ScriptModule = th.jit.trace(onnxable_model.eval(), dummy_input)
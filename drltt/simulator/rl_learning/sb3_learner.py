@@ -1,29 +1,54 @@
 from typing import List, Tuple, Dict, Union, Any
 import os
+import re
 import logging
 from copy import deepcopy
 import json
 
 import numpy as np
-import pandas as pd
 import gym
 import stable_baselines3
 from stable_baselines3.common.utils import configure
 from stable_baselines3.common.base_class import BaseAlgorithm
 from stable_baselines3.common.noise import NormalActionNoise
+from stable_baselines3.common.vec_env import VecEnv, VecNormalize
 
 from . import METRICS
 from .sb3_utils import roll_out_one_episode
+from .metric_utils import compute_group_medians, summarize_step_values
+from .sb3_normalization import wrap_with_vec_normalize, freeze_vec_normalize, save_vec_normalize, build_policy_func
+from .sb3_parallel_eval import (
+    get_shard_file_name,
+    get_shard_episode_indices,
+    roll_out_and_export_episode,
+    roll_out_episodes_in_parallel,
+)
 
 from drltt.common import Registry, build_object_within_registry_from_config
-from drltt.common.gym_helper import scale_action
-from drltt.simulator.environments import ExtendedGymEnv
+from drltt.simulator.environments import ExtendedGymEnv, TrajectoryTrackingEnv
+from drltt.simulator.environments.episode_recorder import (
+    requires_recording_level,
+    is_recording_level_sufficient,
+    check_episode_recorded,
+    EpisodeArchive,
+)
+from drltt.simulator.environments.episode_log import EpisodeLogWriter
+from drltt.simulator.environments.episode_columns import (
+    episode_to_columns,
+    concatenate_episode_columns,
+    save_episode_columns,
+    load_episode_columns,
+)
 from drltt.simulator.visualization import VISUALIZATION_FUNCTIONS
 
-from drltt_proto.environment.environment_pb2 import Environment
-
 SB3_MODULES = Registry().register_from_python_module(stable_baselines3)
 SB3_LOGGING_FORMAT_STRINGS = ['stdout', 'log', 'csv']
+# number of episodes kept in `env_data.bin` as test cases of SDK, while all episodes are streamed to episode log
+N_ENV_DATA_EPISODES = 16
+TRAIN_EPISODE_LOG_FILE_NAME = 'episodes.bin'
+EVAL_EPISODE_LOG_FILE_NAME = 'eval_episodes.bin'
+EVAL_COLUMNS_FILE_NAME = 'eval_columns.npz'
+METRICS_FILE_NAME = 'metrics.json'
 
 
 def build_sb3_algorithm_from_config(
@@ -42,33 +67,43 @@ def build_sb3_algorithm_from_config(
     # add action noise object
     # TODO: check existence of `scaled_action_noise`
     action_noise_config = algorithm_config.pop('scaled_action_noise')
-    algorithm_config['action_noise'] = NormalActionNoise(
+    action_noise = NormalActionNoise(
         mean=np.array(action_noise_config['mean']),
         sigma=np.array(action_noise_config['sigma']),
     )
-    # add environment object
-    algorithm_config['env'] = environment
 
-    # build algorithm object
-    algorithm: BaseAlgorithm = build_object_within_registry_from_config(SB3_MODULES, algorithm_config)
+    # build algorithm object, passing objects through kwargs which are not deep-copied
+    #   e.g. environment holding worker processes
+    algorithm: BaseAlgorithm = build_object_within_registry_from_config(
+        SB3_MODULES,
+        algorithm_config,
+        env=environment,
+        action_noise=action_noise,
+    )
     logging.info(f'Built algorithm.policy: {algorithm.policy}')
 
     return algorithm
 
 
 def train_with_sb3(
-    environment: ExtendedGymEnv,
+    environment: Union[ExtendedGymEnv, VecEnv],
     algorithm_config: Dict,
     learning_config: Dict,
     checkpoint_file_prefix: str = '',
+    normalization_config: Union[Dict, None] = None,
+    episode_log_compression: str = 'none',
 ) -> Union[BaseAlgorithm, None]:
     """RL Training with Stable Baselines3.
 
     Args:
-        environment: Training environment.
+        environment: Training environment. Either a single environment or a vectorized one.
         algorithm_config: Configuration of the algorithm.
         learning_config: Configuration of the learning.
         checkpoint_file_prefix: File prefix (i.e. path without extension) to save checkpoint file.
+        normalization_config: Configuration of running normalization of observation and reward,
+            see `wrap_with_vec_normalize`. `None` for no normalization.
+            The frozen statistics are saved along with the checkpoint.
+        episode_log_compression: Compression of episode log of rollouts after training, see `EpisodeLogWriter`.
 
     Returns:
         Union[BaseAlgorithm, None]: The algorithm object with trained models.
@@ -79,20 +114,43 @@ def train_with_sb3(
         logging.warn(f'Training aborted as checkpoint exists: {checkpoint_file}')
         return None
 
-    algorithm = build_sb3_algorithm_from_config(environment, algorithm_config)
+    vec_normalize: Union[VecNormalize, None] = None
+    if normalization_config is not None:
+        vec_normalize = wrap_with_vec_normalize(environment, normalization_config)
+
+    algorithm = build_sb3_algorithm_from_config(
+        environment if vec_normalize is None else vec_normalize, algorithm_config
+    )
     algorithm.set_logger(configure(f'{checkpoint_dir}/sb3-train', format_strings=SB3_LOGGING_FORMAT_STRINGS))
     algorithm.learn(**learning_config)
+    if vec_normalize is not None:
+        freeze_vec_normalize(vec_normalize)
 
     if checkpoint_file_prefix != '':
         # save model
         os.makedirs(checkpoint_dir, exist_ok=True)
         algorithm.save(checkpoint_file_prefix)
         logging.info(f'SB3 Algorithm Policy saved at: {checkpoint_file}')
+        if vec_normalize is not None:
+            save_vec_normalize(vec_normalize, checkpoint_dir)
 
         # save environment data
-        for _ in range(environment.env_info.trajectory_tracking.hyper_parameter.max_n_episodes + 1):
-            roll_out_one_episode(environment, lambda obs: algorithm.predict(obs)[0])
-        env_data = environment.export_environment_data()
+        if isinstance(environment, VecEnv):
+            # roll out with a single environment that shares the hyper-parameter
+            environment = TrajectoryTrackingEnv(env_info=environment.export_environment_data())
+        environment.set_recording_level('full')
+        # episodes are streamed to the log, thus only those exported to environment data are archived
+        environment.archived_episodes = EpisodeArchive(
+            max_n_episodes=N_ENV_DATA_EPISODES, max_nbytes=environment.archived_episodes.max_nbytes
+        )
+        policy_func = build_policy_func(algorithm, vec_normalize)
+        with EpisodeLogWriter(
+            f'{checkpoint_dir}/{TRAIN_EPISODE_LOG_FILE_NAME}', compression=episode_log_compression
+        ) as episode_log_writer:
+            for _ in range(environment.env_info.trajectory_tracking.hyper_parameter.max_n_episodes + 1):
+                roll_out_one_episode(environment, policy_func)
+                episode_log_writer.write(environment.export_episode_data())
+        env_data = environment.export_environment_data(n_archived_episodes=N_ENV_DATA_EPISODES)
         env_data_save_path = f'{checkpoint_dir}/env_data.bin'
         with open(env_data_save_path, 'wb') as f:
             f.write(env_data.SerializeToString())
@@ -109,9 +167,19 @@ def eval_with_sb3(
     compute_metrics_name: str,
     visualization_function_name: str,
     viz_interval: int = 10,
+    vec_normalize: Union[VecNormalize, None] = None,
+    episode_log_compression: str = 'none',
+    seed: int = 0,
+    n_workers: int = 1,
+    env_config: Union[Dict[str, Any], None] = None,
+    shard: Tuple[int, int] = (0, 1),
 ):
     """RL Evaluation with Stable Baselines3.
 
+    Episodes are seeded by episode index, thus metrics are independent of `n_workers`.
+    If sharded, only episodes of the shard are evaluated, and outputs are suffixed with the shard,
+        to be merged by `merge_eval_shards`.
+
     Args:
         environment: Evaluation environment.
         algorithm: The algorithm with models to be evaluated.
@@ -121,94 +189,181 @@ def eval_with_sb3(
         visualization_function_name: Name of `visualization_function`.
         viz_interval: Interval of episodes that this function performs visualization.
             TODO: set it with argument passed through Shell script.
+        vec_normalize: Frozen normalization of observation, see `load_vec_normalize`. `None` for no normalization.
+        episode_log_compression: Compression of episode log of evaluated episodes, see `EpisodeLogWriter`.
+        seed: Base seed of evaluation, see `get_episode_seed`.
+        n_workers: Number of worker processes. 1 for rolling out in the main process.
+        env_config: Config of `environment`, required for building environments within worker processes.
+        shard: Shard index and number of shards, see `parse_shard`.
     """
+    if n_workers > 1 and env_config is None:
+        raise ValueError('`env_config` is required for evaluation with multiple workers')
     algorithm.set_logger(configure(f'{report_dir}/sb3-eval', format_strings=SB3_LOGGING_FORMAT_STRINGS))
-    all_episodes_metrics = list()
+    compute_metrics = METRICS[compute_metrics_name]
+    visualization_function = VISUALIZATION_FUNCTIONS[visualization_function_name]
+    for required_recording_level in (
+        compute_metrics.required_recording_level,
+        visualization_function.required_recording_level,
+    ):
+        if not is_recording_level_sufficient(environment.get_recording_level(), required_recording_level):
+            logging.info(f'Recording level of evaluation environment raised to: {required_recording_level}')
+            environment.set_recording_level(required_recording_level)
+
     viz_dir = f"{report_dir}/visualization"
     os.makedirs(viz_dir, exist_ok=True)
-    for scenario_idx in range(n_episodes):
-        logging.info(f'scenario #{scenario_idx}')
-        roll_out_one_episode(environment, lambda obs: algorithm.predict(obs)[0])
-
-        compute_metrics = METRICS[compute_metrics_name]
-        env_data: Environment = environment.export_environment_data()
-        metrics = compute_metrics(env_data, environment)  # format: metric[metric_name][reduce_method]
-        if scenario_idx % viz_interval == 0:
-            # TODO: consider moving it to env.render()
-            viz_prefix = f"{viz_dir}/{scenario_idx}"
-            visualization_function = VISUALIZATION_FUNCTIONS[visualization_function_name]
-            visualization_function(env_data, viz_prefix)
-        all_episodes_metrics.append(metrics)
-
-    df = pd.DataFrame.from_records(all_episodes_metrics)
-    json_str = df.median().to_json()
-
-    os.makedirs(report_dir, exist_ok=True)
-    report_file = f'{report_dir}/metrics.json'
+    episode_indices = get_shard_episode_indices(n_episodes, shard)
+    if n_workers > 1:
+        episodes = roll_out_episodes_in_parallel(
+            env_config,
+            environment.get_recording_level(),
+            algorithm,
+            vec_normalize,
+            episode_indices,
+            seed,
+            n_workers,
+            visualization_function_name,
+            viz_dir,
+            viz_interval,
+        )
+    else:
+        policy_func = build_policy_func(algorithm, vec_normalize)
+        episodes = (
+            roll_out_and_export_episode(
+                environment, policy_func, episode_index, seed, visualization_function, viz_dir, viz_interval
+            )
+            for episode_index in episode_indices
+        )
+
+    all_episodes_columns = list()
+    episode_log_writer = EpisodeLogWriter(
+        f'{report_dir}/{get_shard_file_name(EVAL_EPISODE_LOG_FILE_NAME, shard)}', compression=episode_log_compression
+    )
+    for episode_index, episode in zip(episode_indices, episodes):
+        logging.info(f'scenario #{episode_index}')
+        episode_log_writer.write(episode)
+        check_episode_recorded(episode, compute_metrics.required_recording_level)
+        all_episodes_columns.append(episode_to_columns(episode, episode_id=episode_index))
+    episode_log_writer.close()
+
+    columns = concatenate_episode_columns(all_episodes_columns)
+    save_episode_columns(f'{report_dir}/{get_shard_file_name(EVAL_COLUMNS_FILE_NAME, shard)}', columns)
+    # metrics of all episodes are computed at once over columns
+    dump_metrics(compute_metrics(columns, environment), f'{report_dir}/{get_shard_file_name(METRICS_FILE_NAME, shard)}')
+
+
+def merge_eval_shards(
+    environment: gym.Env,
+    report_dir: str,
+    compute_metrics_name: str,
+):
+    """Merge outputs of evaluation shards gathered in a directory, and compute metrics of all episodes.
+
+    Metrics are computed from columns of all shards, as medians and percentiles can not be merged from shards.
+
+    Args:
+        environment: Evaluation environment.
+        report_dir: Directory containing columns of all shards, where merged columns and metrics are exported.
+        compute_metrics_name: Name of `compute_metrics`.
+    """
+    base_name, extension = os.path.splitext(EVAL_COLUMNS_FILE_NAME)
+    shard_pattern = re.compile(rf'{re.escape(base_name)}-shard-(\d+)-of-(\d+){re.escape(extension)}')
+    shards = sorted(
+        (int(match.group(1)), int(match.group(2)))
+        for match in map(shard_pattern.fullmatch, os.listdir(report_dir))
+        if match is not None
+    )
+    n_shards_set = set(n_shards for _, n_shards in shards)
+    if len(n_shards_set) != 1 or [shard_index for shard_index, _ in shards] != list(range(n_shards_set.pop())):
+        raise ValueError(f'Incomplete or inconsistent evaluation shards in {report_dir}: {shards}')
+
+    columns = concatenate_episode_columns([
+        load_episode_columns(f'{report_dir}/{get_shard_file_name(EVAL_COLUMNS_FILE_NAME, shard)}') for shard in shards
+    ])
+    # rows ordered by episodes as in unsharded evaluation
+    order = np.argsort(columns['episode_id'], kind='stable')
+    columns = {name: column[order] for name, column in columns.items()}
+    save_episode_columns(f'{report_dir}/{EVAL_COLUMNS_FILE_NAME}', columns)
+    dump_metrics(METRICS[compute_metrics_name](columns, environment), f'{report_dir}/{METRICS_FILE_NAME}')
+    logging.info(f'Merged {len(shards)} evaluation shards in {report_dir}')
+
+
+def dump_metrics(metrics: Dict[str, Any], report_file: str):
+    """Dump metrics to JSON report.
+
+    Args:
+        metrics: Metrics.
+        report_file: Path to JSON report.
+    """
+    json_str = json.dumps(metrics, sort_keys=True, indent=2, separators=(',', ': '))
+    os.makedirs(os.path.dirname(report_file), exist_ok=True)
     with open(report_file, 'w') as f:
-        json.dump(json.loads(json_str), f, sort_keys=True, indent=2, separators=(',', ': '))
+        f.write(json_str)
 
     logging.info(f'Report file dumped at: {report_file}')
     logging.info(json_str)
 
 
 @METRICS.register
+@requires_recording_level('summary')
 def compute_bicycle_model_metrics(
-    env_data: Environment,
-    environment: ExtendedGymEnv,
+    columns: Dict[str, np.ndarray],
+    environment: TrajectoryTrackingEnv,
 ) -> Dict[str, Any]:
-    """Compute metrics for the bicycle model for an episode.
+    """Compute metrics for the bicycle model over episodes, in a few vectorized passes over all steps.
+
+    Requires recording level 'summary' (states, actions, and rewards).
 
     Args:
-        episode: Data of the episode.
+        columns: Columns of episodes, see `drltt.simulator.environments.episode_columns`.
         environment: Associated environment.
 
     Returns:
-        Dict[str, Any]: Computed metrics.
+        Dict[str, Any]: Computed metrics, for all episodes and broken down by names of dynamics models
+            in `by_dynamics_model`. For each of `l2_distance`, `scaled_action_norm`, and `reward`:
 
-        - l2_distance_median: median L2 distance
-        - scaled_action_norm_median
-        - reward_median
+        - <metric>_median: median over episodes of per-episode medians
+        - <metric>_p50/<metric>_p90/<metric>_p99: percentiles over all steps
     """
-    assert isinstance(
-        env_data, Environment
-    ), f'`compute_bicycle_model_metrics` requires env_data to be in class `Environment`'
-    episode = env_data.trajectory_tracking.episode
-
-    dists = list()
-    scaled_action_norms = list()
-    rewards = list()
-    for i_step in range(episode.tracking_length):
-        reference_waypoint = episode.reference_line.waypoints[i_step]
-        state = episode.dynamics_model.states[i_step]
-        action = episode.dynamics_model.actions[i_step]
-        reward = episode.rewards[i_step]
-        tracked_position = np.array(
-            (
-                state.bicycle_model.body_state.x,
-                state.bicycle_model.body_state.y,
-            )
-        )
-        reference_position = np.array(
-            (
-                reference_waypoint.x,
-                reference_waypoint.y,
-            )
-        )
-        dist = np.linalg.norm(tracked_position - reference_position)
-
-        action_vec = np.array((action.bicycle_model.a, action.bicycle_model.s))
-        scaled_action = scale_action(action_vec, environment.action_space)
-        scaled_action_norm = np.linalg.norm(scaled_action)
-
-        dists.append(dist)
-        scaled_action_norms.append(scaled_action_norm)
-        rewards.append(reward)
+    # actions are scaled by the action space of the dynamics model of each step
+    parameter_table = environment.dynamics_model_manager.get_parameter_table()
+    action_space_lbs = parameter_table.action_space_lbs[columns['dynamics_model_index']].astype(np.float64)
+    action_space_ubs = parameter_table.action_space_ubs[columns['dynamics_model_index']].astype(np.float64)
+    actions = np.stack((columns['a'], columns['s']), axis=1).astype(np.float64)
+    step_values = dict(
+        l2_distance=np.hypot(
+            columns['x'].astype(np.float64) - columns['ref_x'], columns['y'].astype(np.float64) - columns['ref_y']
+        ),
+        scaled_action_norm=np.linalg.norm(
+            2 * (actions - action_space_lbs) / (action_space_ubs - action_space_lbs) - 1, axis=1
+        ),
+        reward=columns['reward'].astype(np.float64),
+    )
 
-    metrics = dict(
-        l2_distance_median=np.median(dists),
-        scaled_action_norm_median=np.median(scaled_action_norms),
-        reward_median=np.median(rewards),
+    # per-episode medians are computed once, and selected for each dynamics model
+    episode_ids = columns['episode_id']
+    unique_episode_ids, first_steps = np.unique(episode_ids, return_index=True)
+    episode_dynamics_model_indices = columns['dynamics_model_index'][first_steps]
+    episode_medians = {
+        metric_name: compute_group_medians(values, episode_ids)[1] for metric_name, values in step_values.items()
+    }
+
+    def summarize(step_mask: Union[np.ndarray, slice], episode_mask: Union[np.ndarray, slice]) -> Dict[str, Any]:
+        summary = dict(n_episodes=len(unique_episode_ids[episode_mask]))
+        for metric_name, values in step_values.items():
+            metric_summary = summarize_step_values(values[step_mask], episode_medians[metric_name][episode_mask])
+            summary.update({f'{metric_name}_{stat_name}': value for stat_name, value in metric_summary.items()})
+        return summary
+
+    metrics = summarize(slice(None), slice(None))
+    dynamics_models_hyper_parameters = (
+        environment.env_info.trajectory_tracking.hyper_parameter.dynamics_models_hyper_parameters
     )
+    metrics['by_dynamics_model'] = {
+        dynamics_models_hyper_parameters[dynamics_model_index].name: summarize(
+            columns['dynamics_model_index'] == dynamics_model_index,
+            episode_dynamics_model_indices == dynamics_model_index,
+        )
+        for dynamics_model_index in np.unique(episode_dynamics_model_indices).tolist()
+    }
 
     return metrics
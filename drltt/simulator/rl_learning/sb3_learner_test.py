@@ -1,13 +1,23 @@
 import os
 import shutil
+import json
 
+import numpy as np
+import torch as th
 from gym import Env
 
 from drltt.common import build_object_within_registry_from_config
 from drltt.common.io import load_and_override_configs, generate_random_string
 from drltt.simulator import TEST_CONFIG_PATHS
 from drltt.simulator.environments import ENVIRONMENTS
-from drltt.simulator.rl_learning.sb3_learner import build_sb3_algorithm_from_config, train_with_sb3, eval_with_sb3
+from drltt.simulator.rl_learning.sb3_learner import (
+    build_sb3_algorithm_from_config,
+    train_with_sb3,
+    eval_with_sb3,
+    merge_eval_shards,
+)
+from drltt.simulator.rl_learning import sb3_export
+from drltt.simulator.rl_learning.sb3_normalization import load_vec_normalize, build_policy_func
 
 
 # TODO: use pytest fixture/setup to refactor tests within file, to avoid copy-paste of test codes
@@ -49,6 +59,82 @@ def test_eval_with_sb3():
         shutil.rmtree(report_dir, ignore_errors=True)
 
 
+def test_eval_with_sb3_parallel_and_sharded():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = config['environment']
+    environment: Env = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    algorithm = build_sb3_algorithm_from_config(environment, config['algorithm'])
+
+    eval_config = config['evaluation']['eval_config']
+    eval_config['n_episodes'] = 6
+    test_dir = f'/tmp/drltt-pytest-{generate_random_string(6)}'
+
+    all_metrics = dict()
+    for n_workers in (1, 2):
+        report_dir = f'{test_dir}/n_workers-{n_workers}'
+        eval_config['n_workers'] = n_workers
+        eval_with_sb3(environment, algorithm, report_dir, env_config=env_config, **eval_config)
+        with open(f'{report_dir}/metrics.json') as f:
+            all_metrics[n_workers] = f.read()
+
+    # shards evaluated separately, e.g. on different machines, and gathered afterwards
+    eval_config['n_workers'] = 1
+    report_dir = f'{test_dir}/sharded'
+    for shard_index in (1, 0):
+        eval_with_sb3(environment, algorithm, report_dir, shard=(shard_index, 2), **eval_config)
+    merge_eval_shards(environment, report_dir, eval_config['compute_metrics_name'])
+    with open(f'{report_dir}/metrics.json') as f:
+        all_metrics['sharded'] = f.read()
+
+    assert all_metrics[1] == all_metrics[2] == all_metrics['sharded']
+    assert json.loads(all_metrics[1])['n_episodes'] == eval_config['n_episodes']
+
+    shutil.rmtree(test_dir, ignore_errors=True)
+
+
+def test_train_with_sb3_normalization():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = config['environment']
+    environment: Env = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    config['learning']['total_timesteps'] = 64
+    config['algorithm']['learning_starts'] = 16
+    config['algorithm']['batch_size'] = 16
+    test_checkpoint_dir = f'/tmp/drltt-pytest-{generate_random_string(6)}'
+    algorithm = train_with_sb3(
+        environment=environment,
+        algorithm_config=config['algorithm'],
+        learning_config=config['learning'],
+        checkpoint_file_prefix=f'{test_checkpoint_dir}/checkpoint',
+        # normalization is opt-in, thus enabled explicitly here
+        normalization_config=dict(norm_obs=True, norm_reward=False, clip_obs=10.0, gamma=0.99),
+    )
+
+    # statistics are frozen
+    vec_normalize = load_vec_normalize(test_checkpoint_dir, environment)
+    assert not vec_normalize.training
+    observation_mean = vec_normalize.obs_rms.mean.copy()
+    policy_func = build_policy_func(algorithm, vec_normalize)
+    observation = environment.reset()
+    action = policy_func(observation)
+    assert np.array_equal(vec_normalize.obs_rms.mean, observation_mean)
+
+    # normalization is baked into the exported module, which consumes raw observation
+    onnxable_model = sb3_export.OnnxableActorCriticPolicy(algorithm, vec_normalize)
+    onnxable_action = onnxable_model(th.from_numpy(observation[np.newaxis])).detach().numpy()[0]
+    assert np.allclose(onnxable_action, action, rtol=1e-3, atol=1e-4)
+    sb3_export.export_sb3_jit_module(algorithm, environment, test_checkpoint_dir, vec_normalize=vec_normalize)
+    # imported within module to avoid being collected as test by pytest
+    assert sb3_export.test_sb3_jit_module(
+        f'{test_checkpoint_dir}/traced_policy.pt', f'{test_checkpoint_dir}/traced_policy_test_cases.bin'
+    )
+
+    shutil.rmtree(test_checkpoint_dir)
+
+
 if __name__ == '__main__':
     test_train_with_sb3()
     test_eval_with_sb3()
+    test_eval_with_sb3_parallel_and_sharded()
+    test_train_with_sb3_normalization()
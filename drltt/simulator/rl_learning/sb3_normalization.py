@@ -0,0 +1,102 @@
+"""
+Running normalization of observation and reward with `VecNormalize` of Stable Baselines 3.
+
+Statistics are updated during training, frozen afterwards, and baked into the traced policy upon export
+    (see `OnnxableActorCriticPolicy`), so that the deployed policy consumes raw observations.
+"""
+
+from typing import Callable, Dict, Union
+import os
+import logging
+
+import numpy as np
+import gym
+from stable_baselines3.common.base_class import BaseAlgorithm
+from stable_baselines3.common.vec_env import DummyVecEnv, VecEnv, VecNormalize
+
+VEC_NORMALIZE_FILE_NAME = 'vec_normalize.pkl'
+
+
+def wrap_with_vec_normalize(
+    environment: Union[gym.Env, VecEnv],
+    normalization_config: Dict,
+) -> VecNormalize:
+    """Wrap an environment with running normalization.
+
+    Args:
+        environment: Environment to be wrapped. Either a single environment or a vectorized one.
+        normalization_config: Keyword arguments of `VecNormalize`, e.g. `norm_obs`, `norm_reward`, `clip_obs`.
+
+    Returns:
+        VecNormalize: Wrapped environment, with statistics being updated.
+    """
+    if not isinstance(environment, VecEnv):
+        environment = DummyVecEnv([lambda: environment])
+
+    return VecNormalize(environment, **normalization_config)
+
+
+def freeze_vec_normalize(vec_normalize: VecNormalize):
+    """Freeze statistics of normalization, and disable reward normalization which is consumed by training only.
+
+    Args:
+        vec_normalize: Normalization to be frozen.
+    """
+    vec_normalize.training = False
+    vec_normalize.norm_reward = False
+
+
+def save_vec_normalize(vec_normalize: VecNormalize, checkpoint_dir: str) -> str:
+    """Save statistics of normalization to the checkpoint directory.
+
+    Args:
+        vec_normalize: Normalization to be saved.
+        checkpoint_dir: Checkpoint directory.
+
+    Returns:
+        str: Path to the saved file.
+    """
+    vec_normalize_path = f'{checkpoint_dir}/{VEC_NORMALIZE_FILE_NAME}'
+    vec_normalize.save(vec_normalize_path)
+    logging.info(f'Normalization saved at: {vec_normalize_path}')
+
+    return vec_normalize_path
+
+
+def load_vec_normalize(checkpoint_dir: str, environment: gym.Env) -> Union[VecNormalize, None]:
+    """Load frozen normalization from the checkpoint directory.
+
+    Args:
+        checkpoint_dir: Checkpoint directory.
+        environment: Environment, only for checking spaces.
+
+    Returns:
+        Union[VecNormalize, None]: Frozen normalization. `None` if the checkpoint is trained without normalization.
+    """
+    vec_normalize_path = f'{checkpoint_dir}/{VEC_NORMALIZE_FILE_NAME}'
+    if not os.path.exists(vec_normalize_path):
+        return None
+    vec_normalize = VecNormalize.load(vec_normalize_path, DummyVecEnv([lambda: environment]))
+    freeze_vec_normalize(vec_normalize)
+    logging.info(f'Normalization loaded from: {vec_normalize_path}')
+
+    return vec_normalize
+
+
+def build_policy_func(
+    algorithm: BaseAlgorithm,
+    vec_normalize: Union[VecNormalize, None] = None,
+) -> Callable[[np.ndarray], np.ndarray]:
+    """Build policy function on raw observation.
+
+    Args:
+        algorithm: Algorithm whose policy consumes normalized observation if `vec_normalize` is provided.
+        vec_normalize: Frozen normalization. `None` for no normalization.
+
+    Returns:
+        Callable[[np.ndarray], np.ndarray]: Policy function, raw observation -> action.
+    """
+    if vec_normalize is None:
+        return lambda observation: algorithm.predict(observation)[0]
+
+    return lambda observation: algorithm.predict(vec_normalize.normalize_obs(observation))[0]
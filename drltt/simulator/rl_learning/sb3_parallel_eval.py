@@ -0,0 +1,227 @@
+"""
+Parallel and sharded evaluation.
+
+Each episode is rolled out with a seed derived from the base seed and its episode index only,
+    thus evaluated episodes are independent of the number of worker processes and of sharding.
+"""
+
+from typing import Any, Callable, Dict, Iterator, Sequence, Tuple, Type, Union
+import io
+import os
+from copy import deepcopy
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch as th
+from stable_baselines3.common.base_class import BaseAlgorithm
+from stable_baselines3.common.utils import set_random_seed
+from stable_baselines3.common.vec_env import VecNormalize
+
+from .sb3_utils import roll_out_one_episode
+from .sb3_normalization import build_policy_func
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.visualization import VISUALIZATION_FUNCTIONS
+
+from drltt_proto.environment.trajectory_tracking_pb2 import TrajectoryTrackingEpisode
+
+# context of evaluation within worker process, set by `_init_worker`
+_WORKER_CONTEXT: Dict[str, Any] = dict()
+
+
+def get_episode_seed(seed: int, episode_index: int) -> int:
+    """Derive the seed of an episode.
+
+    Args:
+        seed: Base seed of evaluation.
+        episode_index: Index of episode.
+
+    Returns:
+        int: Seed of episode.
+    """
+    return int(np.random.SeedSequence((seed, episode_index)).generate_state(1)[0])
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parse shard from string.
+
+    Args:
+        shard: Shard in format of `i/n`, i.e. the i-th (0-based) of n shards.
+
+    Returns:
+        Tuple[int, int]: Shard index and number of shards.
+    """
+    try:
+        shard_index, n_shards = (int(value) for value in shard.split('/'))
+    except ValueError as e:
+        raise ValueError(f'Illegal shard: {shard}, expected format: i/n') from e
+    if not 0 <= shard_index < n_shards:
+        raise ValueError(f'Illegal shard: {shard}, expected 0 <= i < n')
+
+    return shard_index, n_shards
+
+
+def get_shard_file_name(file_name: str, shard: Tuple[int, int]) -> str:
+    """Get name of file of a shard, e.g. `metrics-shard-00001-of-00004.json`. Unchanged if not sharded.
+
+    Args:
+        file_name: Name of file of the whole evaluation.
+        shard: Shard index and number of shards.
+
+    Returns:
+        str: Name of file of the shard.
+    """
+    shard_index, n_shards = shard
+    if n_shards == 1:
+        return file_name
+    base_name, extension = os.path.splitext(file_name)
+
+    return f'{base_name}-shard-{shard_index:05d}-of-{n_shards:05d}{extension}'
+
+
+def get_shard_episode_indices(n_episodes: int, shard: Tuple[int, int]) -> Sequence[int]:
+    """Get indices of episodes of a shard, interleaved for balance among shards.
+
+    Args:
+        n_episodes: Number of episodes of the whole evaluation.
+        shard: Shard index and number of shards.
+
+    Returns:
+        Sequence[int]: Indices of episodes.
+    """
+    shard_index, n_shards = shard
+
+    return range(shard_index, n_episodes, n_shards)
+
+
+def roll_out_and_export_episode(
+    environment: TrajectoryTrackingEnv,
+    policy_func: Callable,
+    episode_index: int,
+    seed: int,
+    visualization_function: Callable,
+    viz_dir: str,
+    viz_interval: int,
+) -> TrajectoryTrackingEpisode:
+    """Roll out a seeded episode, export it, and visualize it at an interval of episodes.
+
+    Args:
+        environment: Evaluation environment.
+        policy_func: Policy function, observation -> action.
+        episode_index: Index of episode.
+        seed: Base seed of evaluation.
+        visualization_function: Visualization function, see `VISUALIZATION_FUNCTIONS`.
+        viz_dir: Directory of visualization.
+        viz_interval: Interval of episodes to be visualized.
+
+    Returns:
+        TrajectoryTrackingEpisode: Evaluated episode.
+    """
+    episode_seed = get_episode_seed(seed, episode_index)
+    # seed `random`, `np.random`, and `torch`, as well as the environment
+    set_random_seed(episode_seed)
+    environment.seed(episode_seed)
+    roll_out_one_episode(environment, policy_func)
+
+    # only the current episode is consumed
+    env_data = environment.export_environment_data(n_archived_episodes=0)
+    if episode_index % viz_interval == 0:
+        # TODO: consider moving it to env.render()
+        visualization_function(env_data, f'{viz_dir}/{episode_index}')
+
+    return env_data.trajectory_tracking.episode
+
+
+def _init_worker(
+    env_config: Dict[str, Any],
+    recording_level: str,
+    algorithm_class: Type[BaseAlgorithm],
+    algorithm_data: bytes,
+    device: str,
+    vec_normalize: Union[VecNormalize, None],
+    seed: int,
+    visualization_function_name: str,
+    viz_dir: str,
+    viz_interval: int,
+):
+    # workers share CPU cores
+    th.set_num_threads(1)
+    environment: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, deepcopy(env_config), recording_level=recording_level
+    )
+    algorithm = algorithm_class.load(io.BytesIO(algorithm_data), device=device)
+    _WORKER_CONTEXT.update(
+        environment=environment,
+        policy_func=build_policy_func(algorithm, vec_normalize),
+        seed=seed,
+        visualization_function=VISUALIZATION_FUNCTIONS[visualization_function_name],
+        viz_dir=viz_dir,
+        viz_interval=viz_interval,
+    )
+
+
+def _roll_out_in_worker(episode_index: int) -> bytes:
+    episode = roll_out_and_export_episode(episode_index=episode_index, **_WORKER_CONTEXT)
+
+    return episode.SerializeToString()
+
+
+def roll_out_episodes_in_parallel(
+    env_config: Dict[str, Any],
+    recording_level: str,
+    algorithm: BaseAlgorithm,
+    vec_normalize: Union[VecNormalize, None],
+    episode_indices: Sequence[int],
+    seed: int,
+    n_workers: int,
+    visualization_function_name: str,
+    viz_dir: str,
+    viz_interval: int,
+    start_method: Union[str, None] = None,
+) -> Iterator[TrajectoryTrackingEpisode]:
+    """Roll out episodes on a pool of worker processes, each with its own environment and copy of algorithm.
+
+    Args:
+        env_config: Config of evaluation environment.
+        recording_level: Recording level of evaluation environment.
+        algorithm: The algorithm with models to be evaluated, copied to workers.
+        vec_normalize: Frozen normalization of observation. `None` for no normalization.
+        episode_indices: Indices of episodes.
+        seed: Base seed of evaluation.
+        n_workers: Number of worker processes.
+        visualization_function_name: Name of `visualization_function`.
+        viz_dir: Directory of visualization.
+        viz_interval: Interval of episodes to be visualized.
+        start_method: Start method of `multiprocessing`. Default to 'forkserver' if available, otherwise 'spawn'.
+
+    Yields:
+        TrajectoryTrackingEpisode: Evaluated episodes, in the order of `episode_indices`.
+    """
+    if start_method is None:
+        start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+    algorithm_buffer = io.BytesIO()
+    algorithm.save(algorithm_buffer)
+    init_args = (
+        env_config,
+        recording_level,
+        type(algorithm),
+        algorithm_buffer.getvalue(),
+        str(algorithm.device),
+        vec_normalize,
+        seed,
+        visualization_function_name,
+        viz_dir,
+        viz_interval,
+    )
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=mp.get_context(start_method),
+        initializer=_init_worker,
+        initargs=init_args,
+    ) as executor:
+        for episode_data in executor.map(_roll_out_in_worker, episode_indices):
+            episode = TrajectoryTrackingEpisode()
+            episode.ParseFromString(episode_data)
+            yield episode
@@ -1,7 +1,14 @@
-from .random_walk import random_walk
+from .random_walk import random_walk, batch_random_walk, build_random_walk_protos
 from .reference_line import ReferenceLineManager
+from .reference_line_pool import ReferenceLinePool, generate_reference_line_pool
+from .reference_line_prefetcher import ReferenceLinePrefetcher
 
 __all__ = [
     'random_walk',
+    'batch_random_walk',
+    'build_random_walk_protos',
     'ReferenceLineManager',
+    'ReferenceLinePool',
+    'generate_reference_line_pool',
+    'ReferenceLinePrefetcher',
 ]
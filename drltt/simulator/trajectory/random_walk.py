@@ -1,9 +1,10 @@
-from typing import Tuple
+from typing import Any, Dict, Iterator, Sequence, Tuple, Union
 
 import numpy as np
 from gym.spaces import Space
 
-from drltt.simulator.dynamics_models import BaseDynamicsModel
+from drltt.simulator import DTYPE
+from drltt.simulator.dynamics_models import BaseDynamicsModel, BicycleModel
 
 from drltt_proto.trajectory.trajectory_pb2 import ReferenceLineWaypoint, ReferenceLine, TrajectoryWaypoint, Trajectory
 
@@ -34,7 +35,8 @@ def random_walk(
     all_actions = list()
     for step_idx in range(walk_length - 1):
         state: np.ndarray = dynamics_model.get_state()
-        action: np.ndarray = action_space.sample()
+        # sample with `np.random` rather than `action_space.sample()` whose generator is not seeded by environment
+        action: np.ndarray = np.random.uniform(action_space.low, action_space.high).astype(action_space.dtype)
 
         all_states.append(state)
         all_actions.append(action)
@@ -42,11 +44,147 @@ def random_walk(
         dynamics_model.step(action, step_interval)
 
     all_states.append(dynamics_model.get_state())
-    all_actions.append(np.zeros_like(all_actions[-1]))
+    all_actions.append(np.zeros(action_space.shape, dtype=action_space.dtype))
 
+    return build_random_walk_protos(np.stack(all_states, axis=0), np.stack(all_actions, axis=0), dynamics_model)
+
+
+def batch_random_walk(
+    init_states: np.ndarray,
+    walk_lengths: np.ndarray,
+    step_interval: float,
+    rearwheel_to_cog: np.ndarray,
+    cog_relative_position_between_axles: np.ndarray,
+    max_lat_acc: np.ndarray,
+    action_space_lb: np.ndarray,
+    action_space_ub: np.ndarray,
+    integrator: Union[str, Sequence[str]] = 'euler',
+    n_substeps: Union[int, np.ndarray] = 1,
+    max_walk_length: Union[int, None] = None,
+    rng: Union[np.random.Generator, None] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Perform random walks of bicycle models in batch, vectorized over walks.
+
+    Follows the semantics of `random_walk`, i.e. the last action of each walk is zero.
+    Data beyond the length of a walk are padded with the last state and zero action.
+    Hyper-parameter arguments are broadcastable to the batch, thus walks may have different dynamics models.
+    Walks are integrated as their dynamics models step, grouped by integration settings.
+
+    Args:
+        init_states: Initial states, shape=(B, 4).
+        walk_lengths: Lengths of walks, shape=(B,).
+        step_interval: Time interval of a step.
+        rearwheel_to_cog: Distances between rear axle and CoG, shape=(B,).
+        cog_relative_position_between_axles: Relative positions of CoG between axles, shape=(B,).
+        max_lat_acc: Maximum lateral accelerations, shape=(B,).
+        action_space_lb: Lower bounds of action spaces, shape=(B, 2).
+        action_space_ub: Upper bounds of action spaces, shape=(B, 2).
+        integrator: Numerical integrators, see `INTEGRATORS`, shape=(B,).
+        n_substeps: Numbers of sub-steps of integration, shape=(B,).
+        max_walk_length: Length of the output arrays. Default to the maximum of `walk_lengths`.
+        rng: Random number generator for sampling actions. Default to `np.random`.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Random walk results:
+
+        * np.ndarray: States, shape=(B, L, 4).
+        * np.ndarray: Actions, shape=(B, L, 2).
+        * np.ndarray: Masks of valid steps, shape=(B, L).
+    """
+    walk_lengths = np.asarray(walk_lengths)
+    assert np.all(walk_lengths >= 1), f'Illegal walk_lengths: {walk_lengths}'
+    batch_size = len(walk_lengths)
+    if max_walk_length is None:
+        max_walk_length = int(walk_lengths.max())
+    step_indices = np.arange(max_walk_length)[np.newaxis, :]
+    masks = step_indices < walk_lengths[:, np.newaxis]
+
+    action_space_lb = np.broadcast_to(action_space_lb, (batch_size, 2))
+    action_space_ub = np.broadcast_to(action_space_ub, (batch_size, 2))
+    if rng is None:
+        rng = np.random
+    actions = rng.uniform(
+        action_space_lb[:, np.newaxis], action_space_ub[:, np.newaxis], (batch_size, max_walk_length, 2)
+    )
+    # the last action is zero, as well as padded actions
+    actions[step_indices >= walk_lengths[:, np.newaxis] - 1] = 0.0
+    actions = actions.astype(DTYPE)
+
+    dynamics_parameters = dict(
+        rearwheel_to_cog=np.broadcast_to(rearwheel_to_cog, (batch_size,)),
+        cog_relative_position_between_axles=np.broadcast_to(cog_relative_position_between_axles, (batch_size,)),
+        max_lat_acc=np.broadcast_to(max_lat_acc, (batch_size,)),
+    )
+    groups = list(_split_by_integration_settings(integrator, n_substeps, batch_size))
+
+    states = np.empty((batch_size, max_walk_length, 4), dtype=DTYPE)
+    states[:, 0] = init_states
+    next_states = np.empty((batch_size, 4), dtype=DTYPE)
+    for step_idx in range(max_walk_length - 1):
+        for integration_settings, rows in groups:
+            next_states[rows] = BicycleModel.compute_batch_next_states(
+                states[rows, step_idx],
+                actions[rows, step_idx],
+                delta_t=step_interval,
+                **{name: values[rows] for name, values in dynamics_parameters.items()},
+                **integration_settings,
+            )
+        # hold the last state after the end of walk
+        states[:, step_idx + 1] = np.where(masks[:, step_idx + 1, np.newaxis], next_states, states[:, step_idx])
+
+    return states, actions, masks
+
+
+def _split_by_integration_settings(
+    integrator: Union[str, Sequence[str]],
+    n_substeps: Union[int, np.ndarray],
+    batch_size: int,
+) -> Iterator[Tuple[Dict[str, Any], Union[slice, np.ndarray]]]:
+    """Split a batch into groups sharing integration settings, see `BicycleModelParameterTable`.
+
+    Args:
+        integrator: Numerical integrators, broadcastable to shape=(B,).
+        n_substeps: Numbers of sub-steps of integration, broadcastable to shape=(B,).
+        batch_size: Size of batch.
+
+    Yields:
+        Tuple[Dict[str, Any], Union[slice, np.ndarray]]: Integration settings and rows of the group in the batch.
+    """
+    integrators = np.broadcast_to(np.asarray(integrator, dtype=object), (batch_size,)).tolist()
+    all_n_substeps = np.broadcast_to(n_substeps, (batch_size,)).tolist()
+    settings = list(zip(integrators, all_n_substeps))
+    unique_settings = list(dict.fromkeys(settings))
+    if len(unique_settings) == 1:
+        yield dict(integrator=unique_settings[0][0], n_substeps=unique_settings[0][1]), slice(None)
+        return
+    setting_indices = np.array([unique_settings.index(setting) for setting in settings])
+    for setting_index, (setting_integrator, setting_n_substeps) in enumerate(unique_settings):
+        yield dict(integrator=setting_integrator, n_substeps=setting_n_substeps), np.flatnonzero(
+            setting_indices == setting_index
+        )
+
+
+def build_random_walk_protos(
+    states: np.ndarray,
+    actions: np.ndarray,
+    dynamics_model: BaseDynamicsModel,
+) -> Tuple[ReferenceLine, Trajectory]:
+    """Build protos of a random walk from its arrays, e.g. one walk out of `batch_random_walk` trimmed to its length.
+
+    Args:
+        states: States, shape=(L, state_dim).
+        actions: Actions, shape=(L, action_dim).
+        dynamics_model: Dynamics model for serialization.
+
+    Returns:
+        Tuple[ReferenceLine, Trajectory]: Random walk results:
+
+        * ReferenceLine: Generated reference line.
+        * Trajectory: Generated trajectory.
+    """
     reference_line = ReferenceLine()
     trajectory = Trajectory()
-    for state, action in zip(all_states, all_actions):
+    for state, action in zip(states, actions):
         ref_wpt = ReferenceLineWaypoint()
         ref_wpt.x = state[0]
         ref_wpt.y = state[1]
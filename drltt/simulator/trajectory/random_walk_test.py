@@ -1,7 +1,7 @@
 import numpy as np
 
-from drltt.simulator.dynamics_models import BicycleModel
-from drltt.simulator.trajectory.random_walk import random_walk
+from drltt.simulator.dynamics_models import BicycleModel, BicycleModelParameterTable
+from drltt.simulator.trajectory.random_walk import random_walk, batch_random_walk, build_random_walk_protos
 
 
 def test_random_walk():
@@ -20,5 +20,89 @@ def test_random_walk():
     assert len(trajectory.waypoints) == 60
 
 
+def test_batch_random_walk():
+    dynamics_model = BicycleModel(
+        front_overhang=0.9,
+        rear_overhang=0.9,
+        wheelbase=2.7,
+        width=1.8,
+        action_space_lb=[-3.0, -0.5235987755983],
+        action_space_ub=[+3.0, +0.5235987755983],
+        max_lat_acc=4.0,
+    )
+    action_space = dynamics_model.get_action_space()
+    walk_lengths = np.array((60, 1, 25))
+    init_states = np.array(((0.0, 0.0, 0.0, 10.0), (1.0, 2.0, 3.0, 4.0), (-5.0, 5.0, -1.0, 20.0)))
+    states, actions, masks = batch_random_walk(
+        init_states,
+        walk_lengths,
+        step_interval=0.1,
+        rearwheel_to_cog=dynamics_model.hyper_parameter.bicycle_model.rearwheel_to_cog,
+        cog_relative_position_between_axles=dynamics_model.cog_relative_position_between_axles,
+        max_lat_acc=dynamics_model.hyper_parameter.bicycle_model.max_lat_acc,
+        action_space_lb=action_space.low,
+        action_space_ub=action_space.high,
+    )
+
+    assert states.shape == (3, 60, 4)
+    assert actions.shape == (3, 60, 2)
+    assert np.array_equal(masks.sum(axis=1), walk_lengths)
+    assert np.allclose(states[:, 0], init_states)
+    for walk_idx, walk_length in enumerate(walk_lengths):
+        # the last action is zero and padded with the last state
+        assert np.all(actions[walk_idx, walk_length - 1 :] == 0.0)
+        assert np.all(states[walk_idx, walk_length - 1 :] == states[walk_idx, walk_length - 1])
+        # replay with the unbatched dynamics model
+        dynamics_model.set_state(init_states[walk_idx])
+        for step_idx in range(walk_length - 1):
+            assert np.all(actions[walk_idx, step_idx] >= action_space.low)
+            assert np.all(actions[walk_idx, step_idx] <= action_space.high)
+            dynamics_model.step(actions[walk_idx, step_idx], delta_t=0.1)
+            assert np.allclose(dynamics_model.get_state()[:2], states[walk_idx, step_idx + 1, :2], atol=1e-3)
+
+    reference_line, trajectory = build_random_walk_protos(
+        states[2, : walk_lengths[2]], actions[2, : walk_lengths[2]], dynamics_model
+    )
+    assert len(reference_line.waypoints) == len(trajectory.waypoints) == walk_lengths[2]
+
+
+def test_batch_random_walk_integrators():
+    # walks in a batch follow integration settings of their own dynamics models
+    all_integration_settings = (dict(integrator='euler', n_substeps=1), dict(integrator='rk4', n_substeps=2))
+    dynamics_models = [
+        BicycleModel(
+            front_overhang=0.9,
+            rear_overhang=0.9,
+            wheelbase=2.7,
+            width=1.8,
+            action_space_lb=[-3.0, -0.5235987755983],
+            action_space_ub=[+3.0, +0.5235987755983],
+            **integration_settings,
+        )
+        for integration_settings in all_integration_settings
+    ]
+    parameter_table = BicycleModelParameterTable(dynamics_models)
+    dynamics_model_indices = np.array((1, 0, 1))
+    walk_length = 30
+    init_states = np.array(((0.0, 0.0, 0.0, 10.0), (1.0, 2.0, 3.0, 4.0), (-5.0, 5.0, -1.0, 20.0)))
+    states, actions, _ = batch_random_walk(
+        init_states,
+        np.full((3,), walk_length),
+        step_interval=0.5,
+        **parameter_table.gather_dynamics_parameters(dynamics_model_indices),
+        **parameter_table.gather_action_space_bounds(dynamics_model_indices),
+        **parameter_table.gather_batch_integration_settings(dynamics_model_indices),
+    )
+
+    for walk_idx, dynamics_model_index in enumerate(dynamics_model_indices):
+        dynamics_model = dynamics_models[dynamics_model_index]
+        dynamics_model.set_state(init_states[walk_idx])
+        for step_idx in range(walk_length - 1):
+            dynamics_model.step(actions[walk_idx, step_idx], delta_t=0.5)
+            assert np.allclose(dynamics_model.get_state()[:2], states[walk_idx, step_idx + 1, :2], atol=1e-3)
+
+
 if __name__ == '__main__':
     test_random_walk()
+    test_batch_random_walk()
+    test_batch_random_walk_integrators()
@@ -1,89 +1,249 @@
+from typing import Tuple, Union
+
 import numpy as np
 import gym
 from gym.spaces import Space
+from scipy.spatial import cKDTree
 
-from drltt.common.geometry import transform_to_local_from_world
-from drltt.simulator import DTYPE
+from drltt.common.geometry import batch_transform_to_local_from_world
+from drltt.simulator import DTYPE, EPSILON
 
 from drltt_proto.trajectory.trajectory_pb2 import ReferenceLine, ReferenceLineWaypoint
 from drltt_proto.dynamics_model.basics_pb2 import BodyState
 from drltt_proto.dynamics_model.state_pb2 import State
 from drltt_proto.environment.trajectory_tracking_pb2 import TrajectoryTrackingEpisode
 
+# modes of selecting the first observed waypoint: of the current step, or nearest to the projection of state
+REFERENCE_LINE_OBSERVATION_MODES = ('index', 'projection')
+
+
+def _project_point_to_segments(
+    point: np.ndarray,
+    segment_starts: np.ndarray,
+    segment_vectors: np.ndarray,
+    segment_inv_sq_lengths: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Project a point onto segments, vectorized over segments.
+
+    Args:
+        point: Point to be projected, shape=(2,).
+        segment_starts: Start points of segments, shape=(S, 2).
+        segment_vectors: Vectors from start points to end points of segments, shape=(S, 2).
+        segment_inv_sq_lengths: Inverse squared lengths of segments, shape=(S,).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Ratios of projections along segments within [0, 1]
+            and squared distances from the point to segments, both shape=(S,).
+    """
+    offsets = point - segment_starts
+    ratios = np.clip(np.einsum('ij,ij->i', offsets, segment_vectors) * segment_inv_sq_lengths, 0.0, 1.0)
+    residuals = offsets - ratios[:, np.newaxis] * segment_vectors
+    sq_dists = np.einsum('ij,ij->i', residuals, residuals)
+
+    return ratios, sq_dists
+
 
 class ReferenceLineManager:
     """Manager for Reference Line.
 
+    The reference line is held as contiguous arrays. Protos are built only on demand, e.g. for export.
+
+    Projection queries are answered with a segment index over the tracked part of the reference line.
+    A query first searches a local window around the previous projection (warm start), which is amortized O(1)
+    when the body moves continuously. It falls back to a KD-tree over segment midpoints, which is O(log L)
+    and is built at most once per reference line, on the first fallback.
+
     Attributes:
-        reference_line: Handler of underlying reference line manager.
+        waypoints: Padded reference line, shape=(L, 2).
+        raw_waypoints: Raw reference line as set, shape=(L_raw, 2). Can be a read-only view, e.g. of memory map.
+        tracking_length: Tracking length of reference line.
         pad_mode: Mode used for reference line padding.
         dtype: Data type for reference line representation and observation
+        warm_start_window: Number of segments searched on each side of the previous projection.
 
     """
 
-    reference_line: ReferenceLine
-    raw_reference_line: ReferenceLine
+    waypoints: np.ndarray
+    raw_waypoints: np.ndarray
+    tracking_length: int
     pad_mode: str
     dtype: np.dtype
+    warm_start_window: int
 
     def __init__(
         self,
         n_observation_steps: int,
         pad_mode: str = 'none',
         dtype: np.dtype = DTYPE,
+        warm_start_window: int = 4,
     ):
         """
         Args:
             n_observation_steps: Number of observation steps on the forward part of the reference line.
             pad_mode: Desired mode used for reference line padding.
             dtype: Desired data type.
+            warm_start_window: Number of segments searched on each side of the previous projection.
         """
         self.n_observation_steps = n_observation_steps
         self.pad_mode = pad_mode
         self.dtype = dtype
+        self.warm_start_window = warm_start_window
+        # tracked waypoints over which the segment index is built, `None` if not built yet
+        self._indexed_waypoints: Union[np.ndarray, None] = None
+        self._projected_segment_index: Union[int, None] = None
 
     def set_reference_line(
         self,
-        reference_line: ReferenceLine,
+        reference_line: Union[ReferenceLine, np.ndarray],
         tracking_length: int = 0,
     ):
         """Set reference line.
 
         Args:
-            reference_line: Reference line to be set.
+            reference_line: Reference line to be set, either in proto or in array with shape=(L, 2).
+                Array is stored by reference if its data type matches, thus should not be modified.
             tracking_length: Desired tracking length of reference line.
         """
-        self.raw_reference_line = ReferenceLine()
-        self.raw_reference_line.CopyFrom(reference_line)
-
-        self.reference_line = ReferenceLine()
-        self.reference_line.CopyFrom(reference_line)
+        if isinstance(reference_line, ReferenceLine):
+            self.raw_waypoints = self.reference_line_to_np_array(reference_line, dtype=self.dtype)
+        else:
+            self.raw_waypoints = np.ascontiguousarray(reference_line, dtype=self.dtype)
 
         if tracking_length <= 0:
-            tracking_length = len(self.reference_line.waypoints)
+            tracking_length = len(self.raw_waypoints)
 
         # padding
         # (tracking_length + n_observation_steps) is required as the last observation need to be returned at waypoints[tracking_length]
         if self.pad_mode == 'none':
-            pass
+            self.waypoints = self.raw_waypoints
         elif self.pad_mode == 'repeat':
-            del self.reference_line.waypoints[tracking_length:]  # remove last `n_observation_steps` padded elements
-            n_repeat = self.n_observation_steps
-            last_waypoint = self.reference_line.waypoints[-1]
-            for _ in range(n_repeat):
-                repeated_waypoint = ReferenceLineWaypoint()
-                repeated_waypoint.CopyFrom(last_waypoint)
-                self.reference_line.waypoints.append(last_waypoint)
+            # remove waypoints beyond tracking length and repeat the last one for `n_observation_steps` times
+            self.waypoints = np.empty((tracking_length + self.n_observation_steps, 2), dtype=self.dtype)
+            self.waypoints[:tracking_length] = self.raw_waypoints[:tracking_length]
+            self.waypoints[tracking_length:] = self.raw_waypoints[tracking_length - 1]
         else:
             raise ValueError(f'Unknown `pad_mode`: {self.pad_mode}')
+        self.tracking_length = tracking_length
+
+        # segment index is kept if the tracked part is unchanged, otherwise rebuilt on the next projection
+        if self._indexed_waypoints is not None and not np.array_equal(
+            self.waypoints[: max(tracking_length, 1)], self._indexed_waypoints
+        ):
+            self._indexed_waypoints = None
+        self._projected_segment_index = None
+
+    def _build_segment_index(self):
+        """Build segment arrays over the tracked part of the reference line for projection queries.
+
+        A reference line with a single waypoint is treated as one degenerate segment.
+        The KD-tree is reset and built lazily by `_query_segment_tree`.
+        """
+        self._indexed_waypoints = self.waypoints[: max(self.tracking_length, 1)].copy()
+        points = self._indexed_waypoints.astype(np.float64)
+        if len(points) >= 2:
+            self._segment_starts = points[:-1]
+            self._segment_vectors = points[1:] - points[:-1]
+        else:
+            self._segment_starts = points
+            self._segment_vectors = np.zeros_like(points)
+        sq_lengths = np.einsum('ij,ij->i', self._segment_vectors, self._segment_vectors)
+        self._segment_inv_sq_lengths = 1.0 / np.maximum(sq_lengths, EPSILON)
+        self._max_segment_half_length = 0.5 * float(np.sqrt(sq_lengths.max()))
+        self._segment_tree: Union[cKDTree, None] = None
+
+    def _query_segment_tree(self, point: np.ndarray) -> np.ndarray:
+        """Query indices of candidate segments which contain the nearest one, with KD-tree over segment midpoints.
+
+        Args:
+            point: Query point, shape=(2,).
+
+        Returns:
+            np.ndarray: Indices of candidate segments.
+        """
+        if self._segment_tree is None:
+            self._segment_tree = cKDTree(self._segment_starts + 0.5 * self._segment_vectors)
+        _, nearest_index = self._segment_tree.query(point)
+        _, sq_dists = _project_point_to_segments(
+            point,
+            self._segment_starts[nearest_index : nearest_index + 1],
+            self._segment_vectors[nearest_index : nearest_index + 1],
+            self._segment_inv_sq_lengths[nearest_index : nearest_index + 1],
+        )
+        # any segment closer than the nearest-midpoint one has its midpoint within this radius
+        radius = float(np.sqrt(sq_dists[0])) + self._max_segment_half_length
+        candidate_indices = self._segment_tree.query_ball_point(point, radius * (1.0 + EPSILON) + EPSILON)
+
+        return np.asarray(candidate_indices, dtype=np.int64)
+
+    def project(self, point: np.ndarray, warm_start: bool = True) -> Tuple[int, float, float]:
+        """Project a point onto the tracked part of the reference line.
+
+        With warm start, segments within `warm_start_window` around the previous projection are searched first.
+        The local result is accepted if it does not lie on the boundary of the window
+            and is within the maximum segment length, otherwise the query falls back to the KD-tree.
+
+        Args:
+            point: Point to be projected, shape=(2,).
+            warm_start: Whether to search around the previous projection first.
+
+        Returns:
+            Tuple[int, float, float]: Projection result:
+
+            * int: Index of the nearest segment, i.e. the segment between waypoints `index` and `index + 1`.
+            * float: Ratio of projection along the segment within [0, 1].
+            * float: Distance from the point to the reference line.
+        """
+        if self._indexed_waypoints is None:
+            self._build_segment_index()
+        point = np.asarray(point, dtype=np.float64)[:2]
+        n_segments = len(self._segment_starts)
+
+        segment_index = None
+        if warm_start and self._projected_segment_index is not None:
+            window_start = max(self._projected_segment_index - self.warm_start_window, 0)
+            window_end = min(self._projected_segment_index + self.warm_start_window + 1, n_segments)
+            ratios, sq_dists = _project_point_to_segments(
+                point,
+                self._segment_starts[window_start:window_end],
+                self._segment_vectors[window_start:window_end],
+                self._segment_inv_sq_lengths[window_start:window_end],
+            )
+            local_index = int(np.argmin(sq_dists))
+            segment_index = window_start + local_index
+            on_boundary = (local_index == 0 and window_start > 0) or (
+                local_index == window_end - window_start - 1 and window_end < n_segments
+            )
+            too_far = sq_dists[local_index] > (2.0 * self._max_segment_half_length) ** 2
+            if on_boundary or too_far:
+                segment_index = None
+
+        if segment_index is None:
+            candidate_indices = self._query_segment_tree(point)
+            ratios, sq_dists = _project_point_to_segments(
+                point,
+                self._segment_starts[candidate_indices],
+                self._segment_vectors[candidate_indices],
+                self._segment_inv_sq_lengths[candidate_indices],
+            )
+            local_index = int(np.argmin(sq_dists))
+            segment_index = int(candidate_indices[local_index])
+
+        self._projected_segment_index = segment_index
+
+        return segment_index, float(ratios[local_index]), float(np.sqrt(sq_dists[local_index]))
+
+    @property
+    def raw_reference_line(self) -> ReferenceLine:
+        """Raw reference line in proto, built on demand."""
+        return self.np_array_to_reference_line(self.raw_waypoints)
 
     def get_reference_line(self) -> ReferenceLine:
-        """Return the underlying reference line.
+        """Return the underlying (padded) reference line in proto, built on demand.
 
         Returns:
             ReferenceLine: Returned reference line
         """
-        return self.reference_line
+        return self.np_array_to_reference_line(self.waypoints)
 
     def get_reference_line_waypoint(self, index: int) -> np.ndarray:
         """Get a waypoint on the reference line.
@@ -92,17 +252,12 @@ class ReferenceLineManager:
             index: Step index of the desired waypoint.
 
         Returns:
-            np.ndarray: Reference line waypoint (vectorized form).
+            np.ndarray: Reference line waypoint (vectorized form), a read-only view.
         """
-        waypoint = np.array(
-            (
-                self.reference_line.waypoints[index].x,
-                self.reference_line.waypoints[index].y,
-            ),
-            dtype=DTYPE,
-        )
+        view = self.waypoints[index]
+        view.flags.writeable = False
 
-        return waypoint
+        return view
 
     def get_observation_space(self) -> Space:
         """Get observation space.
@@ -119,12 +274,18 @@ class ReferenceLineManager:
         )
         return observation_space
 
-    def get_observation_by_index(self, episode_data, body_state: BodyState) -> np.ndarray:
+    def get_observation_by_index(
+        self,
+        episode_data,
+        body_state: BodyState,
+        out: Union[np.ndarray, None] = None,
+    ) -> np.ndarray:
         """Get vectorized observation of reference line given waypoint index.
 
         Args:
             episode_data: Episode data.
             body_state: Body state for ego-centric observation.
+            out: Output buffer, shape=(observation_dim,). Default to a newly allocated array.
 
         Returns:
             np.ndarray: Vectorized reference line observation. Format: (x, y) x length.
@@ -133,83 +294,117 @@ class ReferenceLineManager:
         # TODO: resolve hardcode
         index = episode_data.step_index
         tracking_length = episode_data.tracking_length
-        forward_tracking_length = tracking_length - index
 
-        if index + self.n_observation_steps >= len(self.reference_line.waypoints) + 1:
+        return self._get_observation_at_index(index, tracking_length - index, body_state, out=out)
+
+    def _get_observation_at_index(
+        self,
+        index: int,
+        forward_tracking_length: int,
+        body_state: BodyState,
+        out: Union[np.ndarray, None] = None,
+    ) -> np.ndarray:
+        """Get vectorized observation of reference line starting from a waypoint.
+
+        Args:
+            index: Index of the first observed waypoint.
+            forward_tracking_length: Remaining tracking length, appended to the observation.
+            body_state: Body state for ego-centric observation.
+            out: Output buffer, shape=(observation_dim,). Default to a newly allocated array.
+
+        Returns:
+            np.ndarray: Vectorized reference line observation. Format: (x, y) x length.
+        """
+        if index + self.n_observation_steps >= len(self.waypoints) + 1:
             raise ValueError(
                 f'Getting observation from index {index} of length {self.n_observation_steps} will cause out-of-bound'
-                f' error. The length of reference line is {len(self.reference_line.waypoints)}'
+                f' error. The length of reference line is {len(self.waypoints)}'
             )
 
-        waypoint_list = list()
-        for observed_waypoint in self.reference_line.waypoints[index : index + self.n_observation_steps]:
-            waypoint = np.array(
-                (
-                    observed_waypoint.x,
-                    observed_waypoint.y,
-                ),
-                dtype=DTYPE,
-            )
-            waypoint_list.append(waypoint)
-        all_waypoints = np.stack(waypoint_list, axis=0)  # (n_observation_steps, 2)
+        all_waypoints = self.waypoints[index : index + self.n_observation_steps]  # (n_observation_steps, 2), view
+        if out is None:
+            out = np.empty((2 * self.n_observation_steps + 1,), dtype=self.dtype)
 
-        # transform coordinate to body frame
+        # transform coordinate to body frame, written into the leading part of the buffer
         body_state_vec = np.array((body_state.x, body_state.y, body_state.r))
-        all_waypoints_in_body_frame = transform_to_local_from_world(all_waypoints, body_state_vec)
-        observation = all_waypoints_in_body_frame.reshape(-1)
+        batch_transform_to_local_from_world(
+            all_waypoints, body_state_vec, out=out[:-1].reshape(self.n_observation_steps, 2)
+        )
+        out[-1] = forward_tracking_length
 
-        observation = np.concatenate(
-            (
-                observation,
-                np.array((forward_tracking_length,), dtype=DTYPE),
-            )
-        ).reshape(-1)
+        return out
+
+    def get_observation_by_state(
+        self,
+        body_state: BodyState,
+        reference_line: ReferenceLine = None,
+        out: Union[np.ndarray, None] = None,
+    ) -> np.ndarray:
+        """Get vectorized observation of reference line starting from the waypoint projected from body state.
 
-        return observation
+        Unlike `get_observation_by_index`, the observation follows the body when it drifts off the time index.
+
+        Args:
+            body_state: Body state for projection and ego-centric observation.
+            reference_line: Reference line to be set before observation. Default to the current one.
+            out: Output buffer, shape=(observation_dim,). Default to a newly allocated array.
+
+        Returns:
+            np.ndarray: Vectorized reference line observation. Format: (x, y) x length.
+        """
+        if reference_line is not None:
+            self.set_reference_line(reference_line)
+        index = self.get_projected_waypoint_index(body_state)
+        # unpadded reference line ends within the observation window near its end
+        index = max(min(index, len(self.waypoints) - self.n_observation_steps), 0)
 
-    def get_observation_by_state(self, body_state: BodyState, reference_line: ReferenceLine = None) -> np.ndarray:
-        """TODO: to implement"""
-        raise NotImplementedError
+        return self._get_observation_at_index(index, self.tracking_length - index, body_state, out=out)
 
-    def get_projected_waypoint_index(self, body_state: BodyState) -> np.ndarray:
-        """TODO: to implement"""
-        raise NotImplementedError
+    def get_projected_waypoint_index(self, body_state: BodyState) -> int:
+        """Get index of the waypoint nearest to the projection of body state onto the reference line.
+
+        Args:
+            body_state: Body state to be projected.
+
+        Returns:
+            int: Index of the projected waypoint, within [0, tracking_length).
+        """
+        segment_index, ratio, _ = self.project(np.array((body_state.x, body_state.y)))
+        index = segment_index + int(ratio > 0.5)
+
+        return min(index, max(self.tracking_length - 1, 0))
 
     @classmethod
     def np_array_to_reference_line(cls, arr: np.ndarray) -> ReferenceLine:
         assert arr.ndim == 2
         assert arr.shape[1] == 2
         reference_line = ReferenceLine()
-        for np_pt in arr:
-            waypoint = ReferenceLineWaypoint(
-                x=np_pt[0],
-                y=np_pt[1],
-            )
-            reference_line.waypoints.append(waypoint)
+        reference_line.waypoints.extend(ReferenceLineWaypoint(x=x, y=y) for x, y in arr.tolist())
 
         return reference_line
 
     @classmethod
-    def reference_line_to_np_array(cls, reference_line: ReferenceLine) -> np.ndarray:
-        waypoints = list()
-        for waypoint in reference_line.waypoints:
-            waypoints.append(np.array((waypoint.x, waypoint.y)))
-
-        waypoints = np.stack(waypoints, axis=0)
+    def reference_line_to_np_array(cls, reference_line: ReferenceLine, dtype: np.dtype = np.float64) -> np.ndarray:
+        waypoints = np.array(
+            [(waypoint.x, waypoint.y) for waypoint in reference_line.waypoints],
+            dtype=dtype,
+        ).reshape(-1, 2)
 
         return waypoints
 
     @classmethod
     def estimate_init_state_from_reference_line(
-        cls, reference_line: ReferenceLine, delta_t: float, window_size: int = 5
+        cls, reference_line: Union[ReferenceLine, np.ndarray], delta_t: float, window_size: int = 5
     ) -> State:
-        length = len(reference_line.waypoints)
+        if isinstance(reference_line, ReferenceLine):
+            reference_line = cls.reference_line_to_np_array(reference_line)
+        length = len(reference_line)
         if length < 1:
             raise ValueError(f'Reference line\'s length is too short: {length}')
 
         discount_factor = 1 / np.exp(1.0)
         real_window_size = min(window_size, length)
-        window_refline = cls.reference_line_to_np_array(reference_line)[:real_window_size]  # (N-1, 2)
+        window_refline = np.asarray(reference_line[:real_window_size], dtype=np.float64)  # (N-1, 2)
         window_refline_diffs = window_refline[1:] - window_refline[:-1]  # (N-1, 2)
         window_refline_disps = np.linalg.norm(window_refline_diffs, axis=1).reshape(-1, 1)  # (N-1, 1)
         weights = np.power(discount_factor, np.arange(real_window_size - 1)).reshape(-1, 1)  # (N-1, 1)
@@ -0,0 +1,190 @@
+from typing import Tuple
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from drltt.simulator import DTYPE
+from drltt.simulator.dynamics_models import DynamicsModelManager
+from drltt.simulator.trajectory.random_walk import batch_random_walk
+
+from drltt_proto.environment.trajectory_tracking_pb2 import TrajectoryTrackingHyperParameter
+
+REFERENCE_LINE_POOL_META_FILENAME = 'meta.json'
+REFERENCE_LINE_POOL_ARRAY_NAMES = ('offsets', 'waypoints', 'init_states', 'dynamics_model_indices')
+
+
+def compute_reference_line_pool_hash(hyper_parameter: TrajectoryTrackingHyperParameter) -> str:
+    """Compute hash of the hyper-parameter fields that determine the distribution of reference lines.
+
+    Fields irrelevant to generation (e.g. `n_observation_steps`) are excluded,
+        thus a pool can be shared among environments that only differ in these fields.
+
+    Args:
+        hyper_parameter: Hyper-parameter of the environment.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest.
+    """
+    generation_hyper_parameter = TrajectoryTrackingHyperParameter()
+    generation_hyper_parameter.step_interval = hyper_parameter.step_interval
+    generation_hyper_parameter.tracking_length_lb = hyper_parameter.tracking_length_lb
+    generation_hyper_parameter.tracking_length_ub = hyper_parameter.tracking_length_ub
+    generation_hyper_parameter.init_state_lb.extend(hyper_parameter.init_state_lb)
+    generation_hyper_parameter.init_state_ub.extend(hyper_parameter.init_state_ub)
+    generation_hyper_parameter.dynamics_models_hyper_parameters.extend(hyper_parameter.dynamics_models_hyper_parameters)
+
+    return hashlib.sha256(generation_hyper_parameter.SerializeToString(deterministic=True)).hexdigest()
+
+
+def generate_reference_line_pool(
+    pool_dir: str,
+    hyper_parameter: TrajectoryTrackingHyperParameter,
+    dynamics_model_manager: DynamicsModelManager,
+    n_reference_lines: int,
+    chunk_size: int = 65536,
+):
+    """Generate a pool of reference lines by random walk and dump it to disk.
+
+    Arrays are written chunk by chunk into memory-mapped `.npy` files, thus the pool may be larger than memory.
+    Random numbers are drawn from `np.random`, which is supposed to be seeded by the caller.
+
+    Args:
+        pool_dir: Directory to dump the pool.
+        hyper_parameter: Hyper-parameter of the environment.
+        dynamics_model_manager: Manager of the dynamics models of the environment.
+        n_reference_lines: Number of reference lines.
+        chunk_size: Number of reference lines generated in a vectorized pass.
+    """
+    dynamics_models = dynamics_model_manager.dynamics_models
+    parameter_table = dynamics_model_manager.get_parameter_table()
+    init_state_lb = np.array(hyper_parameter.init_state_lb, dtype=DTYPE)
+    init_state_ub = np.array(hyper_parameter.init_state_ub, dtype=DTYPE)
+
+    # lengths are sampled upfront to determine the layout
+    tracking_lengths = np.random.randint(
+        hyper_parameter.tracking_length_lb, hyper_parameter.tracking_length_ub + 1, size=n_reference_lines
+    )
+    offsets = np.zeros((n_reference_lines + 1,), dtype=np.int64)
+    np.cumsum(tracking_lengths, out=offsets[1:])
+
+    os.makedirs(pool_dir, exist_ok=True)
+    np.save(f'{pool_dir}/offsets.npy', offsets)
+    waypoints = np.lib.format.open_memmap(
+        f'{pool_dir}/waypoints.npy', mode='w+', dtype=DTYPE, shape=(int(offsets[-1]), 2)
+    )
+    init_states = np.lib.format.open_memmap(
+        f'{pool_dir}/init_states.npy', mode='w+', dtype=DTYPE, shape=(n_reference_lines, len(init_state_lb))
+    )
+    dynamics_model_indices = np.lib.format.open_memmap(
+        f'{pool_dir}/dynamics_model_indices.npy', mode='w+', dtype=np.int64, shape=(n_reference_lines,)
+    )
+
+    for chunk_start in range(0, n_reference_lines, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, n_reference_lines)
+        chunk_tracking_lengths = tracking_lengths[chunk_start:chunk_end]
+        chunk_dynamics_model_indices = np.random.choice(
+            len(dynamics_models), size=chunk_end - chunk_start, p=dynamics_model_manager.probabilities
+        )
+        chunk_init_states = np.random.uniform(
+            init_state_lb, init_state_ub, size=(chunk_end - chunk_start, len(init_state_lb))
+        ).astype(DTYPE)
+        states, _, masks = batch_random_walk(
+            chunk_init_states,
+            chunk_tracking_lengths,
+            step_interval=hyper_parameter.step_interval,
+            **parameter_table.gather_dynamics_parameters(chunk_dynamics_model_indices),
+            **parameter_table.gather_action_space_bounds(chunk_dynamics_model_indices),
+            **parameter_table.gather_batch_integration_settings(chunk_dynamics_model_indices),
+        )
+        # boolean masking flattens valid waypoints in the order of reference lines
+        waypoints[offsets[chunk_start] : offsets[chunk_end]] = states[..., :2][masks]
+        init_states[chunk_start:chunk_end] = chunk_init_states
+        dynamics_model_indices[chunk_start:chunk_end] = chunk_dynamics_model_indices
+
+    for array in (waypoints, init_states, dynamics_model_indices):
+        array.flush()
+
+    meta = dict(
+        config_hash=compute_reference_line_pool_hash(hyper_parameter),
+        n_reference_lines=n_reference_lines,
+        n_waypoints=int(offsets[-1]),
+        dynamics_model_names=[dm.get_name() for dm in dynamics_models],
+    )
+    with open(f'{pool_dir}/{REFERENCE_LINE_POOL_META_FILENAME}', 'w') as f:
+        json.dump(meta, f, sort_keys=True, indent=2, separators=(',', ': '))
+
+
+class ReferenceLinePool:
+    """Memory-mapped pool of pre-generated reference lines.
+
+    Reference lines are stored as a flat array of waypoints, delimited by offsets.
+    Files are mapped read-only, thus processes loading the same pool share physical memory through page cache.
+
+    Attributes:
+        pool_dir: Directory of the pool.
+        config_hash: Hash of the hyper-parameter that the pool was generated from.
+        offsets: Offsets of reference lines into `waypoints`, shape=(N+1,).
+        waypoints: Flat waypoints of all reference lines, shape=(total_n_waypoints, 2).
+        init_states: Initial states, shape=(N, state_dim).
+        dynamics_model_indices: Indices of dynamics models used for generation, shape=(N,).
+    """
+
+    pool_dir: str
+    config_hash: str
+    offsets: np.ndarray
+    waypoints: np.ndarray
+    init_states: np.ndarray
+    dynamics_model_indices: np.ndarray
+
+    def __init__(self, pool_dir: str):
+        """
+        Args:
+            pool_dir: Directory of the pool, generated by `generate_reference_line_pool`.
+        """
+        self.pool_dir = pool_dir
+        with open(f'{pool_dir}/{REFERENCE_LINE_POOL_META_FILENAME}', 'r') as f:
+            meta = json.load(f)
+        self.config_hash = meta['config_hash']
+        self.dynamics_model_names = meta['dynamics_model_names']
+        for array_name in REFERENCE_LINE_POOL_ARRAY_NAMES:
+            setattr(self, array_name, np.load(f'{pool_dir}/{array_name}.npy', mmap_mode='r'))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Get a reference line with zero-copy slicing.
+
+        Args:
+            index: Index of the reference line.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, int]: Entry of the pool:
+
+            * np.ndarray: Read-only view of waypoints, shape=(tracking_length, 2).
+            * np.ndarray: Read-only view of initial state, shape=(state_dim,).
+            * int: Index of dynamics model.
+        """
+        return (
+            self.waypoints[self.offsets[index] : self.offsets[index + 1]],
+            self.init_states[index],
+            int(self.dynamics_model_indices[index]),
+        )
+
+    def check_hyper_parameter(self, hyper_parameter: TrajectoryTrackingHyperParameter):
+        """Check if the pool was generated with a hyper-parameter.
+
+        Args:
+            hyper_parameter: Hyper-parameter of the environment.
+
+        Raises:
+            ValueError: If the hyper-parameter mismatches.
+        """
+        config_hash = compute_reference_line_pool_hash(hyper_parameter)
+        if config_hash != self.config_hash:
+            raise ValueError(
+                f'Reference line pool at {self.pool_dir} was generated with config hash {self.config_hash},'
+                f' mismatching {config_hash}'
+            )
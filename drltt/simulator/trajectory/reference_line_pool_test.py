@@ -0,0 +1,61 @@
+import tempfile
+
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.trajectory.reference_line import ReferenceLineManager
+from drltt.simulator.trajectory.reference_line_pool import ReferenceLinePool, generate_reference_line_pool
+
+
+def test_reference_line_pool():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = config['environment']
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    hyper_parameter = env.env_info.trajectory_tracking.hyper_parameter
+    n_reference_lines = 50
+
+    with tempfile.TemporaryDirectory() as pool_dir:
+        generate_reference_line_pool(
+            pool_dir, hyper_parameter, env.dynamics_model_manager, n_reference_lines=n_reference_lines, chunk_size=16
+        )
+        pool = ReferenceLinePool(pool_dir)
+        assert len(pool) == n_reference_lines
+        for index in range(n_reference_lines):
+            waypoints, init_state, dynamics_model_index = pool[index]
+            assert hyper_parameter.tracking_length_lb <= len(waypoints) <= hyper_parameter.tracking_length_ub
+            assert waypoints.dtype == np.float32 and not waypoints.flags.writeable
+            # reference line starts at the initial state
+            assert np.allclose(waypoints[0], init_state[:2])
+            assert 0 <= dynamics_model_index < len(env.dynamics_model_manager.dynamics_models)
+
+        pool_env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+            ENVIRONMENTS, env_config, reference_line_pool_dir=pool_dir
+        )
+        pool_env.reset()
+        reference_line = ReferenceLineManager.reference_line_to_np_array(pool_env.get_reference_line())
+        assert any(
+            len(pool[index][0]) == len(reference_line) and np.allclose(pool[index][0], reference_line)
+            for index in range(n_reference_lines)
+        )
+
+        batched_env_config = dict(env_config)
+        batched_env_config['type'] = 'BatchedTrajectoryTrackingEnv'
+        batched_env = build_object_within_registry_from_config(
+            ENVIRONMENTS, batched_env_config, n_envs=4, reference_line_pool_dir=pool_dir
+        )
+        batched_env.reset()
+        assert np.allclose(batched_env.reference_lines[:, 0], batched_env.states[:, :2])
+
+        with pytest.raises(ValueError):
+            build_object_within_registry_from_config(
+                ENVIRONMENTS, env_config, reference_line_pool_dir=pool_dir, step_interval=0.2
+            )
+
+
+if __name__ == '__main__':
+    test_reference_line_pool()
@@ -0,0 +1,163 @@
+from typing import Tuple, Union
+import threading
+import queue
+
+import numpy as np
+
+from drltt.simulator import DTYPE
+from drltt.simulator.dynamics_models import DynamicsModelManager
+from drltt.simulator.trajectory.random_walk import batch_random_walk
+
+from drltt_proto.environment.trajectory_tracking_pb2 import TrajectoryTrackingHyperParameter
+
+
+class ReferenceLinePrefetcher:
+    """Prefetcher that generates episodes of the next resets on a background thread.
+
+    Each episode is a tuple of (dynamics model index, initial state, reference line).
+    Episodes are generated by batched random walk in groups of `n_prefetched_episodes`,
+        drawing random numbers from a private generator.
+    Thus the sequence of episodes is deterministic given the seed, regardless of thread scheduling.
+
+    Attributes:
+        n_prefetched_episodes: Number of episodes generated ahead.
+    """
+
+    n_prefetched_episodes: int
+
+    def __init__(
+        self,
+        hyper_parameter: TrajectoryTrackingHyperParameter,
+        dynamics_model_manager: DynamicsModelManager,
+        n_prefetched_episodes: int,
+        seed: Union[int, None] = None,
+    ):
+        """
+        Args:
+            hyper_parameter: Hyper-parameter of the environment.
+            dynamics_model_manager: Manager of the dynamics models of the environment.
+            n_prefetched_episodes: Number of episodes generated ahead.
+            seed: Random seed. Default to `None` which denotes a seed drawn from `np.random`.
+        """
+        if n_prefetched_episodes < 1:
+            raise ValueError(f'Illegal `n_prefetched_episodes`: {n_prefetched_episodes}')
+        self.n_prefetched_episodes = n_prefetched_episodes
+        self._step_interval = hyper_parameter.step_interval
+        self._tracking_length_lb = hyper_parameter.tracking_length_lb
+        self._tracking_length_ub = hyper_parameter.tracking_length_ub
+        self._init_state_lb = np.array(hyper_parameter.init_state_lb, dtype=DTYPE)
+        self._init_state_ub = np.array(hyper_parameter.init_state_ub, dtype=DTYPE)
+        self._probabilities = dynamics_model_manager.probabilities
+        self._parameter_table = dynamics_model_manager.get_parameter_table()
+        self._queue: queue.Queue = None
+        self._stop_event: threading.Event = None
+        self._thread: Union[threading.Thread, None] = None
+        # exception raised in the background thread, re-raised on `pop`
+        self._error: Union[BaseException, None] = None
+        self.seed(seed)
+
+    def seed(self, seed: Union[int, None] = None):
+        """(Re-)start the background thread with a seed, discarding prefetched episodes.
+
+        Args:
+            seed: Random seed. Default to `None` which denotes a seed drawn from `np.random`.
+        """
+        self.close()
+        if seed is None:
+            seed = np.random.randint(np.iinfo(np.int32).max)
+        self._queue = queue.Queue(maxsize=self.n_prefetched_episodes)
+        self._stop_event = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(np.random.default_rng(seed), self._queue, self._stop_event),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _generate(self, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Generate a group of episodes.
+
+        Args:
+            rng: Random number generator.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Dynamics model indices, initial states,
+                tracking lengths, and padded reference lines.
+        """
+        n_episodes = self.n_prefetched_episodes
+        dynamics_model_indices = rng.choice(len(self._probabilities), size=n_episodes, p=self._probabilities)
+        tracking_lengths = rng.integers(self._tracking_length_lb, self._tracking_length_ub + 1, size=n_episodes)
+        init_states = rng.uniform(
+            self._init_state_lb, self._init_state_ub, size=(n_episodes, len(self._init_state_lb))
+        ).astype(DTYPE)
+        states, _, _ = batch_random_walk(
+            init_states,
+            tracking_lengths,
+            step_interval=self._step_interval,
+            **self._parameter_table.gather_dynamics_parameters(dynamics_model_indices),
+            **self._parameter_table.gather_action_space_bounds(dynamics_model_indices),
+            **self._parameter_table.gather_batch_integration_settings(dynamics_model_indices),
+            rng=rng,
+        )
+
+        return dynamics_model_indices, init_states, tracking_lengths, states[..., :2]
+
+    def _run(self, rng: np.random.Generator, episode_queue: queue.Queue, stop_event: threading.Event):
+        """Main loop of the background thread.
+
+        Args:
+            rng: Random number generator owned by this thread.
+            episode_queue: Queue of prefetched episodes.
+            stop_event: Event for stopping the thread.
+        """
+        try:
+            self._fill_queue(rng, episode_queue, stop_event)
+        except BaseException as e:
+            self._error = e
+
+    def _fill_queue(self, rng: np.random.Generator, episode_queue: queue.Queue, stop_event: threading.Event):
+        while not stop_event.is_set():
+            dynamics_model_indices, init_states, tracking_lengths, reference_lines = self._generate(rng)
+            for episode in zip(dynamics_model_indices, init_states, tracking_lengths, reference_lines):
+                dynamics_model_index, init_state, tracking_length, reference_line = episode
+                item = (int(dynamics_model_index), init_state, reference_line[:tracking_length])
+                while not stop_event.is_set():
+                    try:
+                        episode_queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+    def pop(self, poll_interval: float = 0.1) -> Tuple[int, np.ndarray, np.ndarray]:
+        """Pop the next episode, blocking if it is not ready yet.
+
+        Args:
+            poll_interval: Interval in seconds of checking the background thread while waiting.
+
+        Returns:
+            Tuple[int, np.ndarray, np.ndarray]: Prefetched episode:
+
+            * int: Index of dynamics model.
+            * np.ndarray: Initial state, shape=(state_dim,).
+            * np.ndarray: Reference line, shape=(tracking_length, 2).
+
+        Raises:
+            BaseException: Exception raised in the background thread.
+            RuntimeError: If the background thread has been stopped.
+        """
+        while True:
+            try:
+                return self._queue.get(timeout=poll_interval)
+            except queue.Empty:
+                if self._error is not None:
+                    raise self._error
+                if self._thread is None or self._stop_event.is_set() or not self._thread.is_alive():
+                    raise RuntimeError('Background thread of prefetcher has been stopped')
+
+    def close(self):
+        """Stop the background thread."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
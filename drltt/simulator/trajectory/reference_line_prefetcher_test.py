@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.trajectory.reference_line import ReferenceLineManager
+
+
+def test_reference_line_prefetcher():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env_config = config['environment']
+    n_episodes = 10
+    all_episodes = list()
+    for _ in range(2):
+        env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+            ENVIRONMENTS, env_config, n_prefetched_episodes=4
+        )
+        env.seed(0)
+        episodes = list()
+        for _ in range(n_episodes):
+            observation = env.reset()
+            reference_line = ReferenceLineManager.reference_line_to_np_array(env.get_reference_line())
+            # reference line starts at the initial state
+            assert np.allclose(reference_line[0], env.get_state()[:2])
+            episodes.append((env.get_current_dynamics_model().get_name(), reference_line, observation))
+        env.close()
+        all_episodes.append(episodes)
+
+    # deterministic under a fixed seed
+    for episode, replayed_episode in zip(*all_episodes):
+        assert episode[0] == replayed_episode[0]
+        assert np.array_equal(episode[1], replayed_episode[1])
+        assert np.array_equal(episode[2], replayed_episode[2])
+    assert not np.array_equal(all_episodes[0][0][2], all_episodes[0][1][2])
+
+
+def test_reference_line_prefetcher_failure():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, config['environment'], n_prefetched_episodes=2
+    )
+    prefetcher = env.reference_line_prefetcher
+
+    # stopped thread
+    prefetcher.close()
+    with pytest.raises(RuntimeError):
+        for _ in range(prefetcher.n_prefetched_episodes + 1):
+            prefetcher.pop()
+
+    # exception raised in the background thread
+    def generate(rng):
+        raise ValueError('failed generation')
+
+    prefetcher._generate = generate
+    prefetcher.seed(0)
+    with pytest.raises(ValueError, match='failed generation'):
+        prefetcher.pop()
+    prefetcher.close()
+
+
+if __name__ == '__main__':
+    test_reference_line_prefetcher()
+    test_reference_line_prefetcher_failure()
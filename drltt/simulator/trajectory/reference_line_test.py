@@ -1,5 +1,7 @@
 import numpy as np
 
+from drltt_proto.dynamics_model.basics_pb2 import BodyState
+
 from drltt.simulator.dynamics_models import BicycleModel
 from drltt.simulator.trajectory.random_walk import random_walk
 from drltt.simulator.trajectory.reference_line import ReferenceLineManager
@@ -25,6 +27,90 @@ def test_reference_line_manager():
     reference_line_manager.set_reference_line(reference_line, tracking_length=tracking_length)
     assert len(reference_line_manager.raw_reference_line.waypoints) == 60
 
+    # padded as contiguous array
+    waypoints = ReferenceLineManager.reference_line_to_np_array(reference_line)
+    assert reference_line_manager.waypoints.shape == (tracking_length + n_observation_steps, 2)
+    assert reference_line_manager.waypoints.dtype == np.float32
+    assert reference_line_manager.waypoints.flags.c_contiguous
+    assert np.allclose(reference_line_manager.waypoints[:tracking_length], waypoints)
+    assert np.allclose(reference_line_manager.waypoints[tracking_length:], waypoints[-1])
+
+    # waypoint is a read-only view
+    waypoint = reference_line_manager.get_reference_line_waypoint(3)
+    assert np.shares_memory(waypoint, reference_line_manager.waypoints) and not waypoint.flags.writeable
+
+    # truncated to tracking length before padding
+    reference_line_manager.set_reference_line(waypoints.astype(np.float32), tracking_length=tracking_length - 10)
+    assert reference_line_manager.waypoints.shape == (tracking_length - 10 + n_observation_steps, 2)
+    assert np.allclose(reference_line_manager.waypoints[tracking_length - 10 :], waypoints[tracking_length - 11])
+    assert len(reference_line_manager.raw_waypoints) == tracking_length
+
+
+def test_projection():
+    np.random.seed(0)
+    tracking_length = 5000
+    n_observation_steps = 15
+    # winding line with non-uniform segment lengths
+    steps = np.random.uniform(0.1, 2.0, size=(tracking_length,))
+    headings = np.cumsum(np.random.uniform(-0.2, 0.2, size=(tracking_length,)))
+    waypoints = np.cumsum(np.stack((steps * np.cos(headings), steps * np.sin(headings)), axis=1), axis=0)
+    reference_line_manager = ReferenceLineManager(n_observation_steps=n_observation_steps, pad_mode='repeat')
+    reference_line_manager.set_reference_line(waypoints.astype(np.float32), tracking_length=tracking_length)
+
+    def brute_force_distance(point):
+        starts, ends = waypoints[:-1], waypoints[1:]
+        vectors = ends - starts
+        ratios = np.clip(((point - starts) * vectors).sum(axis=1) / (vectors * vectors).sum(axis=1), 0.0, 1.0)
+        return np.linalg.norm(point - (starts + ratios[:, np.newaxis] * vectors), axis=1).min()
+
+    # cold queries fall back to KD-tree, and are exact
+    for _ in range(100):
+        point = waypoints[np.random.randint(tracking_length)] + np.random.normal(scale=3.0, size=(2,))
+        _, _, distance = reference_line_manager.project(point, warm_start=False)
+        assert np.isclose(distance, brute_force_distance(point), atol=1e-4)
+
+    # warm-started queries along a drifting path
+    for index in range(0, tracking_length, 7):
+        point = waypoints[index] + np.random.normal(scale=0.3, size=(2,))
+        segment_index, ratio, distance = reference_line_manager.project(point)
+        assert 0.0 <= ratio <= 1.0
+        assert np.isclose(distance, brute_force_distance(point), atol=1e-4)
+
+    # observation by state starts from the projected waypoint
+    body_state = BodyState(x=waypoints[100, 0], y=waypoints[100, 1], r=0.0)
+    assert reference_line_manager.get_projected_waypoint_index(body_state) == 100
+    observation = reference_line_manager.get_observation_by_state(body_state)
+    assert observation.shape == reference_line_manager.get_observation_space().shape
+    assert np.allclose(observation[:2], 0.0, atol=1e-3)
+    assert observation[-1] == tracking_length - 100
+
+    # projection beyond the end of line is clipped to the last tracked waypoint
+    beyond_end = waypoints[-1] + 0.5 * (waypoints[-1] - waypoints[-2])
+    body_state = BodyState(x=beyond_end[0], y=beyond_end[1], r=0.0)
+    assert reference_line_manager.get_projected_waypoint_index(body_state) == tracking_length - 1
+
+    # segment index is kept for an unchanged reference line, and rebuilt lazily otherwise
+    segment_tree = reference_line_manager._segment_tree
+    reference_line_manager.set_reference_line(waypoints.astype(np.float32), tracking_length=tracking_length)
+    reference_line_manager.project(waypoints[0], warm_start=False)
+    assert reference_line_manager._segment_tree is segment_tree
+    reference_line_manager.set_reference_line(waypoints[::-1].astype(np.float32), tracking_length=tracking_length)
+    assert reference_line_manager._indexed_waypoints is None
+    segment_index, _, _ = reference_line_manager.project(waypoints[0], warm_start=False)
+    assert segment_index == tracking_length - 2
+
+    # unpadded reference line is observed up to its end
+    unpadded_reference_line_manager = ReferenceLineManager(n_observation_steps=n_observation_steps, pad_mode='none')
+    unpadded_reference_line_manager.set_reference_line(waypoints.astype(np.float32))
+    body_state = BodyState(x=waypoints[-2, 0], y=waypoints[-2, 1], r=0.0)
+    observation = unpadded_reference_line_manager.get_observation_by_state(body_state)
+    assert np.allclose(observation[-3:-1], waypoints[-1] - waypoints[-2], atol=1e-3)
+
+    # single-waypoint reference line
+    reference_line_manager.set_reference_line(waypoints[:1].astype(np.float32))
+    _, _, distance = reference_line_manager.project(waypoints[0] + (3.0, 4.0))
+    assert np.isclose(distance, 5.0)
+
 
 def test_estimate_init_state_from_reference_line():
     step_interval = 0.1
@@ -47,4 +133,5 @@ def test_estimate_init_state_from_reference_line():
 
 if __name__ == '__main__':
     test_reference_line_manager()
+    test_projection()
     test_estimate_init_state_from_reference_line()
@@ -1,5 +1,7 @@
 from .trajectory_tracker import TrajectoryTracker
+from .ilqr_tracker import ILQRTracker
 
 __all__ = [
     'TrajectoryTracker',
+    'ILQRTracker',
 ]
@@ -0,0 +1,333 @@
+from typing import Tuple, Union
+
+import numpy as np
+
+from drltt.simulator import DTYPE
+from drltt.simulator.dynamics_models import BicycleModel, BicycleModelParameterTable
+from drltt.simulator.environments.trajectory_tracking_env import TrajectoryTrackingEnv
+
+ILQR_LINE_SEARCH_STEP_SIZES = (1.0, 0.5, 0.25, 0.125, 0.0625, 0.03125)
+
+
+class ILQRTracker:
+    """Trajectory tracker based on iterative LQR (iLQR), a classical baseline of the RL policy.
+
+    The optimized cost mirrors the reward terms of `TrajectoryTrackingEnv`, negated:
+
+    - tracking: distance to the waypoint of the current step, smoothed by `sqrt(d^2 + tracking_smoothing^2)`.
+    - action: squared norm of the action scaled to [-1, 1] by the action space.
+
+    Weights of cost terms default to the reward weights of the environment, where other reward terms are not supported.
+
+    Dynamics and their Jacobians are those of `BicycleModel`, evaluated in float64 over the whole horizon at once.
+    Actions are clipped to the action space in the forward pass.
+
+    The whole episode is planned at its first step. The policy then follows the optimized trajectory
+        with the feedback gains of the last backward pass, which compensate the deviation of the simulated state.
+
+    Attributes:
+        environment: The associated environment, which is read for state, reference line, and dynamics model.
+        n_iterations: Maximum number of iLQR iterations.
+        tracking_weight: Weight of tracking cost.
+        action_weight: Weight of action cost.
+        tracking_smoothing: Smoothing distance of tracking cost, which makes it differentiable at zero.
+        regularization: Initial Levenberg-Marquardt regularization added to the Hessian w.r.t. actions.
+        tolerance: Relative cost decrease for convergence.
+        states: Optimized states of the current episode, shape=(T + 1, 4).
+        actions: Optimized actions of the current episode, shape=(T, 2).
+        feedback_gains: Feedback gains of the current episode, shape=(T, 2, 4).
+    """
+
+    environment: TrajectoryTrackingEnv
+    n_iterations: int
+    tracking_weight: float
+    action_weight: float
+    tracking_smoothing: float
+    regularization: float
+    tolerance: float
+    states: Union[np.ndarray, None]
+    actions: Union[np.ndarray, None]
+    feedback_gains: Union[np.ndarray, None]
+
+    def __init__(
+        self,
+        environment: TrajectoryTrackingEnv,
+        n_iterations: int = 50,
+        tracking_weight: Union[float, None] = None,
+        action_weight: Union[float, None] = None,
+        tracking_smoothing: float = 0.1,
+        regularization: float = 1e-6,
+        tolerance: float = 1e-4,
+    ):
+        """
+        Args:
+            environment: The associated environment.
+            n_iterations: Maximum number of iLQR iterations.
+            tracking_weight: Weight of tracking cost. Default to the weight of reward term `tracking` of the environment.
+            action_weight: Weight of action cost. Default to the weight of reward term `action` of the environment.
+            tracking_smoothing: Smoothing distance of tracking cost in [m].
+            regularization: Initial regularization added to the Hessian w.r.t. actions.
+            tolerance: Relative cost decrease for convergence.
+        """
+        reward_weights = environment.reward_manager.get_reward_weights()
+        for term_name, weight in reward_weights.items():
+            if term_name not in ('tracking', 'action') and weight != 0.0:
+                raise NotImplementedError(f'Unsupported reward term in iLQR: {term_name} with weight {weight}')
+        if tracking_weight is None:
+            tracking_weight = reward_weights.get('tracking', 0.0)
+        if action_weight is None:
+            action_weight = reward_weights.get('action', 0.0)
+
+        self.environment = environment
+        self.n_iterations = n_iterations
+        self.tracking_weight = tracking_weight
+        self.action_weight = action_weight
+        self.tracking_smoothing = tracking_smoothing
+        self.regularization = regularization
+        self.tolerance = tolerance
+        self.states = None
+        self.actions = None
+        self.feedback_gains = None
+        self._parameter_table: BicycleModelParameterTable = environment.dynamics_model_manager.get_parameter_table()
+
+    def policy_func(self, observation: np.ndarray) -> np.ndarray:
+        """Policy in form of func(observation) -> action, compatible with `roll_out_one_episode`.
+
+        The observation is not used. State and episode data are read from the environment instead.
+
+        Args:
+            observation: Observation.
+
+        Returns:
+            np.ndarray: Action.
+        """
+        step_index = self.environment.episode_recorder.step_index
+        state = self.environment.get_state().astype(np.float64)
+        if step_index == 0:
+            reference_manager = self.environment.reference_line_manager
+            self.plan(
+                state,
+                reference_manager.waypoints[: reference_manager.tracking_length],
+                self.environment.dynamics_model_manager.sampled_dynamics_model_index,
+            )
+
+        state_error = state - self.states[step_index]
+        state_error[2] = (state_error[2] + np.pi) % (2 * np.pi) - np.pi
+        action = self.actions[step_index] + self.feedback_gains[step_index] @ state_error
+
+        return np.clip(action, self._action_space_lb, self._action_space_ub).astype(DTYPE)
+
+    def plan(
+        self,
+        init_state: np.ndarray,
+        reference_waypoints: np.ndarray,
+        dynamics_model_index: int,
+        init_actions: Union[np.ndarray, None] = None,
+    ) -> float:
+        """Optimize the trajectory tracking a reference line, stored in `states`, `actions`, and `feedback_gains`.
+
+        Args:
+            init_state: Initial state, shape=(4,).
+            reference_waypoints: Waypoints to track at each step, shape=(T, 2).
+            dynamics_model_index: Index of the dynamics model within the environment.
+            init_actions: Initial guess of actions, shape=(T, 2). Default to zeros clipped to the action space.
+
+        Returns:
+            float: Cost of the optimized trajectory.
+        """
+        reference_waypoints = np.asarray(reference_waypoints, dtype=np.float64)
+        horizon = len(reference_waypoints)
+        self._dynamics_parameters = self._parameter_table.gather_dynamics_parameters(dynamics_model_index)
+        self._integration_settings = self._parameter_table.gather_integration_settings(dynamics_model_index)
+        self._action_space_lb = self._parameter_table.action_space_lbs[dynamics_model_index].astype(np.float64)
+        self._action_space_ub = self._parameter_table.action_space_ubs[dynamics_model_index].astype(np.float64)
+        self._step_interval = self.environment.env_info.trajectory_tracking.hyper_parameter.step_interval
+
+        if init_actions is None:
+            init_actions = np.zeros((horizon, 2))
+        actions = np.clip(np.asarray(init_actions, dtype=np.float64), self._action_space_lb, self._action_space_ub)
+        states = self._roll_out(np.asarray(init_state, dtype=np.float64)[np.newaxis], actions[np.newaxis])[0]
+        cost = self._compute_cost(states, actions, reference_waypoints)
+
+        regularization = self.regularization
+        for _ in range(self.n_iterations):
+            feedforwards, feedback_gains = self._backward_pass(states, actions, reference_waypoints, regularization)
+            candidate_states, candidate_actions = self._forward_pass(states, actions, feedforwards, feedback_gains)
+            candidate_costs = np.array([
+                self._compute_cost(s, a, reference_waypoints) for s, a in zip(candidate_states, candidate_actions)
+            ])
+            best_candidate = int(np.argmin(candidate_costs))
+            if candidate_costs[best_candidate] >= cost:
+                # no improvement along the search direction, trust the quadratic model less
+                regularization = max(regularization * 10.0, 1e-3)
+                continue
+            regularization = max(regularization / 10.0, self.regularization)
+            cost_decrease = cost - candidate_costs[best_candidate]
+            states, actions = candidate_states[best_candidate], candidate_actions[best_candidate]
+            cost = candidate_costs[best_candidate]
+            if cost_decrease <= self.tolerance * max(abs(cost), 1.0):
+                break
+        # feedback gains around the optimized trajectory
+        _, feedback_gains = self._backward_pass(states, actions, reference_waypoints, regularization)
+
+        self.states, self.actions, self.feedback_gains = states, actions, feedback_gains
+
+        return float(cost)
+
+    def _step(self, states: np.ndarray, actions: np.ndarray) -> np.ndarray:
+        return BicycleModel.compute_batch_next_states(
+            states,
+            actions,
+            delta_t=self._step_interval,
+            **self._dynamics_parameters,
+            **self._integration_settings,
+            dtype=np.float64,
+        )
+
+    def _roll_out(self, init_states: np.ndarray, actions: np.ndarray) -> np.ndarray:
+        """Roll out a batch of action sequences from initial states.
+
+        Args:
+            init_states: Initial states, shape=(N, 4).
+            actions: Actions, shape=(N, T, 2).
+
+        Returns:
+            np.ndarray: States, shape=(N, T + 1, 4).
+        """
+        states = np.empty((len(init_states), actions.shape[1] + 1, 4))
+        states[:, 0] = init_states
+        for step_index in range(actions.shape[1]):
+            states[:, step_index + 1] = self._step(states[:, step_index], actions[:, step_index])
+
+        return states
+
+    def _compute_cost(self, states: np.ndarray, actions: np.ndarray, reference_waypoints: np.ndarray) -> float:
+        """Compute the cost of a trajectory.
+
+        Args:
+            states: States, shape=(T + 1, 4).
+            actions: Actions, shape=(T, 2).
+            reference_waypoints: Waypoints, shape=(T, 2).
+
+        Returns:
+            float: Cost.
+        """
+        position_errors = states[:-1, :2] - reference_waypoints
+        tracking_costs = np.sqrt((position_errors**2).sum(axis=-1) + self.tracking_smoothing**2)
+        scaled_actions = self._scale_actions(actions)
+
+        return float(self.tracking_weight * tracking_costs.sum() + self.action_weight * (scaled_actions**2).sum())
+
+    def _scale_actions(self, actions: np.ndarray) -> np.ndarray:
+        """Vectorized `drltt.common.gym_helper.scale_action`."""
+        return 2 * (actions - self._action_space_lb) / (self._action_space_ub - self._action_space_lb) - 1
+
+    def _backward_pass(
+        self,
+        states: np.ndarray,
+        actions: np.ndarray,
+        reference_waypoints: np.ndarray,
+        regularization: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Backward pass of iLQR, solving the LQ sub-problem around a trajectory.
+
+        Args:
+            states: States, shape=(T + 1, 4).
+            actions: Actions, shape=(T, 2).
+            reference_waypoints: Waypoints, shape=(T, 2).
+            regularization: Regularization added to the Hessian w.r.t. actions.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Feedforward terms, shape=(T, 2), and feedback gains, shape=(T, 2, 4).
+        """
+        horizon = len(actions)
+        jacobians = BicycleModel.compute_batch_jacobians(
+            states[:-1], actions, delta_t=self._step_interval, **self._dynamics_parameters, **self._integration_settings
+        )
+        state_jacobians, action_jacobians = jacobians[..., :4], jacobians[..., 4:]
+
+        # derivatives of tracking cost w.r.t. positions
+        position_errors = states[:-1, :2] - reference_waypoints
+        smoothed_dists = np.sqrt((position_errors**2).sum(axis=-1) + self.tracking_smoothing**2)
+        cost_state_grads = np.zeros((horizon, 4))
+        cost_state_grads[:, :2] = self.tracking_weight * position_errors / smoothed_dists[:, np.newaxis]
+        cost_state_hessians = np.zeros((horizon, 4, 4))
+        cost_state_hessians[:, :2, :2] = (
+            self.tracking_weight
+            * (
+                np.eye(2) * smoothed_dists[:, np.newaxis, np.newaxis] ** 2
+                - position_errors[:, :, np.newaxis] * position_errors[:, np.newaxis, :]
+            )
+            / smoothed_dists[:, np.newaxis, np.newaxis] ** 3
+        )
+        # derivatives of action cost w.r.t. actions, which is quadratic
+        action_scales = 2 / (self._action_space_ub - self._action_space_lb)
+        cost_action_grads = 2 * self.action_weight * self._scale_actions(actions) * action_scales
+        cost_action_hessian = np.diag(2 * self.action_weight * action_scales**2) + regularization * np.eye(2)
+
+        feedforwards = np.empty((horizon, 2))
+        feedback_gains = np.empty((horizon, 2, 4))
+        value_grad = np.zeros(4)
+        value_hessian = np.zeros((4, 4))
+        for step_index in reversed(range(horizon)):
+            a_mat, b_mat = state_jacobians[step_index], action_jacobians[step_index]
+            q_x = cost_state_grads[step_index] + a_mat.T @ value_grad
+            q_u = cost_action_grads[step_index] + b_mat.T @ value_grad
+            value_hessian_a = value_hessian @ a_mat
+            q_xx = cost_state_hessians[step_index] + a_mat.T @ value_hessian_a
+            q_uu = cost_action_hessian + b_mat.T @ value_hessian @ b_mat
+            q_ux = b_mat.T @ value_hessian_a
+
+            q_uu_inv = np.linalg.inv(q_uu)
+            feedforward = -q_uu_inv @ q_u
+            feedback_gain = -q_uu_inv @ q_ux
+            feedforwards[step_index] = feedforward
+            feedback_gains[step_index] = feedback_gain
+
+            value_grad = q_x + feedback_gain.T @ q_uu @ feedforward + feedback_gain.T @ q_u + q_ux.T @ feedforward
+            value_hessian = (
+                q_xx + feedback_gain.T @ q_uu @ feedback_gain + feedback_gain.T @ q_ux + q_ux.T @ feedback_gain
+            )
+            value_hessian = 0.5 * (value_hessian + value_hessian.T)
+
+        return feedforwards, feedback_gains
+
+    def _forward_pass(
+        self,
+        states: np.ndarray,
+        actions: np.ndarray,
+        feedforwards: np.ndarray,
+        feedback_gains: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Forward pass of iLQR, with all step sizes of line search rolled out as a batch.
+
+        Args:
+            states: Nominal states, shape=(T + 1, 4).
+            actions: Nominal actions, shape=(T, 2).
+            feedforwards: Feedforward terms, shape=(T, 2).
+            feedback_gains: Feedback gains, shape=(T, 2, 4).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Candidate states, shape=(N, T + 1, 4), and actions, shape=(N, T, 2),
+                where N is the number of step sizes.
+        """
+        step_sizes = np.array(ILQR_LINE_SEARCH_STEP_SIZES)[:, np.newaxis]
+        n_candidates, horizon = len(step_sizes), len(actions)
+        candidate_states = np.empty((n_candidates, horizon + 1, 4))
+        candidate_actions = np.empty((n_candidates, horizon, 2))
+        candidate_states[:, 0] = states[0]
+        for step_index in range(horizon):
+            state_errors = candidate_states[:, step_index] - states[step_index]
+            state_errors[:, 2] = (state_errors[:, 2] + np.pi) % (2 * np.pi) - np.pi
+            candidate_actions[:, step_index] = np.clip(
+                actions[step_index]
+                + step_sizes * feedforwards[step_index]
+                + state_errors @ feedback_gains[step_index].T,
+                self._action_space_lb,
+                self._action_space_ub,
+            )
+            candidate_states[:, step_index + 1] = self._step(
+                candidate_states[:, step_index], candidate_actions[:, step_index]
+            )
+
+        return candidate_states, candidate_actions
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator import TEST_CONFIG_PATHS
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.rl_learning.sb3_utils import roll_out_one_episode
+from drltt.simulator.trajectory_tracker import ILQRTracker
+
+
+def test_ilqr_tracker():
+    np.random.seed(0)
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, config['environment'], recording_level='summary'
+    )
+    env.seed(0)
+    tracker = ILQRTracker(env)
+
+    for _ in range(3):
+        states, actions, observations = roll_out_one_episode(env, tracker.policy_func)
+        episode = env.export_environment_data().trajectory_tracking.episode
+        ilqr_reward = sum(episode.rewards)
+        reference_waypoints = env.reference_line_manager.waypoints[: len(states)]
+        ilqr_dists = np.linalg.norm(np.array(states)[:, :2] - reference_waypoints, axis=-1)
+
+        # planned trajectory is followed in simulation
+        np.testing.assert_allclose(np.array(states), tracker.states[:-1], atol=1e-3)
+        action_space = env.get_current_dynamics_model().get_action_space()
+        assert np.all(np.array(actions) >= action_space.low) and np.all(np.array(actions) <= action_space.high)
+
+        # baseline of open-loop zero actions on the same episode
+        zero_states, _, _ = roll_out_one_episode(
+            env,
+            lambda observation: np.zeros((2,), dtype=np.float32),
+            init_state=states[0],
+            dynamics_model_name=env.get_current_dynamics_model().get_name(),
+            reference_line=env.get_reference_line(),
+        )
+        zero_reward = sum(env.export_environment_data().trajectory_tracking.episode.rewards)
+        zero_dists = np.linalg.norm(np.array(zero_states)[:, :2] - reference_waypoints, axis=-1)
+
+        assert ilqr_reward > zero_reward
+        assert np.median(ilqr_dists) < np.median(zero_dists)
+        assert np.median(ilqr_dists) < 0.5
+
+
+def test_ilqr_tracker_reward_weights():
+    config = load_and_override_configs(TEST_CONFIG_PATHS)
+    env_config = dict(config['environment'])
+
+    env_config['reward_weights'] = dict(tracking=2.0, action=0.5)
+    env: TrajectoryTrackingEnv = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    tracker = ILQRTracker(env)
+    assert tracker.tracking_weight == 2.0 and tracker.action_weight == 0.5
+
+    env_config['reward_weights'] = dict(tracking=1.0, action=1.0, heading=0.1)
+    env = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    with pytest.raises(NotImplementedError):
+        ILQRTracker(env)
+
+
+if __name__ == '__main__':
+    test_ilqr_tracker()
+    test_ilqr_tracker_reward_weights()
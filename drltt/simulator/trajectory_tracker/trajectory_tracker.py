@@ -23,7 +23,7 @@ class TrajectoryTracker:
         env_info = Environment()
         with open(f'{checkpoint_dir}/env_data.bin', 'rb') as f:
             env_info.ParseFromString(f.read())
-        self.env = TrajectoryTrackingEnv(env_info=env_info)
+        self.env = TrajectoryTrackingEnv(env_info=env_info, recording_level='none')
 
     def track_reference_line(
         self,
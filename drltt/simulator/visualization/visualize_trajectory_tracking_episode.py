@@ -1,5 +1,3 @@
-import math
-
 import matplotlib
 import numpy as np
 from jax import numpy as jnp
@@ -19,11 +17,14 @@ from waymax_viz.waymax.visualization.viz import (
 from .utils import scale_xy_lim
 
 from drltt.simulator.visualization import VISUALIZATION_FUNCTIONS
+from drltt.simulator.environments.episode_recorder import requires_recording_level, check_episode_recorded
+from drltt.simulator.environments.episode_columns import episode_to_columns
 
 from drltt_proto.environment.environment_pb2 import Environment
 
 
 @VISUALIZATION_FUNCTIONS.register
+@requires_recording_level('summary')
 def visualize_trajectory_tracking_episode(
     env_data: Environment,
     viz_prefix: str,
@@ -31,6 +32,8 @@ def visualize_trajectory_tracking_episode(
 ):
     """Visualize an episode of trajectory tracking and save images.
 
+    Requires recording level 'summary' (states, actions, and rewards).
+
     TODO: fix non-unified data range issue.
 
     Args:
@@ -42,61 +45,52 @@ def visualize_trajectory_tracking_episode(
         env_data, Environment
     ), f'`visualize_trajectory_tracking_episode` requires env_data to be in class `Environment`'
     episode = env_data.trajectory_tracking.episode
+    check_episode_recorded(episode, visualize_trajectory_tracking_episode.required_recording_level)
 
     traj_len = episode.tracking_length
     n_viz = traj_len // n_steps_per_viz
+    columns = episode_to_columns(episode)
+    bicycle_model_hyper_parameter = episode.dynamics_model.hyper_parameter.bicycle_model
 
     for viz_idx in range(n_viz):
         viz_idx_range = (
             viz_idx * n_steps_per_viz,
             traj_len if viz_idx == n_viz - 1 else (viz_idx + 1) * n_steps_per_viz,
         )
+        viz_slice = slice(*viz_idx_range)
+        n_viz_steps = viz_idx_range[1] - viz_idx_range[0]
+        x, y, r, v = (columns[name][viz_slice] for name in ('x', 'y', 'r', 'v'))
+        ref_x, ref_y = columns['ref_x'][viz_slice], columns['ref_y'][viz_slice]
+        ref_norm = np.hypot(ref_x, ref_y)
+        steps = columns['step'][viz_slice]
 
         # plot trajectory
-        dm_states = episode.dynamics_model.states
         traj = Trajectory(
-            x=jnp.array([dm_states[idx].bicycle_model.body_state.x for idx in range(*viz_idx_range)]).reshape(1, -1),
-            y=jnp.array([dm_states[idx].bicycle_model.body_state.y for idx in range(*viz_idx_range)]).reshape(1, -1),
-            z=jnp.array([0.0 for idx in range(*viz_idx_range)]).reshape(1, -1),
-            vel_x=jnp.array([
-                np.cos(dm_states[idx].bicycle_model.body_state.r) * dm_states[idx].bicycle_model.v
-                for idx in range(*viz_idx_range)
-            ]).reshape(1, -1),
-            vel_y=jnp.array([
-                np.sin(dm_states[idx].bicycle_model.body_state.r) * dm_states[idx].bicycle_model.v
-                for idx in range(*viz_idx_range)
-            ]).reshape(1, -1),
-            yaw=jnp.array([dm_states[idx].bicycle_model.body_state.r for idx in range(*viz_idx_range)]).reshape(1, -1),
+            x=jnp.array(x).reshape(1, -1),
+            y=jnp.array(y).reshape(1, -1),
+            z=jnp.zeros((1, n_viz_steps)),
+            vel_x=jnp.array(np.cos(r) * v).reshape(1, -1),
+            vel_y=jnp.array(np.sin(r) * v).reshape(1, -1),
+            yaw=jnp.array(r).reshape(1, -1),
             timestamp_micros=jnp.array(
-                [int(episode.hyper_parameter.step_interval * 1e6 * idx) for idx in range(*viz_idx_range)],
+                (episode.hyper_parameter.step_interval * 1e6 * steps).astype(np.int64),
                 dtype=jnp.int32,
             ).reshape(1, -1),
-            valid=jnp.array([True for idx in range(*viz_idx_range)], dtype=bool).reshape(1, -1),
-            length=jnp.array([
-                episode.dynamics_model.hyper_parameter.bicycle_model.length for idx in range(*viz_idx_range)
-            ]).reshape(1, -1),
-            width=jnp.array([
-                episode.dynamics_model.hyper_parameter.bicycle_model.width for idx in range(*viz_idx_range)
-            ]).reshape(1, -1),
-            height=jnp.array([1.4 for idx in range(*viz_idx_range)]).reshape(1, -1),
+            valid=jnp.ones((1, n_viz_steps), dtype=bool),
+            length=jnp.full((1, n_viz_steps), bicycle_model_hyper_parameter.length),
+            width=jnp.full((1, n_viz_steps), bicycle_model_hyper_parameter.width),
+            height=jnp.full((1, n_viz_steps), 1.4),
         )  # shape=(#agents, #timesteps)
-        refline_waypoints = episode.reference_line.waypoints
         reference_line = RoadgraphPoints(
-            x=jnp.array([refline_waypoints[idx].x for idx in range(*viz_idx_range)]).reshape(-1),
-            y=jnp.array([refline_waypoints[idx].y for idx in range(*viz_idx_range)]).reshape(-1),
-            z=jnp.array([0.0 for idx in range(*viz_idx_range)]).reshape(-1),
-            dir_x=jnp.array([
-                refline_waypoints[idx].x / math.hypot(refline_waypoints[idx].x, refline_waypoints[idx].y)
-                for idx in range(*viz_idx_range)
-            ]).reshape(-1),
-            dir_y=jnp.array([
-                refline_waypoints[idx].y / math.hypot(refline_waypoints[idx].x, refline_waypoints[idx].y)
-                for idx in range(*viz_idx_range)
-            ]).reshape(-1),
-            dir_z=jnp.array([0.0 for idx in range(*viz_idx_range)]).reshape(-1),
-            types=jnp.array([MapElementIds.STOP_SIGN for idx in range(*viz_idx_range)], dtype=np.int32).reshape(-1),
-            ids=jnp.array([idx for idx in range(*viz_idx_range)], dtype=np.int32).reshape(-1),
-            valid=jnp.array([True for idx in range(*viz_idx_range)], dtype=bool).reshape(-1),
+            x=jnp.array(ref_x).reshape(-1),
+            y=jnp.array(ref_y).reshape(-1),
+            z=jnp.zeros((n_viz_steps,)),
+            dir_x=jnp.array(ref_x / ref_norm).reshape(-1),
+            dir_y=jnp.array(ref_y / ref_norm).reshape(-1),
+            dir_z=jnp.zeros((n_viz_steps,)),
+            types=jnp.full((n_viz_steps,), MapElementIds.STOP_SIGN, dtype=np.int32),
+            ids=jnp.array(steps, dtype=np.int32).reshape(-1),
+            valid=jnp.ones((n_viz_steps,), dtype=bool),
         )  # shape=(#timesteps)
         n_steps_within_current_image = traj.shape[1]
         is_controlled = np.array([
@@ -15,7 +15,9 @@ def test_visualize_trajectory_tracking_episode():
     config = load_and_override_configs(TEST_CONFIG_PATHS)
 
     env_config = config['environment']
-    environment: Env = build_object_within_registry_from_config(ENVIRONMENTS, env_config)
+    environment: Env = build_object_within_registry_from_config(
+        ENVIRONMENTS, env_config, recording_level=visualize_trajectory_tracking_episode.required_recording_level
+    )
     algorithm_config = config['algorithm']
     algorithm = build_sb3_algorithm_from_config(environment, algorithm_config)
 
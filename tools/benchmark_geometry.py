@@ -0,0 +1,81 @@
+import argparse
+import timeit
+
+import numpy as np
+
+from drltt.common.geometry import (
+    transform_points,
+    batch_transform_to_local_from_world,
+    batch_transform_to_world_from_local,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark of SE(2) transforms: homogeneous-matrix implementation vs. fused kernels.'
+    )
+    parser.add_argument('--n-points', type=int, default=15, help='Number of points per pose, e.g. observation steps.')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--n-repeats', type=int, default=2000)
+
+    args = parser.parse_args()
+
+    return args
+
+
+def transform_by_homogeneous_matrix(points: np.ndarray, body_state: np.ndarray, trans_dir: str) -> np.ndarray:
+    """Previous implementation of `transform_between_local_and_world`, kept as the baseline."""
+    points, body_state = points.copy(), body_state.copy()
+    x, y, r = body_state[:3]
+    translation_matrix = np.array(((1.0, 0.0, -x), (0.0, 1.0, -y), (0.0, 0.0, 1.0)))
+    rotation_matrix = np.array(((np.cos(r), np.sin(r), 0.0), (-np.sin(r), np.cos(r), 0.0), (0.0, 0.0, 1.0)))
+    if trans_dir == 'world_to_local':
+        transform_matrix = rotation_matrix @ translation_matrix
+    else:
+        transform_matrix = np.linalg.inv(rotation_matrix @ translation_matrix)
+
+    return transform_points(points, transform_matrix)
+
+
+def report(name: str, baseline_time: float, fused_time: float):
+    print(
+        f'{name:<48s} baseline: {baseline_time * 1e6:10.2f} us, fused: {fused_time * 1e6:10.2f} us,'
+        f' speedup: {baseline_time / fused_time:6.1f}x'
+    )
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-10.0, 10.0, size=(args.batch_size, args.n_points, 2)).astype(np.float32)
+    poses = rng.uniform((-5.0, -5.0, -np.pi), (5.0, 5.0, np.pi), size=(args.batch_size, 3)).astype(np.float32)
+    out = np.empty_like(points)
+    n = args.n_repeats
+
+    # single pose, as in `ReferenceLineManager.get_observation_by_index`
+    for trans_dir, fused_function in (
+        ('world_to_local', batch_transform_to_local_from_world),
+        ('local_to_world', batch_transform_to_world_from_local),
+    ):
+        baseline_time = timeit.timeit(lambda: transform_by_homogeneous_matrix(points[0], poses[0], trans_dir), number=n)
+        fused_time = timeit.timeit(lambda: fused_function(points[0], poses[0], out=out[0]), number=n)
+        report(f'{trans_dir}, (N, 2) x (3,)', baseline_time / n, fused_time / n)
+
+    # batch of poses, looped for the baseline
+    for trans_dir, fused_function in (
+        ('world_to_local', batch_transform_to_local_from_world),
+        ('local_to_world', batch_transform_to_world_from_local),
+    ):
+        n_batched = max(n // args.batch_size, 1)
+        baseline_time = timeit.timeit(
+            lambda: [transform_by_homogeneous_matrix(p, pose, trans_dir) for p, pose in zip(points, poses)],
+            number=n_batched,
+        )
+        fused_time = timeit.timeit(lambda: fused_function(points, poses, out=out), number=n_batched)
+        report(
+            f'{trans_dir}, (B, N, 2) x (B, 3), B={args.batch_size}', baseline_time / n_batched, fused_time / n_batched
+        )
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    main(args)
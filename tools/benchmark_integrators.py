@@ -0,0 +1,136 @@
+import argparse
+import time
+
+import numpy as np
+
+from drltt.common.io import load_and_override_configs
+from drltt.simulator.dynamics_models import BicycleModel, DynamicsModelManager
+from drltt.simulator.dynamics_models.integrators import BUTCHER_TABLEAUS
+
+from drltt_proto.dynamics_model.hyper_parameter_pb2 import HyperParameter
+
+REFERENCE_INTEGRATION_SETTINGS = dict(integrator='rk4', n_substeps=256)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            'Accuracy vs. cost of integrators of bicycle models, over the same simulated duration at different control'
+            ' intervals.'
+        )
+    )
+    parser.add_argument(
+        '--config-files',
+        metavar='N',
+        type=str,
+        nargs='+',
+        help=(
+            'Config file(s). If multiple paths provided, the first config is base and will overridden by the rest'
+            ' respectively.'
+        ),
+    )
+    parser.add_argument('--step-intervals', type=float, nargs='+', default=[0.1, 0.2, 0.4])
+    parser.add_argument('--integrators', type=str, nargs='+', default=list(BUTCHER_TABLEAUS.keys()))
+    parser.add_argument('--n-substeps', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--duration', type=float, default=5.0, help='Simulated duration in [s].')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+
+    return args
+
+
+def roll_out(
+    init_states: np.ndarray,
+    actions: np.ndarray,
+    step_interval: float,
+    dynamics_parameters: dict,
+    **integration_settings,
+) -> np.ndarray:
+    """Roll out a batch of open-loop action sequences with batched stepping.
+
+    Args:
+        init_states: Initial states, shape=(B, 4).
+        actions: Actions, shape=(B, T, 2).
+        step_interval: Control interval.
+        dynamics_parameters: Hyper-parameters of dynamics, see `BicycleModelParameterTable.gather_dynamics_parameters`.
+
+    Returns:
+        np.ndarray: States, shape=(B, T + 1, 4).
+    """
+    states = np.empty((len(init_states), actions.shape[1] + 1, 4))
+    states[:, 0] = init_states
+    for step_index in range(actions.shape[1]):
+        states[:, step_index + 1] = BicycleModel.compute_batch_next_states(
+            states[:, step_index],
+            actions[:, step_index],
+            delta_t=step_interval,
+            dtype=np.float64,
+            **dynamics_parameters,
+            **integration_settings,
+        )
+
+    return states
+
+
+def main(args):
+    config = load_and_override_configs(args.config_files)
+    env_config = config['environment']
+    dynamics_model_manager = DynamicsModelManager(dynamics_model_configs=env_config['dynamics_model_configs'])
+    parameter_table = dynamics_model_manager.get_parameter_table()
+    rng = np.random.default_rng(args.seed)
+    dynamics_model_indices = rng.integers(len(parameter_table), size=args.batch_size)
+    dynamics_parameters = parameter_table.gather_dynamics_parameters(dynamics_model_indices)
+    init_states = rng.uniform(env_config['init_state_lb'], env_config['init_state_ub'], size=(args.batch_size, 4))
+    scalar_hyper_parameter = HyperParameter()
+    scalar_hyper_parameter.CopyFrom(dynamics_model_manager.dynamics_models[0].hyper_parameter)
+
+    print(
+        f'{"step_interval":>13s} {"integrator":>10s} {"n_substeps":>10s} {"evals/s":>8s}'
+        f' {"final_pos_err":>13s} {"max_pos_err":>11s} {"batch_us/sim_s":>14s} {"scalar_us/sim_s":>15s}'
+    )
+    for step_interval in args.step_intervals:
+        n_steps = int(round(args.duration / step_interval))
+        actions = rng.uniform(
+            parameter_table.action_space_lbs[dynamics_model_indices],
+            parameter_table.action_space_ubs[dynamics_model_indices],
+            size=(n_steps, args.batch_size, 2),
+        ).transpose(1, 0, 2)
+        reference_states = roll_out(
+            init_states, actions, step_interval, dynamics_parameters, **REFERENCE_INTEGRATION_SETTINGS
+        )
+        for integrator in args.integrators:
+            for n_substeps in args.n_substeps:
+                start_time = time.perf_counter()
+                states = roll_out(
+                    init_states,
+                    actions,
+                    step_interval,
+                    dynamics_parameters,
+                    integrator=integrator,
+                    n_substeps=n_substeps,
+                )
+                batch_time = time.perf_counter() - start_time
+                position_errors = np.linalg.norm(states[..., :2] - reference_states[..., :2], axis=-1)
+
+                # single state stepping, as in `TrajectoryTrackingEnv`
+                scalar_hyper_parameter.integrator, scalar_hyper_parameter.n_substeps = integrator, n_substeps
+                scalar_dynamics_model = BicycleModel(hyper_parameter=scalar_hyper_parameter)
+                scalar_dynamics_model.set_state(init_states[0])
+                start_time = time.perf_counter()
+                for action in actions[0]:
+                    scalar_dynamics_model.step(action, delta_t=step_interval)
+                scalar_time = time.perf_counter() - start_time
+
+                n_evaluations_per_second = len(BUTCHER_TABLEAUS[integrator][1]) * n_substeps / step_interval
+                print(
+                    f'{step_interval:13.3f} {integrator:>10s} {n_substeps:10d} {n_evaluations_per_second:8.0f}'
+                    f' {np.median(position_errors[:, -1]):13.2e} {position_errors.max():11.2e}'
+                    f' {batch_time / args.duration * 1e6:14.1f} {scalar_time / args.duration * 1e6:15.1f}'
+                )
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    main(args)
@@ -0,0 +1,103 @@
+import argparse
+import time
+
+import numpy as np
+import jax
+from jax import numpy as jnp
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.environments.jax_trajectory_tracking import (
+    build_jax_parameter_table,
+    build_jax_episodes,
+    build_batch_roll_out_function,
+)
+from drltt.simulator.trajectory.random_walk import batch_random_walk
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Throughput benchmark of the functional simulator in JAX.')
+    parser.add_argument(
+        '--config-files',
+        metavar='N',
+        type=str,
+        nargs='+',
+        help=(
+            'Config file(s). If multiple paths provided, the first config is base and will overridden by the rest'
+            ' respectively.'
+        ),
+    )
+    parser.add_argument('--n-episodes', type=int, default=4096)
+    parser.add_argument('--n-repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    config = load_and_override_configs(args.config_files)
+    env_config = dict(config['environment'])
+    env_config.pop('n_workers', None)
+    environment: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, env_config, recording_level='none'
+    )
+    hyper_parameter = environment.env_info.trajectory_tracking.hyper_parameter
+    dynamics_model_manager = environment.dynamics_model_manager
+    parameter_table = dynamics_model_manager.get_parameter_table()
+
+    # sample episodes
+    rng = np.random.default_rng(args.seed)
+    n_episodes = args.n_episodes
+    dynamics_model_indices = rng.choice(len(parameter_table), size=n_episodes, p=dynamics_model_manager.probabilities)
+    tracking_lengths = rng.integers(
+        hyper_parameter.tracking_length_lb, hyper_parameter.tracking_length_ub + 1, n_episodes
+    )
+    init_states = rng.uniform(hyper_parameter.init_state_lb, hyper_parameter.init_state_ub, size=(n_episodes, 4))
+    states, _, _ = batch_random_walk(
+        init_states.astype(np.float32),
+        tracking_lengths,
+        step_interval=hyper_parameter.step_interval,
+        **parameter_table.gather_dynamics_parameters(dynamics_model_indices),
+        **parameter_table.gather_action_space_bounds(dynamics_model_indices),
+        **parameter_table.gather_batch_integration_settings(dynamics_model_indices),
+        rng=rng,
+    )
+    episodes = build_jax_episodes(
+        [walk_states[:tracking_length, :2] for walk_states, tracking_length in zip(states, tracking_lengths)],
+        init_states,
+        dynamics_model_indices,
+        reference_line_length=hyper_parameter.tracking_length_ub + hyper_parameter.n_observation_steps,
+    )
+    jax_parameter_table = build_jax_parameter_table(parameter_table, environment.reward_manager.get_reward_weights())
+
+    # closed-loop rollout with a linear policy shared by all episodes
+    observation_dim = environment.observation_space.shape[0]
+    weights = jnp.asarray(rng.normal(scale=0.01, size=(observation_dim, 2)), dtype=jnp.float32)
+    batch_roll_out = build_batch_roll_out_function(
+        lambda weights, observation, step_index: jnp.tanh(observation @ weights),
+        step_interval=hyper_parameter.step_interval,
+        n_observation_steps=hyper_parameter.n_observation_steps,
+        n_steps=hyper_parameter.tracking_length_ub,
+    )
+
+    start_time = time.perf_counter()
+    jax.block_until_ready(batch_roll_out(weights, episodes, jax_parameter_table))
+    print(f'Compilation and first rollout: {time.perf_counter() - start_time:.2f} s')
+
+    start_time = time.perf_counter()
+    for _ in range(args.n_repeats):
+        rollouts = jax.block_until_ready(batch_roll_out(weights, episodes, jax_parameter_table))
+    elapsed_time = (time.perf_counter() - start_time) / args.n_repeats
+    n_steps = int(np.asarray(rollouts['masks']).sum())
+    print(
+        f'{n_episodes} episodes ({n_steps} steps) per rollout in {elapsed_time * 1e3:.1f} ms:'
+        f' {n_episodes / elapsed_time:.0f} episodes/s, {n_steps / elapsed_time:.0f} steps/s'
+    )
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    main(args)
@@ -0,0 +1,137 @@
+import argparse
+import os
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.environments.episode_columns import episode_to_columns, concatenate_episode_columns
+from drltt.simulator.rl_learning.sb3_learner import compute_bicycle_model_metrics
+from drltt.simulator.rl_learning.sb3_utils import roll_out_one_episode
+from drltt.simulator.trajectory_tracker import ILQRTracker, TrajectoryTracker
+
+TEST_SAMPLE_CONFIG_DIR = 'configs/trajectory_tracking/test_samples'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Side-by-side benchmark of trackers (iLQR vs. traced policy) on the same reference lines.'
+    )
+    parser.add_argument(
+        '--config-files',
+        metavar='N',
+        type=str,
+        nargs='+',
+        default=[
+            'configs/trajectory_tracking/config-track-base.yaml',
+            'configs/trajectory_tracking/config-track-tiny.yaml',
+        ],
+        help='Base config file(s), overridden by each test-sample config.',
+    )
+    parser.add_argument(
+        '--sample-config-files',
+        metavar='N',
+        type=str,
+        nargs='+',
+        default=[f'{TEST_SAMPLE_CONFIG_DIR}/{file_name}' for file_name in sorted(os.listdir(TEST_SAMPLE_CONFIG_DIR))],
+        help='Test-sample config file(s), each benchmarked separately.',
+    )
+    parser.add_argument(
+        '--checkpoint-dir',
+        type=str,
+        default='',
+        help='Directory of checkpoint with `traced_policy.pt`. The traced policy is skipped if not provided.',
+    )
+    parser.add_argument('--n-episodes', type=int, default=-1, help='Default to `n_episodes` of evaluation config.')
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+
+    return args
+
+
+def benchmark_trackers(
+    environment: TrajectoryTrackingEnv,
+    policy_funcs: Dict[str, Callable],
+    n_episodes: int,
+) -> List[Dict]:
+    """Roll out all trackers on the same episodes, sampled by the first tracker.
+
+    Args:
+        environment: Environment with recording level of at least 'summary'.
+        policy_funcs: Policy functions of trackers, indexed by names.
+        n_episodes: Number of episodes.
+
+    Returns:
+        List[Dict]: Records of trackers, containing tracker name, median wall time over episodes, and metrics.
+    """
+    wall_times = {tracker_name: list() for tracker_name in policy_funcs}
+    wall_times_per_step = {tracker_name: list() for tracker_name in policy_funcs}
+    all_episodes_columns = {tracker_name: list() for tracker_name in policy_funcs}
+    for episode_idx in range(n_episodes):
+        episode_kwargs = dict()
+        for tracker_name, policy_func in policy_funcs.items():
+            start_time = time.perf_counter()
+            states, _, _ = roll_out_one_episode(environment, policy_func, **episode_kwargs)
+            wall_time = time.perf_counter() - start_time
+            if len(episode_kwargs) == 0:
+                episode_kwargs = dict(
+                    init_state=states[0],
+                    dynamics_model_name=environment.get_current_dynamics_model().get_name(),
+                    reference_line=environment.get_reference_line(),
+                )
+            wall_times[tracker_name].append(wall_time * 1e3)
+            wall_times_per_step[tracker_name].append(wall_time * 1e3 / len(states))
+            all_episodes_columns[tracker_name].append(
+                episode_to_columns(environment.export_episode_data(), episode_id=episode_idx)
+            )
+
+    records = list()
+    for tracker_name in policy_funcs:
+        metrics = compute_bicycle_model_metrics(
+            concatenate_episode_columns(all_episodes_columns[tracker_name]), environment
+        )
+        metrics.pop('by_dynamics_model')
+        records.append(
+            dict(
+                tracker=tracker_name,
+                wall_time_ms=np.median(wall_times[tracker_name]),
+                wall_time_per_step_ms=np.median(wall_times_per_step[tracker_name]),
+                **metrics,
+            )
+        )
+
+    return records
+
+
+def main(args):
+    traced_policy_tracker = None
+    if args.checkpoint_dir != '':
+        traced_policy_tracker = TrajectoryTracker(checkpoint_dir=args.checkpoint_dir)
+
+    for sample_config_file in args.sample_config_files:
+        config = load_and_override_configs(list(args.config_files) + [sample_config_file])
+        n_episodes = args.n_episodes if args.n_episodes > 0 else config['evaluation']['eval_config']['n_episodes']
+        env_config = dict(config['environment'])
+        env_config.pop('n_workers', None)
+        environment: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+            ENVIRONMENTS, env_config, recording_level='summary'
+        )
+        environment.seed(args.seed)
+
+        policy_funcs = dict(ilqr=ILQRTracker(environment).policy_func)
+        if traced_policy_tracker is not None:
+            policy_funcs['traced_policy'] = traced_policy_tracker.policy_func
+
+        summary = pd.DataFrame.from_records(benchmark_trackers(environment, policy_funcs, n_episodes), index='tracker')
+        print(f'{sample_config_file}: {n_episodes} episodes, medians over episodes and percentiles over steps')
+        print(summary.to_string(float_format=lambda value: f'{value:.4f}'))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    main(args)
@@ -0,0 +1,31 @@
+import argparse
+import logging
+import time
+
+from drltt.simulator.environments.episode_log import read_episode_log
+from drltt.simulator.environments.episode_columns import episodes_to_columns, save_episode_columns
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Export an episode log (e.g. `eval_episodes.bin`) into a columnar table with one row per step.'
+    )
+    parser.add_argument('--episode-log', type=str, help='Path to the episode log.')
+    parser.add_argument('--output', type=str, help='Path to the table, in format of `.npz` or `.parquet`.')
+
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    logging.basicConfig(level=logging.INFO)
+    start_time = time.time()
+    columns = episodes_to_columns(read_episode_log(args.episode_log))
+    save_episode_columns(args.output, columns)
+    logging.info(f'Exported {len(columns["step"])} steps to {args.output} in {time.time() - start_time:.1f}s')
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    main(args)
@@ -0,0 +1,63 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from drltt.common import build_object_within_registry_from_config
+from drltt.common.io import load_and_override_configs
+from drltt.simulator.environments import ENVIRONMENTS, TrajectoryTrackingEnv
+from drltt.simulator.trajectory.reference_line_pool import generate_reference_line_pool
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Generate a memory-mapped pool of reference lines for `environment.reference_line_pool_dir`.'
+    )
+    parser.add_argument(
+        '--config-files',
+        metavar='N',
+        type=str,
+        nargs='+',
+        help=(
+            'Config file(s). If multiple paths provided, the first config is base and will overridden by the rest'
+            ' respectively.'
+        ),
+    )
+    parser.add_argument('--pool-dir', type=str, help='Output directory of the pool.')
+    parser.add_argument('--n-reference-lines', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=65536)
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+
+    return args
+
+
+def main(args):
+    logging.basicConfig(level=logging.INFO)
+    config = load_and_override_configs(args.config_files)
+    env_config = dict(config['environment'])
+    env_config.pop('n_workers', None)
+    env_config.pop('reference_line_pool_dir', None)
+    environment: TrajectoryTrackingEnv = build_object_within_registry_from_config(
+        ENVIRONMENTS, env_config, recording_level='none'
+    )
+
+    np.random.seed(args.seed)
+    start_time = time.time()
+    generate_reference_line_pool(
+        args.pool_dir,
+        environment.env_info.trajectory_tracking.hyper_parameter,
+        environment.dynamics_model_manager,
+        n_reference_lines=args.n_reference_lines,
+        chunk_size=args.chunk_size,
+    )
+    logging.info(
+        f'Generated {args.n_reference_lines} reference lines at {args.pool_dir} in {time.time() - start_time:.1f}s'
+    )
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    main(args)
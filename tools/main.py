@@ -12,9 +12,11 @@ from stable_baselines3.common.base_class import BaseAlgorithm
 
 from drltt.common import build_object_within_registry_from_config
 from drltt.common.io import load_and_override_configs, override_config, save_config_to_yaml
-from drltt.simulator.rl_learning.sb3_learner import train_with_sb3, eval_with_sb3
+from drltt.simulator.rl_learning.sb3_learner import train_with_sb3, eval_with_sb3, merge_eval_shards
+from drltt.simulator.rl_learning.sb3_parallel_eval import parse_shard
 from drltt.simulator.rl_learning.sb3_export import export_sb3_jit_module
-from drltt.simulator.environments import ENVIRONMENTS, ExtendedGymEnv
+from drltt.simulator.rl_learning.sb3_normalization import load_vec_normalize
+from drltt.simulator.environments import ENVIRONMENTS, ExtendedGymEnv, SharedMemoryVecEnv
 from drltt.simulator.rl_learning.sb3_learner import SB3_MODULES
 
 
@@ -36,6 +38,18 @@ def parse_args():
     parser.add_argument('--trace', action='store_true', default=False)
     parser.add_argument('--test-case-save-format', type=str, default='protobuf')
     parser.add_argument('--num-test-cases', type=int, default=1)
+    parser.add_argument(
+        '--shard',
+        type=str,
+        default='0/1',
+        help='Evaluate only the i-th (0-based) of n shards of episodes, in format of `i/n`.',
+    )
+    parser.add_argument(
+        '--merge-eval-shards',
+        action='store_true',
+        default=False,
+        help='Merge outputs of all evaluation shards gathered in checkpoint directory, and compute metrics.',
+    )
 
     args = parser.parse_args()
 
@@ -87,31 +101,50 @@ def main(args):
 
     checkpoint_file_prefix = f'{args.checkpoint_dir}/checkpoint'  # without extension
 
+    # number of worker processes applies to training only
+    n_workers = env_config.pop('n_workers', 1)
+
     if args.train:
-        environment: ExtendedGymEnv = build_object_within_registry_from_config(ENVIRONMENTS, deepcopy(env_config))
+        if n_workers > 1:
+            environment = SharedMemoryVecEnv(deepcopy(env_config), n_workers=n_workers)
+        else:
+            environment: ExtendedGymEnv = build_object_within_registry_from_config(ENVIRONMENTS, deepcopy(env_config))
         train_with_sb3(
             environment=environment,
             algorithm_config=deepcopy(config['algorithm']),
             learning_config=deepcopy(config['learning']),
             checkpoint_file_prefix=checkpoint_file_prefix,
+            normalization_config=deepcopy(config.get('normalization', None)),
         )
+        environment.close()
 
-    if args.eval:
+    if args.eval or args.merge_eval_shards:
         eval_config = config['evaluation']
         eval_env_config = override_config(deepcopy(env_config), deepcopy(eval_config['overriden_environment']))
         eval_environment: ExtendedGymEnv = build_object_within_registry_from_config(
             ENVIRONMENTS, deepcopy(eval_env_config)
         )
 
+    if args.eval:
         eval_algorithm: BaseAlgorithm = SB3_MODULES[config['algorithm']['type']].load(checkpoint_file_prefix)
 
         eval_with_sb3(
             eval_environment,
             eval_algorithm,
             report_dir=args.checkpoint_dir,
+            vec_normalize=load_vec_normalize(args.checkpoint_dir, eval_environment),
+            env_config=eval_env_config,
+            shard=parse_shard(args.shard),
             **eval_config['eval_config'],
         )
 
+    if args.merge_eval_shards:
+        merge_eval_shards(
+            eval_environment,
+            report_dir=args.checkpoint_dir,
+            compute_metrics_name=eval_config['eval_config']['compute_metrics_name'],
+        )
+
     if args.trace:
         trace_algorithm: BaseAlgorithm = SB3_MODULES[config['algorithm']['type']].load(checkpoint_file_prefix)
         trace_environment: ExtendedGymEnv = build_object_within_registry_from_config(ENVIRONMENTS, deepcopy(env_config))
@@ -122,6 +155,7 @@ def main(args):
             export_dir=args.checkpoint_dir,
             n_test_cases=args.num_test_cases,
             test_case_save_format=args.test_case_save_format,
+            vec_normalize=load_vec_normalize(args.checkpoint_dir, trace_environment),
         )
 
 